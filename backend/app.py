@@ -1,23 +1,70 @@
 
-from flask import Flask, request, jsonify, send_from_directory, render_template
+from flask import Flask, Request, request, jsonify, send_from_directory, render_template, Response, stream_with_context
 from flask_cors import CORS
 import os
 import fitz  # PyMuPDF
-import pandas as pd
-import shutil
+import csv
 from datetime import datetime
-from pdf_analysis import analyze_pdf_structure
 import logging
 import hashlib
+import json
+import time
+import uuid
+from concurrent.futures import wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+import PyPDF2
 from pdf_obfuscation import scan_pdf_for_obfuscation
+from file_reader import hash_file
+from document_session import DocumentSession
+from result_cache import ResultCache, detector_fingerprint
+from scan_jobs import JobQueue, SharedProcessPool
+from upload_ingest import ingest_upload, UploadRejected, UploadRegistry, UploadSpool, MAX_UPLOAD_SIZE
 
 app = Flask(__name__, static_folder='static', static_url_path='/static')
 CORS(app)
+# Requests much larger than an accepted upload are refused before they are parsed
+app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_SIZE + 1024 * 1024
 
 UPLOAD_FOLDER = './uploads'
-QUARANTINE_FOLDER = './quarantine'
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-os.makedirs(QUARANTINE_FOLDER, exist_ok=True)
+# Uploads are stored under their SHA-256: the registry keeps their original filenames
+UPLOAD_REGISTRY_PATH = './cache/uploads.sqlite3'
+upload_registry = UploadRegistry(UPLOAD_REGISTRY_PATH)
+
+class UploadRequest(Request):
+    """Uploaded files are hashed, checked and spooled into the upload folder while the request is received."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return UploadSpool(UPLOAD_FOLDER)
+
+app.request_class = UploadRequest
+
+# Scan results are cached by file SHA-256; the fingerprint of the detector sources invalidates them when a detector changes
+RESULT_CACHE_PATH = './cache/scan_results.sqlite3'
+DETECTOR_SOURCES = ['app.py', 'document_session.py', 'pdf_analysis.py', 'pdf_obfuscation.py', 'pdf-parser.py']
+result_cache = ResultCache(
+    RESULT_CACHE_PATH,
+    detector_fingerprint(
+        [os.path.join(os.path.dirname(os.path.abspath(__file__)), source) for source in DETECTOR_SOURCES],
+        extra=[fitz.VersionBind, PyPDF2.__version__],
+    ),
+)
+
+# Uploads submitted to /jobs are scanned in the background by a pool of scan processes
+JOB_STORE_PATH = './cache/jobs.sqlite3'
+JOB_WORKERS = 2
+JOB_EVENTS_INTERVAL = 0.5
+# An event stream is closed after this many seconds (with a "timeout" event), so it can not hold a worker thread forever
+JOB_EVENTS_MAX_DURATION = 10 * 60
+scan_jobs = JobQueue(JOB_STORE_PATH, workers=JOB_WORKERS)
+
+# /batch-scan scans the upload folder with one scan process per core, and writes a CSV row per file as it finishes,
+# to a CSV file of its own; all batches of a worker share its pool of scan processes
+BATCH_WORKERS = os.cpu_count() or 1
+BATCH_CSV_FOLDER = './batch_results'
+os.makedirs(BATCH_CSV_FOLDER, exist_ok=True)
+batch_pool = SharedProcessPool(BATCH_WORKERS)
+BATCH_CSV_FIELDS = ["filename", "total_blocks", "page_count", "is_suspicious", "sha256", "error"]
 
 @app.route("/")
 def index():
@@ -32,106 +79,137 @@ def serve_static(path):
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5000, debug=True)
 
-def scan_pdf(path):
-    suspicious_blocks = 0
-    total_blocks = 0
-    metadata = {}
-    page_count = 0
-    encrypted = False
-    is_modified = False
-    has_suspicious_dates = False
-    additional_metadata = {}
-    structure_analysis = analyze_pdf_structure(path)
-    is_suspicious = check_threat_intelligence(structure_analysis)
+# Values reported when a detector fails
+SCAN_DEFAULTS = {
+    "total_blocks": 0,
+    "page_count": 0,
+    "encrypted": False,
+    "is_modified": False,
+    "Note": False,
+    "created": "Unknown",
+    "modified": "Unknown",
+    "structure_analysis": "No structure analysis available",
+    "structure_keywords": {},
+    "structure_counts": {},
+    "is_suspicious": False,
+}
+
+def file_stage(session):
+    return {
+        "file_size_bytes": session.file_size,
+        "file_size_kb": round(session.file_size / 1024, 2),
+        "sha256": session.digests["sha256"],
+        "md5": session.digests["md5"],
+    }
 
-    try:
-        doc = fitz.open(path)
-        encrypted = doc.is_encrypted
-        metadata = doc.metadata or {}
-        page_count = doc.page_count
-
-        # Extract additional metadata fields
-        additional_metadata = {
-            "title": metadata.get("title", "Unknown"),
-            "subject": metadata.get("subject", "Unknown"),
-            "keywords": metadata.get("keywords", "Unknown")
-        }
-
-        # Check if the PDF has been modified
-        creation_date = metadata.get("creationDate", "Unknown")
-        modification_date = metadata.get("modDate", "Unknown")
-        if creation_date != "Unknown" and modification_date != "Unknown":
-            is_modified = creation_date != modification_date
-
-        # Check for suspicious dates (e.g., future dates)
-        now = datetime.now()
-        try:
-            creation_datetime = datetime.strptime(creation_date[2:16], "%Y%m%d%H%M%S")
-            modification_datetime = datetime.strptime(modification_date[2:16], "%Y%m%d%H%M%S")
-            if creation_datetime > now or modification_datetime > now:
-                has_suspicious_dates = "Future dates"
-        except Exception:
-            pass  # Ignore parsing errors for invalid dates
-
-        # Inspect the PDF structure
-        for page in doc:
-            blocks = page.get_text("dict")["blocks"]
-            total_blocks += len(blocks)
-            for block in blocks:
-                if block["type"] == 0 and "text" in block:
-                    if any(c in block["text"] for c in ["<", ">"]):
-                        suspicious_blocks += 1
-        doc.close()
-
-        # Analyze the PDF structure using pdf-parser.py
-        structure_analysis = analyze_pdf_structure(path)
-
-        # Call the obfuscation scan
-        obfuscation_results = scan_pdf_for_obfuscation(path)
+def structure_stage(session):
+    structure = session.structure
+    if structure is None:
+        raise ValueError("pdf-parser could not parse the PDF")
+    return {
+        "structure_analysis": structure["report"],  # Include structure analysis
+        "structure_keywords": structure["keywords"],
+        "structure_counts": structure["counts"],
+        "is_suspicious": check_threat_intelligence(structure),
+    }
 
-    except Exception as e:
-        logging.error(f"Error scanning {path}: {e}")
+def metadata_stage(session):
+    doc = session.document
+    metadata = session.metadata
+    is_modified = False
+    has_suspicious_dates = False
 
-    file_size = os.path.getsize(path)
+    # Check if the PDF has been modified
+    creation_date = metadata.get("creationDate", "Unknown")
+    modification_date = metadata.get("modDate", "Unknown")
+    if creation_date != "Unknown" and modification_date != "Unknown":
+        is_modified = creation_date != modification_date
 
-    # Prepare the result
-    result = {
-        "suspicious_blocks": suspicious_blocks,
-        "total_blocks": total_blocks,
-        "file_size_bytes": file_size,
-        "file_size_kb": round(file_size / 1024, 2),
-        "page_count": page_count,
-        "encrypted": encrypted,
+    # Check for suspicious dates (e.g., future dates)
+    now = datetime.now()
+    try:
+        creation_datetime = datetime.strptime(creation_date[2:16], "%Y%m%d%H%M%S")
+        modification_datetime = datetime.strptime(modification_date[2:16], "%Y%m%d%H%M%S")
+        if creation_datetime > now or modification_datetime > now:
+            has_suspicious_dates = "Future dates"
+    except Exception:
+        pass  # Ignore parsing errors for invalid dates
+
+    return {
+        "page_count": doc.page_count,
+        "encrypted": doc.is_encrypted,
         "is_modified": is_modified,
         "Note": has_suspicious_dates,
-        "created": metadata.get("creationDate", "Unknown"),
-        "modified": metadata.get("modDate", "Unknown"),
-        **additional_metadata,  # Include additional metadata fields
-        "structure_analysis": structure_analysis,  # Include structure analysis
-        "is_suspicious": is_suspicious,
-        **obfuscation_results  # Include obfuscation scan results
+        "created": creation_date,
+        "modified": modification_date,
+        # Additional metadata fields
+        "title": metadata.get("title", "Unknown"),
+        "subject": metadata.get("subject", "Unknown"),
+        "keywords": metadata.get("keywords", "Unknown"),
     }
 
+def text_block_stage(session):
+    # Inspect the text blocks of each page: (x0, y0, x1, y1, text, number, type)
+    total_blocks = sum(len(blocks) for blocks in session.page_blocks)
+    return {"total_blocks": total_blocks}
+
+def obfuscation_stage(session):
+    # The patterns are matched on the text of PyPDF2, as they were written for it: PyMuPDF splits and joins text differently
+    return scan_pdf_for_obfuscation(session.path, session.data)
+
+# Detectors, each reading from the document session and returning result fields
+SCAN_STAGES = [file_stage, structure_stage, metadata_stage, text_block_stage, obfuscation_stage]
+
+# What a failed stage reports: a PDF whose structure can not be analyzed is suspicious, not clean
+FAILED_STAGE_RESULTS = {
+    "structure_stage": {"structure_analysis": "Structure analysis failed", "is_suspicious": True},
+}
+
+def scan_pdf(path, progress=None, data=None, digests=None):
+    # progress(stage, done, total) is called before each detector stage
+    result = dict(SCAN_DEFAULTS)
+    # The file is opened and parsed once, all detectors share the session
+    with DocumentSession(path, data, digests) as session:
+        sha256 = session.digests["sha256"]
+        cached_result = result_cache.get(sha256)
+        if cached_result is not None:
+            logging.info(f"Cached result for {path} ({sha256})")
+            return cached_result
+        complete = True
+        for index, stage in enumerate(SCAN_STAGES):
+            if progress:
+                progress(stage.__name__, index, len(SCAN_STAGES))
+            try:
+                result.update(stage(session))
+            except Exception as e:
+                logging.error(f"Error scanning {path} in {stage.__name__}: {e}")
+                result.update(FAILED_STAGE_RESULTS.get(stage.__name__, {}))
+                complete = False
+        # A result with failed detectors is not cached, the failure may be transient
+        if complete:
+            result_cache.put(sha256, result)
+
     # Print the result for debugging
     logging.info(result)
 
     return result
 
 
-def check_threat_intelligence(structure_analysis):
+def check_threat_intelligence(structure):
+    if not structure:
+        return False
+    # A malformed /ObjStm hides the objects stored in it
+    if structure.get("objstm_errors"):
+        return True
     suspicious_keywords = ['/JavaScript', '/Launch', '/OpenAction']
     for keyword in suspicious_keywords:
-        if keyword in structure_analysis:
+        if keyword in structure["keywords"]:
             return True
     return False
 
 def calculate_file_hash(file_path):
     """Calculate the SHA-256 hash of a file."""
-    sha256_hash = hashlib.sha256()
-    with open(file_path, "rb") as f:
-        for byte_block in iter(lambda: f.read(4096), b""):
-            sha256_hash.update(byte_block)
-    return sha256_hash.hexdigest()
+    return hash_file(file_path, ("sha256",))["sha256"]
 
 def test_calculate_file_hash():
     test_file = "test.pdf"
@@ -140,71 +218,230 @@ def test_calculate_file_hash():
     expected_hash = hashlib.sha256(b"Test content").hexdigest()
     assert calculate_file_hash(test_file) == expected_hash
 
-@app.route('/upload', methods=['POST'])
-def upload_file():
-    # Retrieve the file from the request
-    file = request.files.get('file')  # Use .get() to avoid KeyError if 'file' is missing
-
+def save_upload(file):
+    """Save an uploaded PDF; returns ((filepath, data, digests), None) or (None, error response)."""
     # Check if no file was uploaded
     if not file or file.filename == '':
         logging.error("No file selected")
-        return jsonify({"error": "No file selected"}), 400
+        return None, (jsonify({"error": "No file selected"}), 400)
 
     # Check if the file is a PDF
     if not file.filename.lower().endswith('.pdf'):
         logging.error("Invalid file type")
-        return jsonify({"error": "Only PDF files are allowed"}), 400
+        return None, (jsonify({"error": "Only PDF files are allowed"}), 400)
 
-    # Save the file to the upload folder
-    filepath = os.path.join(UPLOAD_FOLDER, file.filename)
+    # Save the file, received into an UploadSpool, to the upload folder under its SHA-256
     try:
-        file.save(filepath)
-        logging.info(f"File saved to {filepath}")
+        filepath, data, digests = ingest_upload(file.stream, UPLOAD_FOLDER)
+        upload_registry.record(filepath, file.filename)
+        logging.info(f"File {file.filename} saved to {filepath}")
+    except UploadRejected as e:
+        logging.error(f"Upload rejected: {file.filename}: {e}")
+        return None, (jsonify({"error": str(e)}), e.status)
     except Exception as e:
         logging.error(f"Error saving file: {e}")
-        return jsonify({"error": f"Error saving file: {e}"}), 500
+        return None, (jsonify({"error": f"Error saving file: {e}"}), 500)
+    return (filepath, data, digests), None
 
-    # Scan the file for suspicious content
-    try:
-        scan_result = scan_pdf(filepath)  # Get the full dictionary
-        suspicious_count = scan_result["suspicious_blocks"]  # Extract suspicious_blocks
-        logging.info(f"Scanned file {file.filename}, suspicious blocks: {suspicious_count}")
-    except Exception as e:
-        logging.error(f"Error scanning file: {e}")
-        return jsonify({"error": f"Error scanning file: {e}"}), 500
+def scan_upload(filepath, filename, progress=None, data=None, digests=None):
+    """Scan a saved upload; raises on errors."""
+    scan_result = scan_pdf(filepath, progress, data, digests)  # Get the full dictionary
+    logging.info(f"Scanned file {filename}, suspicious: {scan_result['is_suspicious']}")
 
     # Prepare the result
-    result = {
-        "filename": file.filename,
+    return {
+        "filename": filename,
         **scan_result  # Include all scan results in the response
     }
 
-    # Move the file to the quarantine folder if it is suspicious
-    if suspicious_count >= 10:
-        try:
-            shutil.move(filepath, os.path.join(QUARANTINE_FOLDER, file.filename))
-            logging.info(f"File moved to quarantine: {file.filename}")
-        except Exception as e:
-            logging.error(f"Error moving file to quarantine: {e}")
-            return jsonify({"error": f"Error moving file to quarantine: {e}"}), 500
+@app.errorhandler(413)
+def request_too_large(e):
+    return jsonify({"error": f"File is larger than {MAX_UPLOAD_SIZE // (1024 * 1024)} MB"}), 413
+
+# Raised by an UploadSpool while the request is received, as soon as the upload is known to be junk
+@app.errorhandler(UploadRejected)
+def upload_rejected(e):
+    logging.error(f"Upload rejected: {e}")
+    return jsonify({"error": str(e)}), e.status
+
+@app.route('/upload', methods=['POST'])
+def upload_file():
+    # Retrieve the file from the request
+    file = request.files.get('file')  # Use .get() to avoid KeyError if 'file' is missing
+    upload, error = save_upload(file)
+    if error:
+        return error
+
+    # Scan the file for suspicious content, from the data read while saving it
+    filepath, data, digests = upload
+    try:
+        result = scan_upload(filepath, file.filename, data=data, digests=digests)
+    except Exception as e:
+        logging.error(f"Error scanning file: {e}")
+        return jsonify({"error": f"Error scanning file: {e}"}), 500
 
     return jsonify(result)
 
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """Save the upload and queue its scan; the scan result is fetched from the job."""
+    file = request.files.get('file')
+    upload, error = save_upload(file)
+    if error:
+        return error
+
+    # The scan process reads the file itself, rather than receiving its content through the pool
+    job_id = scan_jobs.submit(file.filename, scan_upload, upload[0], file.filename)
+    return jsonify({
+        "job_id": job_id,
+        "status_url": f"/jobs/{job_id}",
+        "result_url": f"/jobs/{job_id}/result",
+        "events_url": f"/jobs/{job_id}/events",
+    }), 202
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    job = scan_jobs.store.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    return jsonify(job)
+
+@app.route('/jobs/<job_id>/result', methods=['GET'])
+def job_result(job_id):
+    job = scan_jobs.store.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown job"}), 404
+    if job["status"] == "error":
+        return jsonify({"error": f"Error scanning file: {job['error']}"}), 500
+    if job["status"] != "done":
+        # Not finished yet: poll again
+        return jsonify({"status": job["status"], "stage": job["stage"], "progress": job["progress"]}), 202
+    return jsonify(job["result"])
+
+@app.route('/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """Server-sent events: the job state on every change, until it is done or failed.
+
+    After JOB_EVENTS_MAX_DURATION a "timeout" event ends the stream; the client opens a new one.
+    """
+    def events():
+        last_state = None
+        deadline = time.monotonic() + JOB_EVENTS_MAX_DURATION
+        while True:
+            job = scan_jobs.store.get(job_id)
+            if job is None:
+                yield f"event: error\ndata: {json.dumps({'error': 'Unknown job'})}\n\n"
+                return
+            state = (job["status"], job["stage"], job["progress"])
+            if state != last_state:
+                yield f"data: {json.dumps(job)}\n\n"
+                last_state = state
+            if job["status"] in ("done", "error"):
+                return
+            if time.monotonic() >= deadline:
+                yield f"event: timeout\ndata: {json.dumps({'status': job['status']})}\n\n"
+                return
+            time.sleep(JOB_EVENTS_INTERVAL)
+
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+def scan_batch_file(filepath):
+    """Scan one file of a batch; errors are reported in the result instead of stopping the batch."""
+    # Reported under the name it was uploaded with, not its <sha256>.pdf
+    filename = upload_registry.filename(filepath)
+    try:
+        return scan_upload(filepath, filename)
+    except Exception as e:
+        logging.error(f"Error scanning file {filename}: {e}")
+        return {"filename": filename, "error": str(e)}
+
 @app.route('/batch-scan', methods=['POST'])
 def batch_scan():
-    results = []
-    files = os.listdir(UPLOAD_FOLDER)
-    for file in files:
-        filepath = os.path.join(UPLOAD_FOLDER, file)
-        suspicious_count = scan_pdf(filepath)
-        results.append({"filename": file, "suspicious_blocks": suspicious_count})
-        if suspicious_count >= 10:
-            shutil.move(filepath, os.path.join(QUARANTINE_FOLDER, file))
-
-    df = pd.DataFrame(results)
-    df.to_csv('scan_results.csv', index=False)
-
-    return jsonify(results)
+    """Scan every file in the upload folder in parallel, streaming one NDJSON line per file.
+
+    The first line gives the batch id and its cancel URL. The batch is tracked
+    like a scan job, so /jobs/<batch_id> reports its progress. The last line is
+    a summary with status "done" or "cancelled" and the path of the batch CSV
+    file, BATCH_CSV_FOLDER/<batch_id>.csv.
+    """
+    files = sorted(file for file in os.listdir(UPLOAD_FOLDER) if os.path.isfile(os.path.join(UPLOAD_FOLDER, file)))
+    batch_id = uuid.uuid4().hex
+    scan_jobs.store.create(batch_id, f"batch of {len(files)} files")
+    scan_jobs.store.update(batch_id, status="running")
+
+    def cancelled():
+        job = scan_jobs.store.get(batch_id)
+        return job is None or job["status"] == "cancelled"
+
+    def results():
+        yield json.dumps({"batch_id": batch_id, "files": len(files), "cancel_url": f"/batch-scan/{batch_id}/cancel"}) + "\n"
+        scanned = suspicious = errors = 0
+        status = "done"
+        batch_csv = os.path.join(BATCH_CSV_FOLDER, f"{batch_id}.csv")
+        executor = batch_pool.get()
+        # Only a few files per scan process are queued at a time: a cancel takes effect right away, and a large backlog is not all submitted up front
+        pending_files = iter(files)
+        pending = set()
+        try:
+            with open(batch_csv, 'w', newline='') as csv_file:
+                writer = csv.DictWriter(csv_file, fieldnames=BATCH_CSV_FIELDS, extrasaction='ignore')
+                writer.writeheader()
+                while True:
+                    for file in pending_files:
+                        pending.add(executor.submit(scan_batch_file, os.path.join(UPLOAD_FOLDER, file)))
+                        if len(pending) >= BATCH_WORKERS * 4:
+                            break
+                    if not pending:
+                        break
+                    finished, pending = wait(pending, timeout=JOB_EVENTS_INTERVAL, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        result = future.result()
+                        scanned += 1
+                        suspicious += bool(result.get("is_suspicious"))
+                        errors += "error" in result
+                        writer.writerow(result)
+                        yield json.dumps(result) + "\n"
+                    csv_file.flush()
+                    if finished:
+                        scan_jobs.store.update(batch_id, progress=scanned / len(files))
+                    if cancelled():
+                        status = "cancelled"
+                        break
+        except Exception as e:
+            logging.error(f"Error in batch {batch_id}: {e}")
+            status = "error"
+            if isinstance(e, BrokenProcessPool):
+                batch_pool.discard(executor)
+            raise
+        finally:
+            # Also reached when the client disconnects: drop the files of this batch that were not started yet
+            for future in pending:
+                future.cancel()
+            if status == "done" and scanned < len(files):
+                status = "cancelled"
+            summary = {"status": status, "files": len(files), "scanned": scanned, "suspicious": suspicious, "errors": errors, "csv": batch_csv}
+            scan_jobs.store.update(batch_id, status=status, result=summary)
+        yield json.dumps({"summary": summary}) + "\n"
+
+    return Response(
+        stream_with_context(results()),
+        mimetype="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.route('/batch-scan/<batch_id>/cancel', methods=['POST'])
+def cancel_batch_scan(batch_id):
+    job = scan_jobs.store.get(batch_id)
+    if job is None:
+        return jsonify({"error": "Unknown batch"}), 404
+    if job["status"] == "running":
+        job["status"] = "cancelled"
+        scan_jobs.store.update(batch_id, status="cancelled")
+    return jsonify({"batch_id": batch_id, "status": job["status"]})
 
 if __name__ == "__main__":
     app.run(port=5000, debug=True)
@@ -0,0 +1,108 @@
+import logging
+import multiprocessing
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+import fitz  # PyMuPDF
+
+from file_reader import read_file
+from pdf_analysis import analyze_pdf_structure
+from scan_jobs import SharedProcessPool
+
+# get_text("blocks") with the flags of get_text("dict"): image blocks are still listed, but their pixels are not extracted
+TEXT_BLOCK_FLAGS = fitz.TEXTFLAGS_BLOCKS | fitz.TEXT_PRESERVE_IMAGES
+
+# Documents with this many pages or more are extracted by a pool of PAGE_WORKERS processes, a range of pages each;
+# not in a scan process of the job queue or the batch scan, those pools already use every core.
+# The pool is shared by all requests of a process, so concurrent large documents wait for it rather than start more processes
+# multiprocessing.parent_process, which tells a worker process apart, requires Python 3.8 (the Dockerfile uses 3.9)
+PARALLEL_PAGE_THRESHOLD = 500
+PAGE_WORKERS = os.cpu_count() or 1
+page_pool = SharedProcessPool(PAGE_WORKERS)
+
+
+def extract_page_blocks(path, start, stop):
+    """Text blocks of pages start to stop - 1, from a PyMuPDF handle opened in this process."""
+    with fitz.open(path) as document:
+        return [document[number].get_text("blocks", flags=TEXT_BLOCK_FLAGS) for number in range(start, stop)]
+
+
+class DocumentSession:
+    """One PDF, read and parsed once and shared by all detectors.
+
+    The file is read once, together with its digests. pdf-parser's structure
+    statistics, the PyMuPDF document, its metadata and the text blocks of
+    each page are loaded on first use and cached, so every detector reads
+    from the same parse.
+    """
+
+    def __init__(self, path, data=None, digests=None):
+        # data and digests are given when the file was already read (as by ingest_upload)
+        self.path = path
+        if data is None:
+            data, digests = read_file(path)
+        self.data, self.digests = data, digests
+        self._structure = None
+        self._structure_loaded = False
+        self._document = None
+        self._page_blocks = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def file_size(self):
+        return len(self.data)
+
+    @property
+    def structure(self):
+        """pdf-parser statistics (see analyze_pdf_structure), None if parsing failed."""
+        if not self._structure_loaded:
+            self._structure = analyze_pdf_structure(self.path, self.data)
+            self._structure_loaded = True
+        return self._structure
+
+    @property
+    def document(self):
+        if self._document is None:
+            self._document = fitz.open(stream=self.data, filetype="pdf")
+        return self._document
+
+    @property
+    def metadata(self):
+        return self.document.metadata or {}
+
+    @property
+    def page_blocks(self):
+        """The blocks of each page as PyMuPDF's get_text("blocks"): (x0, y0, x1, y1, text, number, type)."""
+        if self._page_blocks is None:
+            page_count = self.document.page_count
+            if page_count >= PARALLEL_PAGE_THRESHOLD and PAGE_WORKERS > 1 and multiprocessing.parent_process() is None:
+                try:
+                    self._page_blocks = self._parallel_page_blocks(page_count)
+                except Exception as e:
+                    logging.error(f"Error extracting the pages of {self.path} in parallel: {e}")
+            if self._page_blocks is None:
+                self._page_blocks = [page.get_text("blocks", flags=TEXT_BLOCK_FLAGS) for page in self.document]
+        return self._page_blocks
+
+    def _parallel_page_blocks(self, page_count):
+        # A few ranges per process, so a range of heavy pages does not keep the others waiting
+        range_size = -(-page_count // (PAGE_WORKERS * 4))
+        starts = range(0, page_count, range_size)
+        stops = [min(start + range_size, page_count) for start in starts]
+        executor = page_pool.get()
+        try:
+            ranges = executor.map(extract_page_blocks, [self.path] * len(starts), starts, stops)
+            return [blocks for page_range in ranges for blocks in page_range]
+        except BrokenProcessPool:
+            page_pool.discard(executor)
+            raise
+
+    def close(self):
+        if self._document is not None:
+            self._document.close()
+            self._document = None
@@ -0,0 +1,32 @@
+import hashlib
+
+# Digests computed for every scanned file
+DIGEST_ALGORITHMS = ("sha256", "md5")
+
+# Size of the pieces hash_file reads, the content is never held as a whole
+HASH_CHUNK_SIZE = 4096
+
+
+def read_file(file_path, algorithms=DIGEST_ALGORITHMS):
+    """Read a file once and compute its digests from the same buffer.
+
+    Returns (data, digests): the file content as bytes, to be handed to the
+    parsers, and a dict mapping each algorithm name to its hex digest.
+    """
+    with open(file_path, "rb") as f:
+        data = f.read()
+    digests = {algorithm: hashlib.new(algorithm, data).hexdigest() for algorithm in algorithms}
+    return data, digests
+
+
+def hash_file(file_path, algorithms=DIGEST_ALGORITHMS):
+    """Compute the digests of a file in chunks, for callers that only need the hashes.
+
+    Returns a dict mapping each algorithm name to its hex digest, like read_file.
+    """
+    hashes = {algorithm: hashlib.new(algorithm) for algorithm in algorithms}
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            for hash in hashes.values():
+                hash.update(chunk)
+    return {algorithm: hash.hexdigest() for algorithm, hash in hashes.items()}
@@ -1,17 +1,14 @@
 # This code scans a PDF file for obfuscation patterns, generates a forensic report, and saves it as a JSON file.
+import io
 import re
 import sys
 import json
-import hashlib
 import datetime
 from PyPDF2 import PdfReader
+from file_reader import hash_file, read_file
 
 def calculate_file_hash(filepath):
-    sha256_hash = hashlib.sha256()
-    with open(filepath, "rb") as f:
-        for byte_block in iter(lambda: f.read(4096), b""):
-            sha256_hash.update(byte_block)
-    return sha256_hash.hexdigest()
+    return hash_file(filepath, ("sha256",))["sha256"]
 
 def scan_pdf_for_obfuscation(file_path):
     suspicious_hex_count = 0
@@ -19,11 +16,12 @@ def scan_pdf_for_obfuscation(file_path):
     total_objects_scanned = 0
     findings = []
 
-    file_hash = calculate_file_hash(file_path)
+    # One read of the file feeds both the digests and the PDF reader
+    data, digests = read_file(file_path)
     scan_timestamp = datetime.datetime.utcnow().isoformat() + "Z"
 
     try:
-        reader = PdfReader(file_path)
+        reader = PdfReader(io.BytesIO(data))
         for i, page in enumerate(reader.pages):
             page_text = page.extract_text() or ""
             total_objects_scanned += 1
@@ -53,7 +51,8 @@ def scan_pdf_for_obfuscation(file_path):
     report = {
         "scan_timestamp": scan_timestamp,
         "file_path": file_path,
-        "file_sha256": file_hash,
+        "file_sha256": digests["sha256"],
+        "file_md5": digests["md5"],
         "total_pages": total_objects_scanned,
         "suspicious_hex_blocks": suspicious_hex_count,
         "suspicious_font_references": suspicious_font_count,
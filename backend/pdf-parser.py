@@ -4,7 +4,7 @@ __description__ = 'pdf-parser, use it to parse a PDF document'
 __author__ = 'Didier Stevens'
 __version__ = '0.7.12'
 __date__ = '2025/04/21'
-__minimum_python_version__ = (2, 5, 1)
+__minimum_python_version__ = (3, 8, 0)
 __maximum_python_version__ = (3, 12, 2)
 
 """
@@ -79,6 +79,25 @@ History:
   2024/10/26: added pyzipper support
   2025/03/04: V0.7.11 regex string fix Python 3.12 xambroz
   2025/04/21: V0.7.12 bugfix YARACompile
+  2026/10/18: cPDFDocument reads from a memory-mapped file or a chunked buffer in stead of read(1)
+  2026/10/18: cPDFTokenizer consumes runs with a byte-class table and compiled regular expressions
+  2026/10/18: added option --index
+  2026/10/18: stream content is sliced from the input using /Length in stead of being tokenized (unfiltered stream content is still tokenized for /Type and references)
+  2026/10/18: cPDFElementIndirectObject uses __slots__ and caches type, references, stream and dictionary
+  2026/10/18: keyword statistics with a single lookup per name
+  2026/10/18: streams are decoded by chained filter stages in chunks, with limits on the decompressed size; added options --maxdecompressed, --maxdocumentdecompressed and --maxratio
+  2026/10/18: LZWDecode works on bytes with a bit accumulator, supports /EarlyChange and /Predictor in /DecodeParms (the prediction is undone row by row, as the data is decoded)
+  2026/10/18: linear RunLengthDecode, ASCII85Decode and ASCIIHexDecode
+  2026/10/18: FlateDecode recovery bisects on decompressor copies in stead of inflating byte per byte
+  2026/10/18: /ObjStm objects are decoded once and their objects are parsed directly from the decoded data; /Length can refer to an object in an /ObjStm; a malformed /ObjStm is skipped in stead of stopping the parsing
+  2026/10/18: cPDFParseDictionary parses with a cursor in stead of copying the token list, Get uses a dictionary
+  2026/10/18: library API for in-process use: PDFElements, PDFObjects, PDFStatistics and cPDFStatistics
+  2026/10/18: options -a -j produce the statistics as JSON
+  2026/10/18: compiled YARA rules are cached (option --yaracache, in a directory of the user), streams are matched in a thread pool
+  2026/10/18: multiple files, directories, wildcards and @file with a pool of processes and NDJSON output; added options --workers, --chunksize and --inputorder
+  2026/10/18: Canonicalize with a compiled regular expression and a cache
+  2026/10/18: requires Python 3.8 or later (binascii.hexlify with a separator in HexDump and HexAsciiDump), an older Python stops with an error
+  2026/10/18: HexDump and HexAsciiDump format blocks of lines with hexlify and translate, added generators HexDumpLines and HexAsciiDumpLines
 
 Todo:
   - handle printf todo
@@ -96,6 +115,14 @@ import time
 import os
 import textwrap
 import json
+import collections
+import base64
+import mmap
+import struct
+import stat
+import glob
+import io
+import functools
 if sys.version_info[0] >= 3:
     from io import StringIO
     import urllib.request
@@ -110,6 +137,10 @@ try:
     import yara
 except:
     pass
+try:
+    import concurrent.futures
+except ImportError:
+    pass
 try:
     import pyzipper as zipfile
 except ImportError:
@@ -133,12 +164,35 @@ PDF_ELEMENT_MALFORMED = 6
 
 dumplinelength = 16
 
+# size of the reads for input that can not be memory-mapped (ZIP files, URLs, file objects)
+INPUT_CHUNK_SIZE = 0x100000
+
+# number of canonicalized names with #xx escapes that are cached
+CANONICALIZE_CACHE_SIZE = 4096
+
+# number of decoded /ObjStm objects kept for random access to the objects they contain
+OBJSTM_CACHE_SIZE = 16
+
+# compiled YARA rules are saved in this directory of the user (option --yaracache), streams are matched by at most YARA_MAXIMUM_THREADS threads
+YARA_CACHE_DIRECTORY = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'), 'pdf-parser', 'yara')
+YARA_MAXIMUM_THREADS = 16
+
+# decoders process their input in chunks of this size, and their output is capped by cDecompressionLimits
+DECOMPRESS_CHUNK_SIZE = 0x10000
+LZW_INPUT_CHUNK_SIZE = 0x1000
+DECOMPRESS_MAXIMUM_STREAM = 0x10000000
+DECOMPRESS_MAXIMUM_DOCUMENT = 0x40000000
+DECOMPRESS_MAXIMUM_RATIO = 1100
+DECOMPRESS_RATIO_THRESHOLD = 0x1000000
+
 def PrintManual():
     manual = '''
 Manual:
 
 This manual is a work in progress.
 
+pdf-parser.py requires Python 3.8 or later.
+
 There is a free PDF analysis book:
 https://blog.didierstevens.com/2010/09/26/free-malicious-pdf-analysis-e-book/
 
@@ -156,6 +210,26 @@ Like this: set DSS_DEFAULT_HASH_ALGORITHMS=sha256
 
 Option --jsonoutput produces JSON output with the stream content of all objects with streams. Options -f and --overridingfilters apply.
 For example, if option -f is used, the JSON output contains the filtered streams, otherwise the JSON output contains the unfiltered streams.
+Together with option -a (--stats), option --jsonoutput produces the statistics as JSON in stead of text (type statistics): the counts of the elements, the ids of the objects per type, the ids of the objects with a stream, the ids of the objects per keyword found, the unreferenced objects (as [id, version]) and, with option -O, the ids of the objects stored in each /ObjStm object.
+
+Option --index can be used together with option -o: in stead of parsing all objects, pdf-parser reads the cross-reference (startxref, xref tables and /XRef streams, following /Prev) and seeks directly to the selected objects.
+Only the objects listed in the cross-reference are found: when an object appears more than once in the file (incremental updates), only the version referenced by the cross-reference is selected.
+With option -O, objects stored inside an /ObjStm are found via their containing /ObjStm object.
+When the cross-reference is missing or damaged, pdf-parser falls back to parsing all objects (use option -v to see why).
+
+Streams are decoded in chunks, and the size of the decoded output is limited to protect against decompression bombs. Option --maxdecompressed sets the maximum size of a decoded stream, option --maxdocumentdecompressed the maximum size of all decoded streams of the PDF document together, and option --maxratio the maximum ratio of the decoded size to the encoded size (only checked for decoded streams larger than 16 MB). A value of 0 disables the limit. When a limit is exceeded, the stream is not decoded and a message is displayed in stead of the content (like for a stream that fails to decompress).
+
+pdf-parser accepts more than one file argument: filenames, URLs, wildcard patterns (like *.pdf), directories (all files in the directory and its subdirectories are parsed) and @file (a text file with a filename per line).
+With more than one file (or with a directory, a wildcard pattern or @file), the files are parsed in parallel by a pool of processes, and the output is a JSON object per line (NDJSON) per file: file is the name of the file, output is the output pdf-parser produces for that file, and error is present when parsing the file failed. With option -j (including -a -j), result is the parsed JSON output in stead of output.
+Option --workers sets the number of processes (default: one per CPU), option --chunksize the number of files handed to a process at once (default 1, increase it for many small files), and option --inputorder prints the results in the order of the file arguments in stead of the order in which the files are completed.
+
+Compiled YARA rules (option -y) are saved in a cache directory, and loaded from there the next time the same rules are used: the cache key is a hash of the YARA version and of the names, modification times and contents of the rule files (rule files included via include are not part of the key). Option --yaracache sets the cache directory (by default ~/.cache/pdf-parser/yara), an empty string disables the cache. Compiled rules can run code in YARA, so the cache is only used when the directory and its files belong to the current user and the directory is not writable by others; a missing directory is created with permissions 700. The streams are decoded one by one, and matched with the YARA rules in a pool of threads (one per CPU, at most 16). The output is in the same order as without threads.
+
+pdf-parser.py can also be imported as a module (with importlib, because the filename is not a valid module name), to parse PDF documents without starting a new Python process.
+PDFObjects(file, objstm=True) is a generator of a cPDFObjectRecord (a named tuple) for each indirect object, with fields id, version, type, objstm, stream, references and names.
+PDFStatistics(file, objstm=True, keywords=None) returns a cPDFStatistics object with the statistics of option -a: counts (comments, xrefs, trailers, startxrefs, indirectObjects), dObjectTypes (the ids of the objects per type), objectsWithStream, Keywords() (the ids of the objects per keyword found), Unreferenced(), objectStreamErrors and Lines() (the report of option -a).
+PDFElements(oPDFParser, objstm, errors=None) is a generator of all parsed elements (comments, xrefs, trailers, startxrefs and indirect objects).
+A malformed /ObjStm (like an index that does not match /N) does not stop the parsing: the /ObjStm object itself and all other objects are still parsed, and the error is listed in objectStreamErrors (and in the statistics of -a with -O).
 
 '''
     for line in manual.split('\n'):
@@ -167,7 +241,7 @@ def C2BIP3(string):
         if type(string) == bytes:
             return string
         else:
-            return bytes([ord(x) for x in string])
+            return string.encode('latin')
     else:
         return string
 
@@ -218,7 +292,20 @@ def CreateZipFileObject(arg1, arg2):
 class cPDFDocument:
     def __init__(self, file):
         self.file = file
-        if type(file) != str:
+        self.ungetted = []
+        # data is a window on the input: the complete file when it is memory-mapped, otherwise the current chunk
+        # base is the position in the input of data[0], index is the position in data of the next byte to return
+        self.data = b''
+        self.base = 0
+        self.index = 0
+        self.mmap = None
+        # complete is True when data holds the complete input: a memory-mapped file or a memoryview (objects stored in an /ObjStm)
+        self.complete = False
+        if type(file) == memoryview:
+            self.infile = None
+            self.data = file
+            self.complete = True
+        elif type(file) != str:
             self.infile = file
         elif file.lower().startswith('http://') or file.lower().startswith('https://'):
             try:
@@ -245,37 +332,143 @@ class cPDFDocument:
                 print('Error opening file %s' % file)
                 print(sys.exc_info()[1])
                 sys.exit()
-        self.ungetted = []
-        self.position = -1
+            self.Map()
+
+    def Map(self):
+        try:
+            self.mmap = mmap.mmap(self.infile.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, EnvironmentError):
+            # empty files can not be mapped, they are read via the chunked buffer
+            return
+        self.data = self.mmap
+        self.complete = True
+        # the map remains valid after closing the file, and is kept for random access (Seek)
+        self.infile.close()
+        self.infile = None
+
+    @property
+    def position(self):
+        return self.base + self.index - 1 - len(self.ungetted)
+
+    def Fill(self):
+        if self.infile == None:
+            return False
+        chunk = self.infile.read(INPUT_CHUNK_SIZE)
+        if not chunk:
+            self.Close()
+            return False
+        if not isinstance(chunk, bytes):
+            chunk = chunk.encode('latin')
+        # keep the last byte of the previous chunk, so that it can be ungetted
+        keep = min(self.index, 1)
+        self.base += self.index - keep
+        self.data = self.data[self.index - keep:self.index] + chunk
+        self.index = keep
+        return True
+
+    def Extend(self, size):
+        # reads ahead until size bytes are available from index on (fewer at the end of the input), returns the number of available bytes
+        while self.infile != None and len(self.data) - self.index < size:
+            chunk = self.infile.read(max(INPUT_CHUNK_SIZE, size - len(self.data) + self.index))
+            if not chunk:
+                self.infile.close()
+                self.infile = None
+                break
+            if not isinstance(chunk, bytes):
+                chunk = chunk.encode('latin')
+            keep = min(self.index, 1)
+            self.base += self.index - keep
+            self.data = self.data[self.index - keep:] + chunk
+            self.index = keep
+        return min(size, len(self.data) - self.index)
+
+    def Find(self, oRe):
+        # searches from index on, reading ahead when needed; returns the match (positions are indexes in data) or None
+        size = INPUT_CHUNK_SIZE
+        while True:
+            available = self.Extend(size)
+            oMatch = oRe.search(self.data, self.index, self.index + available)
+            if oMatch != None or available < size:
+                return oMatch
+            size *= 2
+
+    def Close(self):
+        if self.infile == None:
+            return
+        self.base += len(self.data)
+        self.index = 0
+        self.data = b''
+        self.infile.close()
+        self.infile = None
 
     def byte(self):
         if len(self.ungetted) != 0:
-            self.position += 1
             return self.ungetted.pop()
-        inbyte = self.infile.read(1)
-        if not inbyte or inbyte == '':
-            self.infile.close()
+        if self.index >= len(self.data) and not self.Fill():
             return None
-        self.position += 1
-        return ord(inbyte)
+        self.index += 1
+        return self.data[self.index - 1]
+
+    def Run(self, oRe):
+        # returns the bytes matching oRe from the current position on, a run can span chunks
+        # ungetted bytes are only returned by byte()
+        if len(self.ungetted) != 0:
+            return b''
+        result = b''
+        while self.index < len(self.data) or self.Fill():
+            oMatch = oRe.match(self.data, self.index)
+            if oMatch == None:
+                break
+            result += oMatch.group()
+            self.index = oMatch.end()
+            if self.index < len(self.data):
+                break
+        return result
+
+    def Seek(self, position):
+        # random access is only possible when data holds the complete input
+        if not self.complete or position < 0 or position > len(self.data):
+            return False
+        self.ungetted = []
+        self.index = position
+        return True
 
     def unget(self, byte):
-        self.position -= 1
-        self.ungetted.append(byte)
+        if len(self.ungetted) == 0 and self.index > 0 and self.data[self.index - 1] == byte:
+            self.index -= 1
+        else:
+            self.ungetted.append(byte)
+
+# byte-class table and run patterns used by the tokenizer: runs of whitespace or regular characters are consumed in one step
+WHITESPACE_BYTES = b'\x00\x09\x0A\x0C\x0D\x20'
+DELIMITER_BYTES = b'()<>[]{}/%'
+CHARACTER_CLASSES = [CHAR_WHITESPACE if byte in WHITESPACE_BYTES else CHAR_DELIMITER if byte in DELIMITER_BYTES else CHAR_REGULAR for byte in range(256)]
+oReWhitespaceRun = re.compile(b'[' + re.escape(WHITESPACE_BYTES) + b']+')
+oReRegularRun = re.compile(b'[^' + re.escape(WHITESPACE_BYTES + DELIMITER_BYTES) + b']+')
+oReCommentRun = re.compile(br'[^\x0A\x0D]+')
+dCharacterClassRuns = {CHAR_WHITESPACE: oReWhitespaceRun, CHAR_REGULAR: oReRegularRun}
+# a complete token in one match: the number of the matching group is the character class of the token
+oReToken = re.compile(b'(' + oReWhitespaceRun.pattern + br')|(<<|>>|%[^\x0A\x0D]*(?:[\x0A\x0D]\x0A?)?|[' + re.escape(DELIMITER_BYTES) + b'])|(' + oReRegularRun.pattern + b')')
 
 def CharacterClass(byte):
-    if byte == 0 or byte == 9 or byte == 10 or byte == 12 or byte == 13 or byte == 32:
-        return CHAR_WHITESPACE
-    if byte == 0x28 or byte == 0x29 or byte == 0x3C or byte == 0x3E or byte == 0x5B or byte == 0x5D or byte == 0x7B or byte == 0x7D or byte == 0x2F or byte == 0x25:
-        return CHAR_DELIMITER
-    return CHAR_REGULAR
+    return CHARACTER_CLASSES[byte]
+
+oReNumeric = re.compile('[0-9]+')
+oReInteger = re.compile(r'[0-9]+\Z')
+# complete ASCII85 groups (the remainder is a partial group)
+oReASCII85Groups = re.compile(br'(?:[!-u]{5}|z)*')
+ASCII85_IGNORED = bytes(bytearray([c for c in range(256) if not (c >= 0x21 and c <= 0x75) and c != 0x7A and c != 0x7E]))
 
 def IsNumeric(str):
-    return re.match('^[0-9]+', str)
+    return oReNumeric.match(str)
+
+def IsInteger(str):
+    return oReInteger.match(str) != None
 
 class cPDFTokenizer:
     def __init__(self, file):
-        self.oPDF = cPDFDocument(file)
+        self.oPDFDocument = cPDFDocument(file)
+        self.oPDF = self.oPDFDocument
         self.ungetted = []
 
     def Token(self):
@@ -283,65 +476,54 @@ class cPDFTokenizer:
             return self.ungetted.pop()
         if self.oPDF == None:
             return None
+        oPDF = self.oPDF
+        if not oPDF.ungetted:
+            # fast path: a token that does not touch the end of the buffer (when the end of a chunk is reached, the token can continue in the next chunk)
+            data = oPDF.data
+            oMatch = oReToken.match(data, oPDF.index)
+            if oMatch != None:
+                end = oMatch.end()
+                if end < len(data) or oPDF.complete:
+                    oPDF.index = end
+                    return (oMatch.lastindex, oMatch.group().decode('latin'))
         self.byte = self.oPDF.byte()
         if self.byte == None:
             self.oPDF = None
             return None
-        elif CharacterClass(self.byte) == CHAR_WHITESPACE:
-            file_str = StringIO()
-            while self.byte != None and CharacterClass(self.byte) == CHAR_WHITESPACE:
-                file_str.write(chr(self.byte))
-                self.byte = self.oPDF.byte()
-            if self.byte != None:
-                self.oPDF.unget(self.byte)
+        characterClass = CHARACTER_CLASSES[self.byte]
+        if characterClass != CHAR_DELIMITER:
+            self.token = chr(self.byte) + self.oPDF.Run(dCharacterClassRuns[characterClass]).decode('latin')
+            return (characterClass, self.token)
+        elif self.byte == 0x3C:
+            self.byte = self.oPDF.byte()
+            if self.byte == 0x3C:
+                return (CHAR_DELIMITER, '<<')
             else:
-                self.oPDF = None
-            self.token = file_str.getvalue()
-            return (CHAR_WHITESPACE, self.token)
-        elif CharacterClass(self.byte) == CHAR_REGULAR:
-            file_str = StringIO()
-            while self.byte != None and CharacterClass(self.byte) == CHAR_REGULAR:
-                file_str.write(chr(self.byte))
-                self.byte = self.oPDF.byte()
-            if self.byte != None:
                 self.oPDF.unget(self.byte)
+                return (CHAR_DELIMITER, '<')
+        elif self.byte == 0x3E:
+            self.byte = self.oPDF.byte()
+            if self.byte == 0x3E:
+                return (CHAR_DELIMITER, '>>')
             else:
+                self.oPDF.unget(self.byte)
+                return (CHAR_DELIMITER, '>')
+        elif self.byte == 0x25:
+            self.token = '%' + self.oPDF.Run(oReCommentRun).decode('latin')
+            self.byte = self.oPDF.byte()
+            if self.byte == None:
                 self.oPDF = None
-            self.token = file_str.getvalue()
-            return (CHAR_REGULAR, self.token)
-        else:
-            if self.byte == 0x3C:
-                self.byte = self.oPDF.byte()
-                if self.byte == 0x3C:
-                    return (CHAR_DELIMITER, '<<')
-                else:
-                    self.oPDF.unget(self.byte)
-                    return (CHAR_DELIMITER, '<')
-            elif self.byte == 0x3E:
-                self.byte = self.oPDF.byte()
-                if self.byte == 0x3E:
-                    return (CHAR_DELIMITER, '>>')
-                else:
-                    self.oPDF.unget(self.byte)
-                    return (CHAR_DELIMITER, '>')
-            elif self.byte == 0x25:
-                file_str = StringIO()
-                while self.byte != None:
-                    file_str.write(chr(self.byte))
-                    if self.byte == 10 or self.byte == 13:
-                        self.byte = self.oPDF.byte()
-                        break
-                    self.byte = self.oPDF.byte()
-                if self.byte != None:
-                    if self.byte == 10:
-                        file_str.write(chr(self.byte))
-                    else:
-                        self.oPDF.unget(self.byte)
-                else:
-                    self.oPDF = None
-                self.token = file_str.getvalue()
                 return (CHAR_DELIMITER, self.token)
-            return (CHAR_DELIMITER, chr(self.byte))
+            self.token += chr(self.byte)
+            self.byte = self.oPDF.byte()
+            if self.byte == None:
+                self.oPDF = None
+            elif self.byte == 10:
+                self.token += chr(self.byte)
+            else:
+                self.oPDF.unget(self.byte)
+            return (CHAR_DELIMITER, self.token)
+        return (CHAR_DELIMITER, chr(self.byte))
 
     def TokenIgnoreWhiteSpace(self):
         token = self.Token()
@@ -357,17 +539,138 @@ class cPDFTokenizer:
             token = self.Token()
         return tokens
 
+    def Seek(self, position):
+        self.ungetted = []
+        self.oPDF = self.oPDFDocument
+        return self.oPDF.Seek(position)
+
     def unget(self, byte):
         self.ungetted.append(byte)
 
 class cPDFParser:
-    def __init__(self, file, verbose=False, extract=None, objstm=None):
+    def __init__(self, file, verbose=False, extract=None, objstm=None, limits=None):
         self.context = CONTEXT_NONE
         self.content = []
         self.oPDFTokenizer = cPDFTokenizer(file)
         self.verbose = verbose
         self.extract = extract
         self.objstm = objstm
+        if limits == None:
+            limits = cDecompressionLimits()
+        self.limits = limits
+        self.integers = {}
+        self.oPDFXrefIndex = None
+
+    def Seek(self, position):
+        self.context = CONTEXT_NONE
+        self.content = []
+        return self.oPDFTokenizer.Seek(position)
+
+    def StreamLength(self):
+        # value of /Length in the dictionary preceding the stream, indirect lengths are resolved when possible
+        content = CopyWithoutWhiteSpace(self.content)
+        dictionary = 0
+        for i in range(0, len(content)):
+            if content[i][0] == CHAR_DELIMITER and content[i][1] == '<<':
+                dictionary += 1
+            elif content[i][0] == CHAR_DELIMITER and content[i][1] == '>>':
+                dictionary -= 1
+            elif dictionary == 1 and content[i][0] == CHAR_DELIMITER and EqualCanonical(content[i][1], '/Length') and i < len(content) - 1 and IsInteger(content[i+1][1]):
+                if i < len(content) - 3 and IsInteger(content[i+2][1]) and content[i+3][1] == 'R':
+                    return self.ResolveInteger(int(content[i+1][1]))
+                return int(content[i+1][1])
+        return None
+
+    def ResolveInteger(self, id):
+        if id in self.integers:
+            return self.integers[id]
+        if self.oPDFXrefIndex == None:
+            # forward references are resolved with a second parser that seeks via the cross-reference
+            # that needs a memory-mapped file: a URL, a ZIP file or data in memory is not opened a second time
+            if self.oPDFTokenizer.oPDFDocument.mmap == None:
+                self.oPDFXrefIndex = False
+            else:
+                try:
+                    self.oPDFXrefIndex = cPDFXrefIndex(cPDFParser(self.oPDFTokenizer.oPDFDocument.file))
+                except Exception:
+                    self.oPDFXrefIndex = False
+        if not self.oPDFXrefIndex:
+            return None
+        try:
+            object = self.oPDFXrefIndex.GetObject(id)
+        except Exception:
+            return None
+        if object == None:
+            return None
+        content = CopyWithoutWhiteSpace(object.content)
+        if len(content) == 1 and IsInteger(content[0][1]):
+            self.integers[id] = int(content[0][1])
+            return self.integers[id]
+        return None
+
+    def StreamTokens(self):
+        # the stream content is sliced from the input in stead of being tokenized: the end is found via /Length, or by searching endstream (or endobj) when /Length is wrong
+        # the tokens are: the whitespace following keyword stream, the stream content, and the tokenizer continues with keyword endstream
+        oPDF = self.oPDFTokenizer.oPDF
+        if oPDF == None or self.oPDFTokenizer.ungetted != [] or oPDF.ungetted != []:
+            return None
+        start = oPDF.index
+        oPDF.Extend(2)
+        if oPDF.data[start:start + 2] == b'\r\n':
+            dataStart = start + 2
+        elif oPDF.data[start:start + 1] == b'\n':
+            dataStart = start + 1
+        else:
+            dataStart = start
+        end = None
+        length = self.StreamLength()
+        if length != None:
+            oPDF.Extend(dataStart - start + length + 0x100)
+            oMatch = oReEndstream.match(oPDF.data, dataStart + length)
+            if oMatch != None:
+                end = oMatch.end() - len('endstream')
+        if end == None:
+            oMatch = oPDF.Find(oReEndstreamOrEndobj)
+            if oMatch == None:
+                return None
+            end = oMatch.start()
+        # Extend and Find can move data
+        start = oPDF.index
+        oMatch = oReWhitespaceRun.match(oPDF.data, start, end)
+        tokens = []
+        if oMatch != None:
+            tokens.append((CHAR_WHITESPACE, oMatch.group().decode('latin')))
+            start = oMatch.end()
+        if end > start:
+            tokens.append((CHAR_REGULAR, bytes(oPDF.data[start:end]).decode('latin')))
+        oPDF.index = end
+        return tokens
+
+    def GetObjectContent(self, id, version):
+        # parses the complete input as the content of indirect object id (an object stored in an /ObjStm), like it was preceded by 'id version obj\n' and followed by '\nendobj'
+        self.context = CONTEXT_OBJ
+        self.objectId = id
+        self.objectVersion = version
+        self.content = []
+        object = self.GetObject()
+        if object != None:
+            return object
+        # the newlines surrounding the content join the whitespace (or the comment) at the start and the end
+        content = self.content
+        if content == []:
+            content.append((CHAR_WHITESPACE, '\n\n'))
+        else:
+            if content[-1][0] == CHAR_WHITESPACE or content[-1][1][0] == '%' and not content[-1][1].endswith(('\r\n', '\n\n')):
+                content[-1] = (content[-1][0], content[-1][1] + '\n')
+            else:
+                content.append((CHAR_WHITESPACE, '\n'))
+            if content[0][0] == CHAR_WHITESPACE:
+                content[0] = (CHAR_WHITESPACE, '\n' + content[0][1])
+            else:
+                content.insert(0, (CHAR_WHITESPACE, '\n'))
+        self.context = CONTEXT_NONE
+        self.content = []
+        return cPDFElementIndirectObject(id, version, content, self.objstm, self.limits)
 
     def GetObject(self):
         while True:
@@ -384,7 +687,7 @@ class cPDFParser:
                             return cPDFElementComment(self.token[1])
                     elif self.token[1] == '/':
                         self.token2 = self.oPDFTokenizer.Token()
-                        if self.token2[0] == CHAR_REGULAR:
+                        if self.token2 != None and self.token2[0] == CHAR_REGULAR:
                             if self.context != CONTEXT_NONE:
                                 self.content.append((CHAR_DELIMITER, self.token[1] + self.token2[1]))
                             elif self.verbose:
@@ -407,12 +710,20 @@ class cPDFParser:
                 else:
                     if self.context == CONTEXT_OBJ:
                         if self.token[1] == 'endobj':
-                            self.oPDFElementIndirectObject = cPDFElementIndirectObject(self.objectId, self.objectVersion, self.content, self.objstm)
+                            self.oPDFElementIndirectObject = cPDFElementIndirectObject(self.objectId, self.objectVersion, self.content, self.objstm, self.limits)
+                            if len(self.content) <= 3:
+                                content = CopyWithoutWhiteSpace(self.content)
+                                if len(content) == 1 and IsInteger(content[0][1]):
+                                    self.integers[self.objectId] = int(content[0][1])
                             self.context = CONTEXT_NONE
                             self.content = []
                             return self.oPDFElementIndirectObject
                         else:
                             self.content.append(self.token)
+                            if self.token[1] == 'stream':
+                                tokens = self.StreamTokens()
+                                if tokens != None:
+                                    self.content.extend(tokens)
                     elif self.context == CONTEXT_TRAILER:
                         if self.token[1] == 'startxref' or self.token[1] == 'xref':
                             self.oPDFElementTrailer = cPDFElementTrailer(self.content)
@@ -509,12 +820,21 @@ def IIf(expr, truepart, falsepart):
         return falsepart
 
 class cPDFElementIndirectObject:
-    def __init__(self, id, version, content, objstm=None):
+    # there can be 100k+ of these: slots keep them small, and type, references, stream position and dictionary are calculated once, when first needed
+    __slots__ = ('type', 'id', 'version', 'content', 'objstm', 'cachedType', 'cachedReferences', 'cachedStream', 'cachedNames', 'dCachedDictionaries', 'limits')
+
+    def __init__(self, id, version, content, objstm=None, limits=None):
         self.type = PDF_ELEMENT_INDIRECT_OBJECT
         self.id = id
         self.version = version
         self.content = content
         self.objstm = objstm
+        self.limits = limits
+        self.cachedType = None
+        self.cachedReferences = None
+        self.cachedStream = None
+        self.cachedNames = None
+        self.dCachedDictionaries = {}
         #fix stream for Ghostscript bug reported by Kurt
         if self.ContainsStream():
             position = len(self.content) - 1
@@ -535,25 +855,65 @@ class cPDFElementIndirectObject:
                 return
             self.content = self.content[0:position] + [(self.content[position][0], self.content[position][1][:-len('endstream')])] + [(self.content[position][0], 'endstream')] + self.content[position+1:]
 
-    def GetType(self):
-        content = CopyWithoutWhiteSpace(self.content)
+    def AnalysisTokens(self):
+        # the content with the body of an unfiltered stream tokenized like the rest of the object (it is a single token in the content), so that /Type and references inside it are found
         dictionary = 0
-        for i in range(0, len(content)):
-            if content[i][0] == CHAR_DELIMITER and content[i][1] == '<<':
+        filtered = False
+        stream = False
+        for token in self.content:
+            if stream and token[0] == CHAR_REGULAR and token[1] != 'endstream':
+                for streamToken in cPDFTokenizer(memoryview(token[1].encode('latin'))).Tokens():
+                    yield streamToken
+                stream = False
+                continue
+            if token[0] == CHAR_DELIMITER and token[1] == '<<':
                 dictionary += 1
-            if content[i][0] == CHAR_DELIMITER and content[i][1] == '>>':
+            elif token[0] == CHAR_DELIMITER and token[1] == '>>':
                 dictionary -= 1
-            if dictionary == 1 and content[i][0] == CHAR_DELIMITER and EqualCanonical(content[i][1], '/Type') and i < len(content) - 1:
-                return content[i+1][1]
-        return ''
+            elif dictionary == 1 and token[0] == CHAR_DELIMITER and EqualCanonical(token[1], '/Filter'):
+                filtered = True
+            elif token[0] == CHAR_REGULAR and token[1] == 'stream':
+                stream = not filtered
+            yield token
+
+    def Analyze(self):
+        # type and references are calculated in one pass over the content
+        self.cachedType = ''
+        references = []
+        dictionary = 0
+        typeFound = False
+        typeNext = False
+        previous1 = (None, '')
+        previous2 = (None, '')
+        for token in self.AnalysisTokens():
+            if token[0] == CHAR_WHITESPACE:
+                continue
+            if typeNext:
+                self.cachedType = token[1]
+                typeNext = False
+                typeFound = True
+            if token[0] == CHAR_DELIMITER:
+                if token[1] == '<<':
+                    dictionary += 1
+                elif token[1] == '>>':
+                    dictionary -= 1
+                elif dictionary == 1 and not typeFound and EqualCanonical(token[1], '/Type'):
+                    typeNext = True
+            elif token[1] == 'R' and previous2[0] == CHAR_REGULAR and previous1[0] == CHAR_REGULAR and IsNumeric(previous2[1]) and IsNumeric(previous1[1]):
+                references.append((previous2[1], previous1[1], token[1]))
+            previous2 = previous1
+            previous1 = token
+        self.cachedReferences = references
+
+    def GetType(self):
+        if self.cachedType == None:
+            self.Analyze()
+        return self.cachedType
 
     def GetReferences(self):
-        content = CopyWithoutWhiteSpace(self.content)
-        references = []
-        for i in range(0, len(content)):
-            if i > 1 and content[i][0] == CHAR_REGULAR and content[i][1] == 'R' and content[i-2][0] == CHAR_REGULAR and IsNumeric(content[i-2][1]) and content[i-1][0] == CHAR_REGULAR and IsNumeric(content[i-1][1]):
-                references.append((content[i-2][1], content[i-1][1], content[i][1]))
-        return references
+        if self.cachedReferences == None:
+            self.Analyze()
+        return self.cachedReferences
 
     def References(self, index):
         for ref in self.GetReferences():
@@ -562,10 +922,35 @@ class cPDFElementIndirectObject:
         return False
 
     def ContainsStream(self):
+        # the cached value is the content preceding keyword stream, or False
+        if self.cachedStream != None:
+            return self.cachedStream
+        self.cachedStream = False
         for i in range(0, len(self.content)):
             if self.content[i][0] == CHAR_REGULAR and self.content[i][1] == 'stream':
-                return self.content[0:i]
-        return False
+                self.cachedStream = self.content[0:i]
+                break
+        return self.cachedStream
+
+    def GetDictionary(self, nocanonicalizedoutput):
+        # parsed dictionary of the object (the dictionary preceding the stream for objects with a stream)
+        if not nocanonicalizedoutput in self.dCachedDictionaries:
+            dataPrecedingStream = self.ContainsStream()
+            if dataPrecedingStream:
+                self.dCachedDictionaries[nocanonicalizedoutput] = cPDFParseDictionary(dataPrecedingStream, nocanonicalizedoutput)
+            else:
+                self.dCachedDictionaries[nocanonicalizedoutput] = cPDFParseDictionary(self.content, nocanonicalizedoutput)
+        return self.dCachedDictionaries[nocanonicalizedoutput]
+
+    def GetDecodeParameters(self):
+        # integer entries of /DecodeParms, None when /DecodeParms is absent or is not a single dictionary
+        oPDFParseDictionary = self.GetDictionary(False)
+        if oPDFParseDictionary.parsed == None:
+            return None
+        decodeParms = oPDFParseDictionary.Get('/DecodeParms')
+        if not decodeParms or not isinstance(decodeParms[0], tuple):
+            return None
+        return dict([(key, int(value[0])) for key, value in decodeParms if value != [] and IsInteger(value[0])])
 
     def Contains(self, keyword):
         data = ''
@@ -576,18 +961,32 @@ class cPDFElementIndirectObject:
                 data += Canonicalize(self.content[i][1])
         return data.upper().find(keyword.upper()) != -1
 
+    def GetNames(self):
+        # set of the canonicalized delimiter tokens (names) preceding the stream, each token is canonicalized once
+        if self.cachedNames == None:
+            names = set()
+            for token in self.content:
+                if token[1] == 'stream':
+                    break
+                if token[0] == CHAR_DELIMITER:
+                    names.add(token[1])
+            self.cachedNames = set([Canonicalize(name) for name in names])
+        return self.cachedNames
+
     def ContainsName(self, keyword):
-        for token in self.content:
-            if token[1] == 'stream':
-                return False
-            if token[0] == CHAR_DELIMITER and EqualCanonical(token[1], keyword):
-                return True
-        return False
+        return keyword in self.GetNames()
 
     def StreamContains(self, keyword, filter, casesensitive, regex, overridingfilters):
         if not self.ContainsStream():
             return False
-        streamData = self.Stream(filter, overridingfilters)
+        if filter and not regex:
+            # search the decoded content chunk by chunk, without holding it completely
+            try:
+                return SearchChunks(self.StreamChunks(filter, overridingfilters), keyword.encode(), casesensitive)
+            except cDecompressionError as e:
+                streamData = str(e)
+        else:
+            streamData = self.Stream(filter, overridingfilters)
         if filter and streamData == 'No filters':
             streamData = self.Stream(False, overridingfilters)
         if isinstance(streamData, bytes):
@@ -599,10 +998,11 @@ class cPDFElementIndirectObject:
         else:
             return keyword.lower() in streamData.lower()
 
-    def Stream(self, filter=True, overridingfilters=''):
+    def StreamData(self):
+        # returns the raw stream content and the filters, the content is None when the stream is not terminated by endstream
         state = 'start'
         countDirectories = 0
-        data = ''
+        data = []
         filters = []
         for i in range(0, len(self.content)):
             if state == 'start':
@@ -632,69 +1032,83 @@ class cPDFElementIndirectObject:
                 if self.content[i][0] == CHAR_WHITESPACE:
                     whitespace = self.content[i][1]
                     if whitespace.startswith('\x0D\x0A') and len(whitespace) > 2:
-                        data += whitespace[2:]
+                        data.append(whitespace[2:])
                     elif whitespace.startswith('\x0A') and len(whitespace) > 1:
-                        data += whitespace[1:]
+                        data.append(whitespace[1:])
                 else:
-                    data += self.content[i][1]
+                    data.append(self.content[i][1])
                 state = 'stream-concat'
             elif state == 'stream-concat':
                 if self.content[i][0] == CHAR_REGULAR and self.content[i][1] == 'endstream':
-                    if filter:
-                        if overridingfilters == '':
-                            return self.Decompress(data, filters)
-                        elif overridingfilters == 'raw':
-                            return data
-                        else:
-                            return self.Decompress(data, overridingfilters.split(' '))
-                    else:
-                        return data
+                    return ''.join(data), filters
                 else:
-                    data += self.content[i][1]
-            else:
-                return 'Unexpected filter state'
-        return filters
+                    data.append(self.content[i][1])
+        return None, filters
 
-    def Decompress(self, data, filters):
-        for filter in filters:
-            if EqualCanonical(filter, '/FlateDecode') or EqualCanonical(filter, '/Fl'):
-                try:
-                    data = FlateDecode(data)
-                except zlib.error as e:
-                    message = 'FlateDecode decompress failed'
-                    if len(data) > 0 and ord(data[0]) & 0x0F != 8:
-                        message += ', unexpected compression method: %02x' % ord(data[0])
-                    return message + '. zlib.error %s' % e.message
-            elif EqualCanonical(filter, '/ASCIIHexDecode') or EqualCanonical(filter, '/AHx'):
-                try:
-                    data = ASCIIHexDecode(data)
-                except:
-                    return 'ASCIIHexDecode decompress failed'
-            elif EqualCanonical(filter, '/ASCII85Decode') or EqualCanonical(filter, '/A85'):
-                try:
-                    data = ASCII85Decode(data.rstrip('>'))
-                except:
-                    return 'ASCII85Decode decompress failed'
-            elif EqualCanonical(filter, '/LZWDecode') or EqualCanonical(filter, '/LZW'):
-                try:
-                    data = LZWDecode(data)
-                except:
-                    return 'LZWDecode decompress failed'
-            elif EqualCanonical(filter, '/RunLengthDecode') or EqualCanonical(filter, '/R'):
-                try:
-                    data = RunLengthDecode(data)
-                except:
-                    return 'RunLengthDecode decompress failed'
-#            elif i.startswith('/CC')                        # CCITTFaxDecode
-#            elif i.startswith('/DCT')                       # DCTDecode
+    def Stream(self, filter=True, overridingfilters=''):
+        data, filters = self.StreamData()
+        if data == None:
+            return filters
+        if filter:
+            if overridingfilters == '':
+                return self.Decompress(data, filters)
+            elif overridingfilters == 'raw':
+                return data
             else:
-                return 'Unsupported filter: %s' % repr(filters)
-        if len(filters) == 0:
-            return 'No filters'
+                return self.Decompress(data, overridingfilters.split(' '))
         else:
             return data
 
+    # like Stream, but the content is produced in chunks of bytes, so that it can be consumed without holding the complete decoded stream
+    # when the content can not be decoded, cDecompressionError is raised (the message is what Stream returns)
+    def StreamChunks(self, filter=True, overridingfilters=''):
+        data, filters = self.StreamData()
+        if data == None:
+            return
+        if filter and overridingfilters != 'raw':
+            if overridingfilters != '':
+                filters = overridingfilters.split(' ')
+            for chunk in self.DecompressChunks(data, filters):
+                yield chunk
+        else:
+            for position in range(0, len(data), DECOMPRESS_CHUNK_SIZE):
+                yield C2BIP3(data[position:position + DECOMPRESS_CHUNK_SIZE])
+
+    def DecompressChunks(self, data, filters):
+        if len(filters) == 0:
+            raise cDecompressionError('No filters')
+        supported = []
+        for filter in filters:
+            if not Canonicalize(filter) in dFilters:
+                break
+            supported.append(filter)
+        # /DecodeParms is only used for a single filter (an array of /DecodeParms dictionaries is not supported)
+        dDecodeParms = None
+        if len(filters) == 1:
+            dDecodeParms = self.GetDecodeParameters()
+        oFilterPipeline = cFilterPipeline(supported, IFF(self.limits == None, cDecompressionLimits, self.limits), dDecodeParms)
+        if len(supported) < len(filters):
+            # the supported filters preceding the unsupported one are applied, their errors take precedence
+            for chunk in oFilterPipeline.Decode(C2BIP3(data)):
+                pass
+            raise cDecompressionError('Unsupported filter: %s' % repr(filters))
+        for chunk in oFilterPipeline.Decode(C2BIP3(data)):
+            yield chunk
+
+    def Decompress(self, data, filters):
+        try:
+            return b''.join(self.DecompressChunks(data, filters))
+        except cDecompressionError as e:
+            return str(e)
+
     def StreamYARAMatch(self, rules, decoders, decoderoptions, filter, overridingfilters):
+        data = self.StreamYARAData(decoders, decoderoptions, filter, overridingfilters)
+        if data == None:
+            return None
+        return YARAMatchData(rules, data)
+
+    # the data to match with YARA rules: the stream and the output of each decoder, as a list of (decoder name, data) tuples; None for an object without stream
+    def StreamYARAData(self, decoders, decoderoptions, filter, overridingfilters):
         if not self.ContainsStream():
             return None
         streamData = self.Stream(filter, overridingfilters)
@@ -709,14 +1123,12 @@ class cPDFElementIndirectObject:
             except Exception as e:
                 print('Error instantiating decoder: %s' % cDecoder.name)
                 raise e
-        results = []
+        data = []
         for oDecoder in oDecoders:
             while oDecoder.Available():
-                yaraResults = rules.match(data=oDecoder.Decode())
-                if yaraResults != []:
-                    results.append([oDecoder.Name(), yaraResults])
+                data.append((oDecoder.Name(), oDecoder.Decode()))
 
-        return results
+        return data
 
 class cPDFElementStartxref:
     def __init__(self, index):
@@ -746,9 +1158,11 @@ class cPDFParseDictionary:
         if dataTrimmed == []:
             self.parsed = None
         elif self.isOpenDictionary(dataTrimmed[0]) and (self.isCloseDictionary(dataTrimmed[-1]) or self.couldBeCloseDictionary(dataTrimmed[-1])):
-            self.parsed = self.ParseDictionary(dataTrimmed)[0]
+            self.parsed = self.ParseDictionary(list(dataTrimmed), 0)[0]
         else:
             self.parsed = None
+        # key -> value of the first occurrence of each key, built when needed by Get
+        self.dParsed = None
 
     def isOpenDictionary(self, token):
         return token[0] == CHAR_DELIMITER and token[1] == '<<'
@@ -759,53 +1173,56 @@ class cPDFParseDictionary:
     def couldBeCloseDictionary(self, token):
         return token[0] == CHAR_DELIMITER and token[1].rstrip().endswith('>>')
 
-    def ParseDictionary(self, tokens):
+    # recursive descent with a cursor: returns the parsed dictionary (None when it is not closed) and the index of its closing token
+    # the tokens of a comment inside a string are inserted in tokens, so tokens has to be a copy
+    def ParseDictionary(self, tokens, index):
         state = 0 # start
         dictionary = []
-        while tokens != []:
+        while index < len(tokens):
+            token = tokens[index]
             if state == 0:
-                if self.isOpenDictionary(tokens[0]):
+                if self.isOpenDictionary(token):
                     state = 1
                 else:
-                    return None, tokens
+                    return None, index
             elif state == 1:
-                if self.isOpenDictionary(tokens[0]):
+                if self.isOpenDictionary(token):
                     pass
-                elif self.isCloseDictionary(tokens[0]):
-                    return dictionary, tokens
-                elif tokens[0][0] != CHAR_WHITESPACE:
-                    key = ConditionalCanonicalize(tokens[0][1], self.nocanonicalizedoutput)
+                elif self.isCloseDictionary(token):
+                    return dictionary, index
+                elif token[0] != CHAR_WHITESPACE:
+                    key = ConditionalCanonicalize(token[1], self.nocanonicalizedoutput)
                     value = []
                     state = 2
             elif state == 2:
-                if self.isOpenDictionary(tokens[0]):
-                    value, tokens = self.ParseDictionary(tokens)
+                if self.isOpenDictionary(token):
+                    value, index = self.ParseDictionary(tokens, index)
                     dictionary.append((key, value))
                     state = 1
-                elif self.isCloseDictionary(tokens[0]):
+                elif self.isCloseDictionary(token):
                     dictionary.append((key, value))
-                    return dictionary, tokens
-                elif value == [] and tokens[0][0] == CHAR_WHITESPACE:
+                    return dictionary, index
+                elif value == [] and token[0] == CHAR_WHITESPACE:
                     pass
-                elif value == [] and tokens[0][1] == '[':
-                    value.append(tokens[0][1])
-                elif value != [] and value[0] == '[' and tokens[0][1] != ']':
-                    value.append(tokens[0][1])
-                elif value != [] and value[0] == '[' and tokens[0][1] == ']':
-                    value.append(tokens[0][1])
+                elif value == [] and token[1] == '[':
+                    value.append(token[1])
+                elif value != [] and value[0] == '[' and token[1] != ']':
+                    value.append(token[1])
+                elif value != [] and value[0] == '[' and token[1] == ']':
+                    value.append(token[1])
                     dictionary.append((key, value))
                     value = []
                     state = 1
-                elif value == [] and tokens[0][1] == '(':
-                    value.append(tokens[0][1])
-                elif value != [] and value[0] == '(' and tokens[0][1] != ')':
-                    if tokens[0][1][0] == '%':
-                        tokens = [tokens[0]] + cPDFTokenizer(StringIO(tokens[0][1][1:])).Tokens() + tokens[1:]
+                elif value == [] and token[1] == '(':
+                    value.append(token[1])
+                elif value != [] and value[0] == '(' and token[1] != ')':
+                    if token[1][0] == '%':
+                        tokens[index + 1:index + 1] = cPDFTokenizer(StringIO(token[1][1:])).Tokens()
                         value.append('%')
                     else:
-                        value.append(tokens[0][1])
-                elif value != [] and value[0] == '(' and tokens[0][1] == ')':
-                    value.append(tokens[0][1])
+                        value.append(token[1])
+                elif value != [] and value[0] == '(' and token[1] == ')':
+                    value.append(token[1])
                     balanced = 0
                     for item in value:
                         if item == '(':
@@ -818,15 +1235,15 @@ class cPDFParseDictionary:
                         dictionary.append((key, value))
                         value = []
                         state = 1
-                elif value != [] and tokens[0][1][0] == '/':
+                elif value != [] and token[1][0] == '/':
                     dictionary.append((key, value))
-                    key = ConditionalCanonicalize(tokens[0][1], self.nocanonicalizedoutput)
+                    key = ConditionalCanonicalize(token[1], self.nocanonicalizedoutput)
                     value = []
                     state = 2
                 else:
-                    value.append(ConditionalCanonicalize(tokens[0][1], self.nocanonicalizedoutput))
-            tokens = tokens[1:]
-        return None, tokens
+                    value.append(ConditionalCanonicalize(token[1], self.nocanonicalizedoutput))
+            index += 1
+        return None, index
 
     def Retrieve(self):
         return self.parsed
@@ -859,10 +1276,13 @@ class cPDFParseDictionary:
         self.PrettyPrintSub(prefix, self.parsed)
 
     def Get(self, select):
-        for key, value in self.parsed:
-            if key == select:
-                return value
-        return None
+        if self.parsed == None:
+            return None
+        if self.dParsed == None:
+            self.dParsed = {}
+            for key, value in self.parsed:
+                self.dParsed.setdefault(key, value)
+        return self.dParsed.get(select)
 
     def GetNestedSub(self, dictionary, select):
         for key, value in dictionary:
@@ -877,6 +1297,429 @@ class cPDFParseDictionary:
     def GetNested(self, select):
         return self.GetNestedSub(self.parsed, select)
 
+oReStartxref = re.compile(br'startxref\s+(\d+)')
+oReEndstream = re.compile(b'[' + re.escape(WHITESPACE_BYTES) + b']*endstream')
+oReEndstreamOrEndobj = re.compile(b'endstream|endobj')
+oReXrefKeyword = re.compile(br'\s*xref')
+oReXrefSubsection = re.compile(br'\s*(\d+)\s+(\d+)')
+oReXrefEntry = re.compile(br'\s*(\d+)\s+(\d+)\s+([nf])')
+oReTrailerKeyword = re.compile(br'\s*trailer')
+
+def DictionaryIntegers(oPDFParseDictionary, key):
+    value = oPDFParseDictionary.Get(key)
+    if value == None:
+        return None
+    return [int(item) for item in value if IsInteger(item)]
+
+# index of indirect objects (object number -> position) built from the cross-reference tables (xref) and streams (/Type /XRef), following the /Prev chain
+# a damaged cross-reference raises an exception
+class cPDFXrefIndex:
+    def __init__(self, oPDFParser):
+        self.oPDFParser = oPDFParser
+        self.data = oPDFParser.oPDFTokenizer.oPDFDocument.mmap
+        if self.data == None:
+            raise Exception('Random access requires a file that can be memory-mapped')
+        self.positions = {}
+        self.compressed = {}
+        self.objectStreams = cPDFObjectStreamCache()
+        oMatch = None
+        for oMatch in oReStartxref.finditer(self.data, max(0, len(self.data) - 1024)):
+            pass
+        if oMatch == None:
+            raise Exception('startxref not found')
+        position = int(oMatch.group(1))
+        visited = set()
+        while position != None:
+            if position in visited or position >= len(self.data):
+                raise Exception('Invalid xref position %d' % position)
+            visited.add(position)
+            oMatch = oReXrefKeyword.match(self.data, position)
+            if oMatch != None:
+                oPDFParseDictionary = self.ParseXrefTable(oMatch.end())
+                xrefStm = DictionaryIntegers(oPDFParseDictionary, '/XRefStm')
+                if xrefStm:
+                    self.ParseXrefStream(xrefStm[0])
+            else:
+                oPDFParseDictionary = self.ParseXrefStream(position)
+            prev = DictionaryIntegers(oPDFParseDictionary, '/Prev')
+            position = prev[0] if prev else None
+
+    def GetObject(self, id):
+        # random access to indirect object id, also when it is stored in an /ObjStm; returns None when the object is not found
+        if self.positions.get(id) != None:
+            if not self.oPDFParser.Seek(self.positions[id]):
+                return None
+            object = self.oPDFParser.GetObject()
+        elif id in self.compressed and self.positions.get(self.compressed[id][0]) != None:
+            oPDFObjectStream = self.objectStreams.Get(self.compressed[id][0])
+            if oPDFObjectStream == None:
+                oPDFObjectStream = self.objectStreams.Add(cPDFObjectStream(self.GetObject(self.compressed[id][0])))
+            object = oPDFObjectStream.GetObject(id)
+        else:
+            return None
+        if object == None or object.type != PDF_ELEMENT_INDIRECT_OBJECT or object.id != id:
+            return None
+        return object
+
+    def AddEntry(self, number, type, field2, field3):
+        # entries of newer sections are parsed first and take precedence
+        if number in self.positions or number in self.compressed:
+            return
+        if type == 1:
+            self.positions[number] = field2
+        elif type == 2:
+            self.compressed[number] = (field2, field3)
+        else:
+            self.positions[number] = None
+
+    def ParseXrefTable(self, position):
+        while True:
+            oMatch = oReTrailerKeyword.match(self.data, position)
+            if oMatch != None:
+                break
+            oMatch = oReXrefSubsection.match(self.data, position)
+            if oMatch == None:
+                raise Exception('Invalid xref subsection at position %d' % position)
+            position = oMatch.end()
+            first = int(oMatch.group(1))
+            for number in range(first, first + int(oMatch.group(2))):
+                oMatch = oReXrefEntry.match(self.data, position)
+                if oMatch == None:
+                    raise Exception('Invalid xref entry at position %d' % position)
+                position = oMatch.end()
+                self.AddEntry(number, IFF(oMatch.group(3) == b'n', 1, 0), int(oMatch.group(1)), int(oMatch.group(2)))
+        if not self.oPDFParser.Seek(position):
+            raise Exception('Invalid trailer position %d' % position)
+        object = self.oPDFParser.GetObject()
+        if object == None or object.type != PDF_ELEMENT_TRAILER:
+            raise Exception('No trailer at position %d' % position)
+        oPDFParseDictionary = cPDFParseDictionary(object.content[1:], False)
+        if oPDFParseDictionary.parsed == None:
+            raise Exception('Invalid trailer at position %d' % position)
+        return oPDFParseDictionary
+
+    def ParseXrefStream(self, position):
+        if not self.oPDFParser.Seek(position):
+            raise Exception('Invalid xref stream position %d' % position)
+        object = self.oPDFParser.GetObject()
+        if object == None or object.type != PDF_ELEMENT_INDIRECT_OBJECT or not EqualCanonical(object.GetType(), '/XRef') or not object.ContainsStream():
+            raise Exception('No xref stream at position %d' % position)
+        oPDFParseDictionary = object.GetDictionary(False)
+        data = object.Stream()
+        if data == 'No filters':
+            data = C2BIP3(object.Stream(False))
+        elif not isinstance(data, bytes):
+            raise Exception('Xref stream %d can not be decoded: %s' % (object.id, data))
+        dDecodeParms = object.GetDecodeParameters()
+        if dDecodeParms:
+            data = PredictorDecodeParameters(data, dDecodeParms)
+        widths = DictionaryIntegers(oPDFParseDictionary, '/W')
+        if widths == None or len(widths) != 3:
+            raise Exception('Invalid /W in xref stream %d' % object.id)
+        index = DictionaryIntegers(oPDFParseDictionary, '/Index')
+        if not index:
+            index = [0] + DictionaryIntegers(oPDFParseDictionary, '/Size')
+        entryLength = sum(widths)
+        offset = 0
+        for i in range(0, len(index) - 1, 2):
+            for number in range(index[i], index[i] + index[i + 1]):
+                if offset + entryLength > len(data):
+                    raise Exception('Xref stream %d is too short' % object.id)
+                fields = []
+                for width in widths:
+                    fields.append(int(binascii.hexlify(data[offset:offset + width]) or b'0', 16))
+                    offset += width
+                self.AddEntry(number, IFF(widths[0] == 0, 1, fields[0]), fields[1], fields[2])
+        return oPDFParseDictionary
+
+# returns the selected indirect objects (in the order of the file) by seeking to them via the cross-reference index
+# objects stored inside an /ObjStm are returned as their containing /ObjStm object, when objstm is True
+# objects is None when the cross-reference is damaged, the caller has to parse the file linearly
+class cPDFIndexedParser:
+    def __init__(self, file, selection, objstm, verbose=False, extract=None, limits=None):
+        self.oPDFParser = cPDFParser(file, verbose, extract, limits=limits)
+        try:
+            self.objects = self.LoadObjects(selection, objstm)
+        except Exception as e:
+            if verbose:
+                print('Xref index not used: %s' % e)
+            self.objects = None
+
+    def LoadObject(self, position, id):
+        if position == None or not self.oPDFParser.Seek(position):
+            raise Exception('Invalid position for object %d' % id)
+        object = self.oPDFParser.GetObject()
+        if object == None or object.type != PDF_ELEMENT_INDIRECT_OBJECT or object.id != id:
+            raise Exception('Object %d not found at position %d' % (id, position))
+        return object
+
+    def LoadObjects(self, selection, objstm):
+        oPDFXrefIndex = cPDFXrefIndex(self.oPDFParser)
+        dPositions = {}
+        for id in selection.split(','):
+            if not IsInteger(id):
+                continue
+            id = int(id)
+            if id in oPDFXrefIndex.positions:
+                if oPDFXrefIndex.positions[id] != None:
+                    dPositions[oPDFXrefIndex.positions[id]] = id
+            elif id in oPDFXrefIndex.compressed and objstm:
+                idObjStm = oPDFXrefIndex.compressed[id][0]
+                dPositions[oPDFXrefIndex.positions.get(idObjStm)] = idObjStm
+        if None in dPositions:
+            raise Exception('/ObjStm not found')
+        return [self.LoadObject(position, dPositions[position]) for position in sorted(dPositions.keys())]
+
+    def GetObject(self):
+        if self.objects == []:
+            return None
+        return self.objects.pop(0)
+
+# the objects stored in the stream of an /ObjStm object: the stream is decoded once, and the objects are parsed directly from their offsets in the decoded data
+class cPDFObjectStream:
+    def __init__(self, object, verbose=False, extract=None):
+        if object == None or object.type != PDF_ELEMENT_INDIRECT_OBJECT or not EqualCanonical(object.GetType(), '/ObjStm') or not object.ContainsStream():
+            raise Exception('No /ObjStm object')
+        self.object = object
+        self.verbose = verbose
+        self.extract = extract
+        oPDFParseDictionary = object.GetDictionary(False)
+        numberOfObjects = DictionaryIntegers(oPDFParseDictionary, '/N')
+        offsetFirstObject = DictionaryIntegers(oPDFParseDictionary, '/First')
+        if not numberOfObjects or not offsetFirstObject:
+            raise Exception('Error in /N or /First of /ObjStm %d' % object.id)
+        offsetFirstObject = offsetFirstObject[0]
+        data = object.Stream()
+        if data == 'No filters':
+            data = C2BIP3(object.Stream(False))
+        elif not isinstance(data, bytes):
+            raise Exception('/ObjStm %d can not be decoded: %s' % (object.id, data))
+        indexes = list(map(int, data[:offsetFirstObject].split()))
+        if len(indexes) % 2 != 0 or len(indexes) // 2 != numberOfObjects[0]:
+            raise Exception('Error in index of /ObjStm stream')
+        self.data = memoryview(data)
+        # object number, start and end of each object in data
+        self.entries = []
+        for i in range(0, len(indexes), 2):
+            if i + 3 < len(indexes):
+                end = offsetFirstObject + indexes[i + 3]
+            else:
+                end = len(data)
+            self.entries.append((indexes[i], offsetFirstObject + indexes[i + 1], end))
+        self.dEntries = {}
+        for index, entry in enumerate(self.entries):
+            self.dEntries.setdefault(entry[0], index)
+        self.next = 0
+
+    def ParseObject(self, index):
+        objectNumber, start, end = self.entries[index]
+        oPDFParser = cPDFParser(self.data[start:max(start, end)], self.verbose, self.extract, (self.object.id, self.object.version), self.object.limits)
+        return oPDFParser.GetObjectContent(objectNumber, 0)
+
+    # returns the objects in the order of the index, and None after the last object
+    def GetObject(self, id=None):
+        if id != None:
+            if not id in self.dEntries:
+                return None
+            return self.ParseObject(self.dEntries[id])
+        if self.next >= len(self.entries):
+            return None
+        self.next += 1
+        return self.ParseObject(self.next - 1)
+
+# least recently used cache of decoded /ObjStm objects, keyed by object number
+class cPDFObjectStreamCache:
+    def __init__(self, size=OBJSTM_CACHE_SIZE):
+        self.size = size
+        self.dObjectStreams = collections.OrderedDict()
+
+    def Get(self, id):
+        oPDFObjectStream = self.dObjectStreams.pop(id, None)
+        if oPDFObjectStream != None:
+            self.dObjectStreams[id] = oPDFObjectStream
+        return oPDFObjectStream
+
+    def Add(self, oPDFObjectStream):
+        self.dObjectStreams[oPDFObjectStream.object.id] = oPDFObjectStream
+        while len(self.dObjectStreams) > self.size:
+            self.dObjectStreams.popitem(last=False)
+        return oPDFObjectStream
+
+# elements of a PDF document in file order; with objstm, the objects stored in an /ObjStm follow the /ObjStm object
+# a malformed /ObjStm is skipped (with the objects that follow the error inside it), the other objects are still parsed; errors is a list to which (id of the /ObjStm, error message) is appended
+def PDFElements(oPDFParser, objstm=False, verbose=False, extract=None, errors=None):
+    oPDFObjectStream = None
+    while True:
+        object = None
+        if oPDFObjectStream != None:
+            try:
+                object = oPDFObjectStream.GetObject()
+            except Exception as e:
+                PDFElementsObjectStreamError(oPDFObjectStream.object, e, verbose, errors)
+            if object == None:
+                oPDFObjectStream = None
+        if object == None:
+            object = oPDFParser.GetObject()
+        if object == None:
+            return
+        if objstm and hasattr(object, 'GetType') and EqualCanonical(object.GetType(), '/ObjStm') and object.ContainsStream():
+            # parsing objects inside an /ObjStm object directly from the decoded stream content
+            try:
+                oPDFObjectStream = cPDFObjectStream(object, verbose, extract)
+            except Exception as e:
+                PDFElementsObjectStreamError(object, e, verbose, errors)
+        yield object
+
+def PDFElementsObjectStreamError(object, e, verbose, errors):
+    if verbose:
+        print('Error parsing /ObjStm %d: %s' % (object.id, e))
+    if errors != None:
+        errors.append((object.id, str(e)))
+
+def DefaultKeywords():
+    keywords = ['/JS', '/JavaScript', '/AA', '/OpenAction', '/AcroForm', '/RichMedia', '/Launch', '/EmbeddedFile', '/XFA', '/URI']
+    for extrakeyword in ParseINIFile():
+        if not extrakeyword in keywords:
+            keywords.append(extrakeyword)
+    return keywords
+
+# statistics of a PDF document (option -a): the elements are added one by one, Lines returns the report
+class cPDFStatistics:
+    def __init__(self, keywords=None):
+        if keywords == None:
+            keywords = DefaultKeywords()
+        self.keywords = keywords
+        self.comments = 0
+        self.xrefs = 0
+        self.trailers = 0
+        self.startxrefs = 0
+        self.indirectObjects = 0
+        # type -> ids of the indirect objects of that type
+        self.dObjectTypes = {}
+        self.objectsAll = set()
+        self.objectsReferenced = set()
+        self.objectsWithStream = []
+        # id of an /ObjStm object -> ids of the objects stored in it (option -O)
+        self.dObjectStreams = {}
+        # (id, error message) of the /ObjStm objects that could not be parsed (completely)
+        self.objectStreamErrors = []
+#        self.dKeywords = {keyword: [] for keyword in keywords}
+# Done for compatibility with 2.6.6
+        self.dKeywords = {}
+        for keyword in keywords:
+            self.dKeywords[keyword] = []
+
+    def Add(self, object):
+        if object.type == PDF_ELEMENT_COMMENT:
+            self.comments += 1
+        elif object.type == PDF_ELEMENT_XREF:
+            self.xrefs += 1
+        elif object.type == PDF_ELEMENT_TRAILER:
+            self.trailers += 1
+            oPDFParseDictionary = cPDFParseDictionary(object.content[1:], False)
+            for keyTrailer, valueTrailer in oPDFParseDictionary.parsed or []:
+                if len(valueTrailer) == 3 and valueTrailer[2] == 'R' and IsNumeric(valueTrailer[0]) and IsNumeric(valueTrailer[1]):
+                    self.objectsReferenced.add(tuple(valueTrailer))
+        elif object.type == PDF_ELEMENT_STARTXREF:
+            self.startxrefs += 1
+        elif object.type == PDF_ELEMENT_INDIRECT_OBJECT:
+            self.indirectObjects += 1
+            type1 = object.GetType()
+            if not type1 in self.dObjectTypes:
+                self.dObjectTypes[type1] = [object.id]
+            else:
+                self.dObjectTypes[type1].append(object.id)
+            # one lookup per name of the object, in stead of one scan of the object per keyword
+            for name in object.GetNames():
+                if name in self.dKeywords:
+                    self.dKeywords[name].append(object.id)
+            if object.ContainsStream():
+                self.objectsWithStream.append(object.id)
+            for reference in object.GetReferences():
+                self.objectsReferenced.add(reference)
+            self.objectsAll.add((str(object.id), str(object.version), 'R'))
+            if object.objstm != None:
+                self.dObjectStreams.setdefault(object.objstm[0], []).append(object.id)
+
+    # unreferenced indirect objects as sorted (id, version, 'R') tuples, optionally without the /ObjStm objects
+    def Unreferenced(self, withoutObjStm=False):
+        objectsUnreferenced = self.objectsAll - self.objectsReferenced
+        if withoutObjStm:
+            objectsUnreferenced = set([reference for reference in objectsUnreferenced if not int(reference[0]) in self.dObjectTypes.get('/ObjStm', [])])
+        return sorted(objectsUnreferenced, key=lambda a: int(a[0]))
+
+    # keywords that were found, with the ids of the objects containing them
+    def Keywords(self):
+        return collections.OrderedDict([(keyword, self.dKeywords[keyword]) for keyword in self.keywords if len(self.dKeywords[keyword]) > 0])
+
+    def Lines(self):
+        lines = []
+        lines.append('Comment: %s' % self.comments)
+        lines.append('XREF: %s' % self.xrefs)
+        lines.append('Trailer: %s' % self.trailers)
+        lines.append('StartXref: %s' % self.startxrefs)
+        lines.append('Indirect object: %s' % self.indirectObjects)
+        lines.append('Indirect objects with a stream: %s' % ', '.join([str(id) for id in self.objectsWithStream]))
+        for key in sorted(self.dObjectTypes.keys()):
+            lines.append(' %s %d: %s' % (key, len(self.dObjectTypes[key]), ', '.join(map(lambda x: '%d' % x, self.dObjectTypes[key]))))
+        objectsUnreferenced = self.Unreferenced()
+        if len(objectsUnreferenced) > 0:
+            lines.append('Unreferenced indirect objects: %s' % ', '.join([' '.join(reference) for reference in objectsUnreferenced]))
+            if '/ObjStm' in self.dObjectTypes:
+                lines.append('Unreferenced indirect objects without /ObjStm objects: %s' % ', '.join([' '.join(reference) for reference in self.Unreferenced(True)]))
+        dKeywordsFound = self.Keywords()
+        if len(dKeywordsFound) > 0:
+            lines.append('Search keywords:')
+            for keyword, ids in dKeywordsFound.items():
+                lines.append(' %s %d: %s' % (keyword, len(ids), ', '.join(map(lambda x: '%d' % x, ids))))
+        if len(self.objectStreamErrors) > 0:
+            lines.append('Errors in /ObjStm objects:')
+            for id, message in self.objectStreamErrors:
+                lines.append(' %d: %s' % (id, message))
+        return lines
+
+    # the statistics as a dictionary that can be serialized to JSON (options -a -j), references are [id, version] lists
+    def Dictionary(self):
+        return {
+            'version': 2,
+            'id': 'didierstevens.com',
+            'type': 'statistics',
+            'counts': {'comment': self.comments, 'xref': self.xrefs, 'trailer': self.trailers, 'startxref': self.startxrefs, 'indirect_object': self.indirectObjects},
+            'objects_with_stream': self.objectsWithStream,
+            'types': self.dObjectTypes,
+            'keywords': self.Keywords(),
+            'unreferenced': [[int(reference[0]), int(reference[1])] for reference in self.Unreferenced()],
+            'unreferenced_without_objstm': [[int(reference[0]), int(reference[1])] for reference in self.Unreferenced(True)],
+            'objstm': dict([(str(id), ids) for id, ids in self.dObjectStreams.items()]),
+            'objstm_errors': [[id, message] for id, message in self.objectStreamErrors],
+        }
+
+    def GetJSON(self):
+        return json.dumps(self.Dictionary())
+
+# Library API: pdf-parser.py can be imported (for example with importlib, the filename is not a valid module name) to parse PDF documents in-process
+# file is a filename, a URL, a ZIP filename, a file object or a memoryview, like for the command line
+
+# record of an indirect object: type is canonicalized, objstm is (id, version) of the containing /ObjStm or None, stream is True for an object with a stream,
+# references is a list of (id, version, 'R') tuples and names is the set of canonicalized names preceding the stream
+cPDFObjectRecord = collections.namedtuple('cPDFObjectRecord', ['id', 'version', 'type', 'objstm', 'stream', 'references', 'names'])
+
+def PDFObjectRecord(object):
+    return cPDFObjectRecord(object.id, object.version, Canonicalize(object.GetType()), object.objstm, object.ContainsStream() != False, list(object.GetReferences()), set(object.GetNames()))
+
+# generator of a cPDFObjectRecord for each indirect object
+def PDFObjects(file, objstm=True, verbose=False, limits=None):
+    for object in PDFElements(cPDFParser(file, verbose, limits=limits), objstm, verbose):
+        if object.type == PDF_ELEMENT_INDIRECT_OBJECT:
+            yield PDFObjectRecord(object)
+
+# returns a cPDFStatistics object, keywords is a list of names to count (default: the keywords of option -a)
+def PDFStatistics(file, objstm=True, keywords=None, limits=None, verbose=False):
+    oPDFStatistics = cPDFStatistics(keywords)
+    for object in PDFElements(cPDFParser(file, verbose, limits=limits), objstm, verbose, errors=oPDFStatistics.objectStreamErrors):
+        oPDFStatistics.Add(object)
+    return oPDFStatistics
+
 def FormatOutput(data, raw):
     if raw:
         if type(data) == type([]):
@@ -906,6 +1749,23 @@ def IfWIN32SetBinary(io):
         import msvcrt
         msvcrt.setmode(io.fileno(), os.O_BINARY)
 
+# hashes the stream content chunk by chunk, returns length, md5 and a dump of the first line
+def HashStream(object, filter, overridingfilters):
+    oMD5 = hashlib.md5()
+    length = 0
+    head = b''
+    try:
+        for chunk in object.StreamChunks(filter, overridingfilters):
+            oMD5.update(chunk)
+            length += len(chunk)
+            if len(head) < 16:
+                head += chunk[:16 - len(head)]
+    except cDecompressionError as e:
+        head = C2BIP3(str(e))
+        oMD5 = hashlib.md5(head)
+        length = len(head)
+    return length, oMD5.hexdigest(), HexAsciiDumpLine(head)
+
 def PrintOutputObject(object, options):
     if options.dump == '-':
         filtered = object.Stream(options.filter == True, options.overridingfilters)
@@ -921,26 +1781,19 @@ def PrintOutputObject(object, options):
     print(' Type: %s' % ConditionalCanonicalize(object.GetType(), options.nocanonicalizedoutput))
     print(' Referencing: %s' % ', '.join(map(lambda x: '%s %s %s' % x, object.GetReferences())))
     dataPrecedingStream = object.ContainsStream()
-    oPDFParseDictionary = None
+    oPDFParseDictionary = object.GetDictionary(options.nocanonicalizedoutput)
     if dataPrecedingStream:
         print(' Contains stream')
         if options.debug:
             print(' %s' % FormatOutput(dataPrecedingStream, options.raw))
-        oPDFParseDictionary = cPDFParseDictionary(dataPrecedingStream, options.nocanonicalizedoutput)
         if options.hash:
-            streamContent = object.Stream(False, options.overridingfilters)
             print('  unfiltered')
-            print('   len: %6d md5: %s' % (len(streamContent), hashlib.md5(streamContent).hexdigest()))
-            print('   %s' % HexAsciiDumpLine(streamContent))
-            streamContent = object.Stream(True, options.overridingfilters)
+            print('   len: %6d md5: %s\n   %s' % HashStream(object, False, options.overridingfilters))
             print('  filtered')
-            print('   len: %6d md5: %s' % (len(streamContent), hashlib.md5(streamContent).hexdigest()))
-            print('   %s' % HexAsciiDumpLine(streamContent))
-            streamContent = None
+            print('   len: %6d md5: %s\n   %s' % HashStream(object, True, options.overridingfilters))
     else:
         if options.debug or options.raw:
             print(' %s' % FormatOutput(object.content, options.raw))
-        oPDFParseDictionary = cPDFParseDictionary(object.content, options.nocanonicalizedoutput)
     print('')
     oPDFParseDictionary.PrettyPrint('  ')
     print('')
@@ -976,29 +1829,21 @@ def PrintOutputObject(object, options):
     return
 
 def Canonicalize(sIn):
-    if sIn == '':
-        return sIn
-    elif sIn[0] != '/':
+    if sIn[:1] != '/' or sIn.find('#') == -1:
         return sIn
-    elif sIn.find('#') == -1:
-        return sIn
-    else:
-        i = 0
-        iLen = len(sIn)
-        sCanonical = ''
-        while i < iLen:
-            if sIn[i] == '#' and i < iLen - 2:
-                try:
-                    sCanonical += chr(int(sIn[i+1:i+3], 16))
-                    i += 2
-                except:
-                    sCanonical += sIn[i]
-            else:
-                sCanonical += sIn[i]
-            i += 1
-        return sCanonical
+    return CanonicalizeName(sIn)
+
+# names with #xx escapes: one substitution with a compiled pattern, and obfuscated documents tend to repeat the same names, hence the cache
+oReNameEscape = re.compile(r'#([0-9A-Fa-f]{2})')
 
+@functools.lru_cache(maxsize=CANONICALIZE_CACHE_SIZE)
+def CanonicalizeName(sIn):
+    return oReNameEscape.sub(lambda oMatch: chr(int(oMatch.group(1), 16)), sIn)
+
+# s2 is canonical (a constant like /Type or /Filter): a name without # only needs to be compared
 def EqualCanonical(s1, s2):
+    if s1.find('#') == -1:
+        return s1 == s2
     return Canonicalize(s1) == s2
 
 def ConditionalCanonicalize(sIn, nocanonicalizedoutput):
@@ -1009,67 +1854,156 @@ def ConditionalCanonicalize(sIn, nocanonicalizedoutput):
 
 # http://code.google.com/p/pdfminerr/source/browse/trunk/pdfminer/pdfminer/ascii85.py
 def ASCII85Decode(data):
-  import struct
-  n = b = 0
-  out = b''
-  for c in data:
-    if '!' <= c and c <= 'u':
-      n += 1
-      b = b*85+(ord(c)-33)
-      if n == 5:
-        out += struct.pack('>L',b)
-        n = b = 0
-    elif c == 'z':
-      assert n == 0
-      out += b'\0\0\0\0'
-    elif c == '~':
-      if n:
-        for _ in range(5-n):
-          b = b*85+84
-        out += struct.pack('>L',b)[:n-1]
-      break
-  return out
+    return FilterDecode(cFilterASCII85Decode(), data)
 
 def ASCIIHexDecode(data):
-    return binascii.unhexlify(''.join([c for c in data if c not in ' \t\n\r']).rstrip('>'))
-
-# if inflating fails, we try to inflate byte per byte (sample 4da299d6e52bbb79c0ac00bad6a1d51d4d5fe42965a8d94e88a359e5277117e2)
+    return FilterDecode(cFilterASCIIHexDecode(), data)
+
+# TIFF (2) and PNG (10-15) predictors, as used in /DecodeParms
+def PredictorDecode(data, predictor, colors=1, bitsPerComponent=8, columns=1):
+    oPredictor = cPredictor(predictor, colors, bitsPerComponent, columns)
+    return oPredictor.Decode(data) + oPredictor.Flush()
+
+# undoes a predictor on data that arrives in chunks: only the previous row and an incomplete row are kept
+# an incomplete last row is decoded by Flush (a PNG row is padded with zeros)
+class cPredictor:
+    def __init__(self, predictor, colors=1, bitsPerComponent=8, columns=1):
+        self.predictor = predictor
+        self.bytesPerPixel = max(1, colors * bitsPerComponent // 8)
+        self.rowLength = (colors * bitsPerComponent * columns + 7) // 8
+        self.error = None
+        if predictor == 2 and bitsPerComponent != 8:
+            self.error = 'Unsupported TIFF predictor with /BitsPerComponent %d' % bitsPerComponent
+        elif predictor != 1 and predictor < 10:
+            self.error = 'Unsupported predictor %d' % predictor
+        # a PNG row starts with its type byte
+        self.stride = self.rowLength if predictor == 2 else self.rowLength + 1
+        self.previous = bytearray(self.rowLength)
+        self.pending = bytearray()
+
+    def Decode(self, data):
+        if self.error != None:
+            raise Exception(self.error)
+        if self.predictor == 1:
+            return bytes(data)
+        self.pending += data
+        complete = len(self.pending) - len(self.pending) % self.stride
+        result = self.DecodeRows(self.pending[:complete])
+        del self.pending[:complete]
+        return result
+
+    def Flush(self):
+        if self.error != None:
+            raise Exception(self.error)
+        result = self.DecodeRows(self.pending)
+        self.pending = bytearray()
+        return result
+
+    def DecodeRows(self, data):
+        bytesPerPixel = self.bytesPerPixel
+        rowLength = self.rowLength
+        if self.predictor == 2:
+            data = bytearray(data)
+            for rowStart in range(0, len(data), rowLength):
+                for i in range(rowStart + bytesPerPixel, min(rowStart + rowLength, len(data))):
+                    data[i] = (data[i] + data[i - bytesPerPixel]) & 0xFF
+            return bytes(data)
+        result = bytearray()
+        previous = self.previous
+        for rowStart in range(0, len(data), rowLength + 1):
+            rowType = data[rowStart]
+            row = data[rowStart + 1:rowStart + 1 + rowLength]
+            row += bytearray(rowLength - len(row))
+            if rowType == 1:
+                for i in range(bytesPerPixel, rowLength):
+                    row[i] = (row[i] + row[i - bytesPerPixel]) & 0xFF
+            elif rowType == 2:
+                for i in range(rowLength):
+                    row[i] = (row[i] + previous[i]) & 0xFF
+            elif rowType == 3:
+                for i in range(rowLength):
+                    left = row[i - bytesPerPixel] if i >= bytesPerPixel else 0
+                    row[i] = (row[i] + ((left + previous[i]) >> 1)) & 0xFF
+            elif rowType == 4:
+                for i in range(rowLength):
+                    left = row[i - bytesPerPixel] if i >= bytesPerPixel else 0
+                    upperLeft = previous[i - bytesPerPixel] if i >= bytesPerPixel else 0
+                    estimate = left + previous[i] - upperLeft
+                    distanceLeft = abs(estimate - left)
+                    distanceUp = abs(estimate - previous[i])
+                    distanceUpperLeft = abs(estimate - upperLeft)
+                    if distanceLeft <= distanceUp and distanceLeft <= distanceUpperLeft:
+                        row[i] = (row[i] + left) & 0xFF
+                    elif distanceUp <= distanceUpperLeft:
+                        row[i] = (row[i] + previous[i]) & 0xFF
+                    else:
+                        row[i] = (row[i] + upperLeft) & 0xFF
+            elif rowType != 0:
+                raise Exception('Unsupported PNG predictor type %d' % rowType)
+            result += row
+            previous = row
+        self.previous = previous
+        return bytes(result)
+
+def PredictorDecodeParameters(data, dDecodeParms):
+    return PredictorDecode(data, dDecodeParms.get('/Predictor', 1), dDecodeParms.get('/Colors', 1), dDecodeParms.get('/BitsPerComponent', 8), dDecodeParms.get('/Columns', 1))
+
+# if inflating fails, we recover the data preceding the error (sample 4da299d6e52bbb79c0ac00bad6a1d51d4d5fe42965a8d94e88a359e5277117e2)
+# the error is ignored when it occurs in the last 2 bytes of a stream larger than 10 bytes
 def FlateDecode(data):
+    data = C2BIP3(data)
     try:
-        return zlib.decompress(C2BIP3(data))
-    except:
+        return zlib.decompress(data)
+    except zlib.error:
         if len(data) <= 10:
             raise
-        oDecompress = zlib.decompressobj()
-        oStringIO = StringIO()
-        count = 0
-        for byte in C2BIP3(data):
-            try:
-                oStringIO.write(oDecompress.decompress(byte))
-                count += 1
-            except:
-                break
-        if len(data) - count <= 2:
-            return oStringIO.getvalue()
+        decompressed, truncation = FlateDecodeRecover(data)
+        if truncation == None or len(data) - truncation <= 2:
+            return decompressed
+        raise
+
+# inflates data in chunks, returns the data that could be inflated and the offset where inflating stopped (None when the data is complete)
+def FlateDecodeRecover(data):
+    oFilter = cFilterFlateDecode()
+    decompressed = []
+    for position in range(0, len(data), DECOMPRESS_CHUNK_SIZE):
+        decompressed.extend(oFilter.Decode(data[position:position + DECOMPRESS_CHUNK_SIZE]))
+    if oFilter.error != None:
+        return b''.join(decompressed), len(data) - oFilter.discarded
+    decompressed.append(oFilter.oDecompress.flush())
+    return b''.join(decompressed), IFF(oFilter.oDecompress.eof, None, len(data))
+
+# inflates data with oDecompress without keeping the output, returns False when zlib reports an error
+def FlateDecodeInflates(oDecompress, data):
+    try:
+        while data and not oDecompress.eof:
+            oDecompress.decompress(data, DECOMPRESS_CHUNK_SIZE)
+            data = oDecompress.unconsumed_tail
+    except zlib.error:
+        return False
+    return True
+
+# finds the failing byte in data, that fails to inflate starting from the state of oCheckpoint
+# bisects on copies of oCheckpoint: a prefix of data fails if and only if it contains the failing byte
+# returns the number of bytes that inflate, and a decompressor in the state after inflating these bytes
+def FlateDecodeErrorOffset(oCheckpoint, data):
+    oDecompress = oCheckpoint.copy()
+    low = 0
+    high = len(data)
+    while high - low > 1:
+        middle = (low + high) // 2
+        oTrial = oDecompress.copy()
+        if FlateDecodeInflates(oTrial, data[low:middle]):
+            oDecompress = oTrial
+            low = middle
         else:
-            raise
+            high = middle
+    return low, oDecompress
 
 def RunLengthDecode(data):
-    f = StringIO(data)
-    decompressed = ''
-    runLength = ord(f.read(1))
-    while runLength:
-        if runLength < 128:
-            decompressed += f.read(runLength + 1)
-        if runLength > 128:
-            decompressed += f.read(1) * (257 - runLength)
-        if runLength == 128:
-            break
-        runLength = ord(f.read(1))
-#    return sub(r'(\d+)(\D)', lambda m: m.group(2) * int(m.group(1)), data)
-    return decompressed
+    return FilterDecode(cFilterRunLengthDecode(), data)
 
-#### LZW code sourced from pdfminer
+#### LZW table handling follows the LZWDecoder of pdfminer
 # Copyright (c) 2004-2009 Yusuke Shinyama <yusuke at cs dot nyu dot edu>
 #
 # Permission is hereby granted, free of charge, to any person obtaining a copy of this software and associated
@@ -1077,83 +2011,363 @@ def RunLengthDecode(data):
 # the rights to use, copy, modify, merge, publish, distribute, sublicense, and/or sell copies of the Software,
 # and to permit persons to whom the Software is furnished to do so, subject to the following conditions:
 
-class LZWDecoder(object):
-    def __init__(self, fp):
-        self.fp = fp
-        self.buff = 0
-        self.bpos = 8
-        self.nbits = 9
-        self.table = None
-        self.prevbuf = None
-        return
-
-    def readbits(self, bits):
-        v = 0
-        while 1:
-            # the number of remaining bits we can get from the current buffer.
-            r = 8-self.bpos
-            if bits <= r:
-                # |-----8-bits-----|
-                # |-bpos-|-bits-|  |
-                # |      |----r----|
-                v = (v<<bits) | ((self.buff>>(r-bits)) & ((1<<bits)-1))
-                self.bpos += bits
-                break
+# decodes LZW data incrementally: the bits are collected in an integer accumulator, the code table is preallocated
+# earlychange 1 (the default) switches to a larger code width one code early, like the PDF default /EarlyChange 1
+# an end-of-data code (257) is ignored, decoding stops at the end of the data
+class cLZWDecoder:
+    def __init__(self, earlychange=1):
+        self.earlychange = earlychange
+        self.accumulator = 0
+        self.bits = 0
+        self.width = 9
+        self.table = [bytes(bytearray([c])) for c in range(256)] + [None, None] + [None] * (4096 - 258)
+        self.next = None
+        self.previous = None
+
+    def Decode(self, data):
+        output = bytearray()
+        accumulator = self.accumulator
+        bits = self.bits
+        width = self.width
+        table = self.table
+        next = self.next
+        previous = self.previous
+        earlychange = self.earlychange
+        for byte in bytearray(data):
+            accumulator = (accumulator << 8) | byte
+            bits += 8
+            if bits < width:
+                continue
+            bits -= width
+            code = accumulator >> bits
+            accumulator &= (1 << bits) - 1
+            if code == 256:
+                next = 258
+                previous = b''
+                width = 9
+            elif code == 257:
+                pass
+            elif next == None:
+                raise Exception('LZWDecode data does not start with a clear-table code')
+            elif not previous:
+                previous = table[code]
+                if previous == None:
+                    raise Exception('LZWDecode invalid code %d' % code)
+                output += previous
             else:
-                # |-----8-bits-----|
-                # |-bpos-|---bits----...
-                # |      |----r----|
-                v = (v<<r) | (self.buff & ((1<<r)-1))
-                bits -= r
-                x = self.fp.read(1)
-                if not x: raise EOFError
-                self.buff = ord(x)
-                self.bpos = 0
-        return v
-
-    def feed(self, code):
-        x = ''
-        if code == 256:
-            self.table = [ chr(c) for c in range(256) ] # 0-255
-            self.table.append(None) # 256
-            self.table.append(None) # 257
-            self.prevbuf = ''
-            self.nbits = 9
-        elif code == 257:
-            pass
-        elif not self.prevbuf:
-            x = self.prevbuf = self.table[code]
-        else:
-            if code < len(self.table):
-                x = self.table[code]
-                self.table.append(self.prevbuf+x[0])
-            else:
-                self.table.append(self.prevbuf+self.prevbuf[0])
-                x = self.table[code]
-            l = len(self.table)
-            if l == 511:
-                self.nbits = 10
-            elif l == 1023:
-                self.nbits = 11
-            elif l == 2047:
-                self.nbits = 12
-            self.prevbuf = x
-        return x
-
-    def run(self):
-        while 1:
-            try:
-                code = self.readbits(self.nbits)
-            except EOFError:
-                break
-            x = self.feed(code)
-            yield x
-        return
+                if code < next:
+                    entry = table[code]
+                    if entry == None:
+                        raise Exception('LZWDecode invalid code %d' % code)
+                    addition = previous + entry[:1]
+                elif code == next:
+                    entry = addition = previous + previous[:1]
+                else:
+                    raise Exception('LZWDecode invalid code %d' % code)
+                if next < 4096:
+                    table[next] = addition
+                    next += 1
+                    if next + earlychange == 512:
+                        width = 10
+                    elif next + earlychange == 1024:
+                        width = 11
+                    elif next + earlychange == 2048:
+                        width = 12
+                output += entry
+                previous = entry
+        self.accumulator = accumulator
+        self.bits = bits
+        self.width = width
+        self.next = next
+        self.previous = previous
+        return bytes(output)
 
 ####
 
-def LZWDecode(data):
-    return ''.join(LZWDecoder(StringIO(data)).run())
+def LZWDecode(data, earlychange=1):
+    return cLZWDecoder(earlychange).Decode(C2BIP3(data))
+
+class cDecompressionError(Exception):
+    pass
+
+class cDecompressionLimitError(cDecompressionError):
+    pass
+
+# caps on the output of the decoders: per stream, per document (all streams decoded with the same limits) and the ratio output/input
+# the ratio is only checked once the output of a stream exceeds DECOMPRESS_RATIO_THRESHOLD, a limit of 0 disables the check
+class cDecompressionLimits:
+    def __init__(self, maximumStream=DECOMPRESS_MAXIMUM_STREAM, maximumDocument=DECOMPRESS_MAXIMUM_DOCUMENT, maximumRatio=DECOMPRESS_MAXIMUM_RATIO):
+        self.maximumStream = maximumStream
+        self.maximumDocument = maximumDocument
+        self.maximumRatio = maximumRatio
+        self.document = 0
+
+    def Check(self, sizeInput, sizeOutput, increment):
+        self.document += increment
+        if self.maximumStream and sizeOutput > self.maximumStream:
+            raise cDecompressionLimitError('Decompression limit exceeded: stream output larger than %d bytes' % self.maximumStream)
+        if self.maximumDocument and self.document > self.maximumDocument:
+            raise cDecompressionLimitError('Decompression limit exceeded: document output larger than %d bytes' % self.maximumDocument)
+        if self.maximumRatio and sizeOutput > DECOMPRESS_RATIO_THRESHOLD and sizeOutput > self.maximumRatio * max(sizeInput, 1):
+            raise cDecompressionLimitError('Decompression limit exceeded: stream output more than %d times its input' % self.maximumRatio)
+
+# a filter stage decodes its input incrementally: Decode and Flush are generators of bytes
+class cFilter:
+    name = ''
+
+    def __init__(self, dDecodeParms=None):
+        pass
+
+    def Decode(self, data):
+        yield data
+
+    def Flush(self):
+        return iter([])
+
+    def FailureMessage(self, e):
+        return '%s decompress failed' % self.name
+
+# if inflating fails, the failing chunk is inflated up to the failing byte, found with FlateDecodeErrorOffset
+# like FlateDecode, the error is ignored when it occurs in the last 2 bytes of a stream larger than 10 bytes
+class cFilterFlateDecode(cFilter):
+    name = 'FlateDecode'
+
+    def __init__(self, dDecodeParms=None):
+        self.oDecompress = zlib.decompressobj()
+        self.size = 0
+        self.head = b''
+        self.error = None
+        self.discarded = 0
+
+    def Decode(self, data):
+        if self.error != None:
+            self.discarded += len(data)
+            return
+        self.size += len(data)
+        if len(self.head) <= 10:
+            self.head += data[:11 - len(self.head)]
+        oCheckpoint = self.oDecompress.copy()
+        produced = 0
+        remainder = data
+        try:
+            # after the end of the compressed data, unconsumed_tail is not emptied: the remainder is ignored
+            while remainder and not self.oDecompress.eof:
+                decompressed = self.oDecompress.decompress(remainder, DECOMPRESS_CHUNK_SIZE)
+                remainder = self.oDecompress.unconsumed_tail
+                produced += len(decompressed)
+                yield decompressed
+        except zlib.error as e:
+            self.error = e
+            count, self.oDecompress = FlateDecodeErrorOffset(oCheckpoint, data)
+            self.discarded = len(data) - count
+            # the output of the bytes preceding the failing byte, that was not yielded yet
+            remainder = data[:count]
+            while remainder and not oCheckpoint.eof:
+                decompressed = oCheckpoint.decompress(remainder, DECOMPRESS_CHUNK_SIZE)
+                remainder = oCheckpoint.unconsumed_tail
+                if produced >= len(decompressed):
+                    produced -= len(decompressed)
+                else:
+                    yield decompressed[produced:]
+                    produced = 0
+
+    def Flush(self):
+        if self.error != None:
+            if self.size <= 10 or self.discarded > 2:
+                raise self.error
+            return
+        yield self.oDecompress.flush()
+        if not self.oDecompress.eof and self.size <= 10:
+            zlib.decompress(self.head)
+
+    def FailureMessage(self, e):
+        message = 'FlateDecode decompress failed'
+        if len(self.head) > 0 and bytearray(self.head)[0] & 0x0F != 8:
+            message += ', unexpected compression method: %02x' % bytearray(self.head)[0]
+        return message + '. zlib.error %s' % e
+
+class cFilterASCIIHexDecode(cFilter):
+    name = 'ASCIIHexDecode'
+
+    def __init__(self, dDecodeParms=None):
+        self.pending = b''
+
+    def Decode(self, data):
+        data = self.pending + data.translate(None, b' \t\n\r')
+        # trailing > (end of data marker) and an odd digit are kept until more data arrives
+        length = len(data.rstrip(b'>')) & ~1
+        self.pending = data[length:]
+        yield binascii.unhexlify(data[:length])
+
+    def Flush(self):
+        yield binascii.unhexlify(self.pending.rstrip(b'>'))
+
+# characters outside !-u, z and ~ are ignored, a partial group is only decoded when it is terminated by ~
+class cFilterASCII85Decode(cFilter):
+    name = 'ASCII85Decode'
+
+    def __init__(self, dDecodeParms=None):
+        self.group = b''
+        self.pending = b''
+        self.ended = False
+
+    def Decode(self, data):
+        if self.ended:
+            return
+        data = self.pending + data
+        # trailing > characters are ignored when they end the data, so they are kept until more data arrives
+        end = len(data.rstrip(b'>'))
+        self.pending = data[end:]
+        yield self.DecodeGroups(data[:end])
+
+    def DecodeGroups(self, data):
+        data = self.group + data.translate(None, ASCII85_IGNORED)
+        end = data.find(b'~')
+        if end != -1:
+            data = data[:end]
+            self.ended = True
+        complete = oReASCII85Groups.match(data).end()
+        if b'z' in data[complete:]:
+            raise Exception('ASCII85Decode z inside a group')
+        if self.ended:
+            self.group = b''
+            return base64.a85decode(data)
+        self.group = data[complete:]
+        return base64.a85decode(data[:complete])
+
+# with a /Predictor, the prediction is undone row by row as the data is decoded
+class cFilterLZWDecode(cFilter):
+    name = 'LZWDecode'
+
+    def __init__(self, dDecodeParms=None):
+        dDecodeParms = dDecodeParms or {}
+        self.oLZWDecoder = cLZWDecoder(dDecodeParms.get('/EarlyChange', 1))
+        self.oPredictor = None
+        if dDecodeParms.get('/Predictor', 1) > 1:
+            self.oPredictor = cPredictor(dDecodeParms.get('/Predictor', 1), dDecodeParms.get('/Colors', 1), dDecodeParms.get('/BitsPerComponent', 8), dDecodeParms.get('/Columns', 1))
+
+    def Decode(self, data):
+        # a code of 12 bits can produce 4096 bytes: the input is decoded in small pieces, so the limits are checked in time
+        for position in range(0, len(data), LZW_INPUT_CHUNK_SIZE):
+            decoded = self.oLZWDecoder.Decode(data[position:position + LZW_INPUT_CHUNK_SIZE])
+            if self.oPredictor == None:
+                yield decoded
+            else:
+                yield self.oPredictor.Decode(decoded)
+
+    def Flush(self):
+        if self.oPredictor != None:
+            yield self.oPredictor.Flush()
+
+class cFilterRunLengthDecode(cFilter):
+    name = 'RunLengthDecode'
+
+    def __init__(self, dDecodeParms=None):
+        self.literal = 0
+        self.repeat = 0
+        self.ended = False
+
+    def Decode(self, data):
+        out = bytearray()
+        data = memoryview(data)
+        position = 0
+        while position < len(data) and not self.ended:
+            if self.literal > 0:
+                literal = data[position:position + self.literal]
+                out += literal
+                self.literal -= len(literal)
+                position += len(literal)
+            elif self.repeat > 0:
+                out += data[position:position + 1].tobytes() * self.repeat
+                self.repeat = 0
+                position += 1
+            else:
+                runLength = data[position]
+                position += 1
+                if runLength == 0 or runLength == 128:
+                    self.ended = True
+                elif runLength < 128:
+                    self.literal = runLength + 1
+                else:
+                    self.repeat = 257 - runLength
+        yield bytes(out)
+
+    def Flush(self):
+        if not self.ended:
+            raise Exception('RunLengthDecode data not terminated')
+        return iter([])
+
+dFilters = {
+    '/FlateDecode': cFilterFlateDecode,
+    '/Fl': cFilterFlateDecode,
+    '/ASCIIHexDecode': cFilterASCIIHexDecode,
+    '/AHx': cFilterASCIIHexDecode,
+    '/ASCII85Decode': cFilterASCII85Decode,
+    '/A85': cFilterASCII85Decode,
+    '/LZWDecode': cFilterLZWDecode,
+    '/LZW': cFilterLZWDecode,
+    '/RunLengthDecode': cFilterRunLengthDecode,
+    '/R': cFilterRunLengthDecode,
+#    '/CCITTFaxDecode'
+#    '/DCTDecode'
+}
+
+# chains filter stages: the input is fed in chunks through all stages, so that the output of a stage is never held completely
+# a failing stage raises cDecompressionError with the message that Decompress returns
+def FilterDecode(oFilter, data):
+    return b''.join(list(oFilter.Decode(C2BIP3(data))) + list(oFilter.Flush()))
+
+class cFilterPipeline:
+    def __init__(self, filters, limits, dDecodeParms=None):
+        self.stages = [dFilters[Canonicalize(filter)](dDecodeParms) for filter in filters]
+        self.limits = limits
+
+    def Decode(self, data):
+        sizeOutput = 0
+        for position in range(0, len(data), DECOMPRESS_CHUNK_SIZE):
+            for chunk in self.Feed(0, data[position:position + DECOMPRESS_CHUNK_SIZE]):
+                sizeOutput += len(chunk)
+                self.limits.Check(len(data), sizeOutput, len(chunk))
+                yield chunk
+        for index, oFilter in enumerate(self.stages):
+            for decoded in self.StageOutput(oFilter, oFilter.Flush):
+                for chunk in self.Feed(index + 1, decoded):
+                    sizeOutput += len(chunk)
+                    self.limits.Check(len(data), sizeOutput, len(chunk))
+                    yield chunk
+
+    def Feed(self, index, data):
+        if len(data) == 0:
+            return
+        if index == len(self.stages):
+            yield data
+            return
+        oFilter = self.stages[index]
+        for decoded in self.StageOutput(oFilter, oFilter.Decode, data):
+            for chunk in self.Feed(index + 1, decoded):
+                yield chunk
+
+    def StageOutput(self, oFilter, method, *arguments):
+        try:
+            for decoded in method(*arguments):
+                yield decoded
+        except cDecompressionError:
+            raise
+        except Exception as e:
+            raise cDecompressionError(oFilter.FailureMessage(e))
+
+# searches a keyword in content produced in chunks, keeping the tail of the previous chunk for matches that span chunks
+def SearchChunks(chunks, keyword, casesensitive):
+    if not casesensitive:
+        keyword = keyword.lower()
+    tail = b''
+    for chunk in chunks:
+        if not casesensitive:
+            chunk = chunk.lower()
+        if keyword in tail + chunk[:len(keyword) - 1] or keyword in chunk:
+            return True
+        tail = (tail + chunk)[-(len(keyword) - 1):] if len(keyword) > 1 else b''
+    return False
 
 def PrintGenerateObject(object, options, newId=None):
     if newId == None:
@@ -1164,7 +2378,7 @@ def PrintGenerateObject(object, options, newId=None):
     if dataPrecedingStream:
         if options.filter:
             decompressed = object.Stream(True, options.overridingfilters)
-            if decompressed == 'No filters' or decompressed.startswith('Unsupported filter: '):
+            if not isinstance(decompressed, bytes) and (decompressed == 'No filters' or decompressed.startswith('Unsupported filter: ')):
                 print('    oPDF.stream(%d, %d, %s, %s)' % (objectId, object.version, repr(object.Stream(False, options.overridingfilters).rstrip()), repr(re.sub(r'/Length\s+\d+', '/Length %d', FormatOutput(dataPrecedingStream, True)).strip())))
             else:
                 dictionary = FormatOutput(dataPrecedingStream, True)
@@ -1186,6 +2400,19 @@ def PrintObject(object, options):
     else:
         PrintOutputObject(object, options)
 
+def PrintYARAResults(object, results, options):
+    if results == []:
+        return
+    for result in results:
+        for yaraResult in result[1]:
+            print('YARA rule%s: %s (%s)' % (IFF(result[0] == '', '', ' (stream decoder: %s)' % result[0]), yaraResult.rule, yaraResult.namespace))
+            if options.yarastrings:
+                for stringdata in yaraResult.strings:
+                    print('%06x %s:' % (stringdata[0], stringdata[1]))
+                    print(' %s' % binascii.hexlify(C2BIP3(stringdata[2])))
+                    print(' %s' % repr(stringdata[2]))
+        PrintObject(object, options)
+
 def File2Strings(filename):
     try:
         f = open(filename, 'r')
@@ -1208,7 +2435,7 @@ def ProcessAt(argument):
     else:
         return [argument]
 
-def YARACompile(ruledata):
+def YARACompile(ruledata, cachedirectory=None):
     if ruledata.startswith('#'):
         if ruledata.startswith('#h#'):
             rule = binascii.a2b_hex(ruledata[3:]).decode('latin')
@@ -1224,7 +2451,7 @@ def YARACompile(ruledata):
             rule = 'rule regex {strings: $a = /%s/ ascii wide nocase condition: $a}' % ruledata[3:]
         else:
             rule = ruledata[1:]
-        return yara.compile(source=rule), rule
+        return YARACompileCached(cachedirectory, [('#', 0, C2BIP3(rule))], lambda: yara.compile(source=rule)), rule
     else:
         dFilepaths = {}
         if os.path.isdir(ruledata):
@@ -1235,7 +2462,114 @@ def YARACompile(ruledata):
         else:
             for filename in ProcessAt(ruledata):
                 dFilepaths[filename] = filename
-        return yara.compile(filepaths=dFilepaths), ','.join(dFilepaths.values())
+        return YARACompileCached(cachedirectory, YARASources(dFilepaths), lambda: yara.compile(filepaths=dFilepaths)), ','.join(dFilepaths.values())
+
+# (filename, modification time, content) of each rule file
+def YARASources(dFilepaths):
+    sources = []
+    for filename in sorted(dFilepaths.keys()):
+        try:
+            f = open(filename, 'rb')
+            try:
+                sources.append((filename, os.path.getmtime(filename), f.read()))
+            finally:
+                f.close()
+        except EnvironmentError:
+            # yara.compile reports the error
+            sources.append((filename, 0, b''))
+    return sources
+
+# the cache key is the SHA-256 of the YARA version and of the name, modification time and content of each source
+# rule files included with include are not part of the key
+def YARACacheFilename(cachedirectory, sources):
+    oHash = hashlib.sha256()
+    oHash.update(C2BIP3(getattr(yara, '__version__', '')))
+    for name, mtime, content in sources:
+        oHash.update(C2BIP3('\x00%s\x00%r\x00%d\x00' % (name, mtime, len(content))))
+        oHash.update(content)
+    return os.path.join(cachedirectory, oHash.hexdigest() + '.yarc')
+
+# loads the compiled rules from the cache directory, or compiles and saves them; without cache directory, the rules are just compiled
+# a cache directory or file is only trusted when it belongs to the current user, and a directory is not writable by group or others
+def YARACacheTrusted(path, directory):
+    try:
+        info = os.lstat(path)
+    except EnvironmentError:
+        return False
+    if directory and not stat.S_ISDIR(info.st_mode) or not directory and not stat.S_ISREG(info.st_mode):
+        return False
+    if not hasattr(os, 'getuid'):
+        return True
+    return info.st_uid == os.getuid() and not (directory and info.st_mode & 0o022)
+
+def YARACompileCached(cachedirectory, sources, compile):
+    if not cachedirectory:
+        return compile()
+    try:
+        if not os.path.lexists(cachedirectory):
+            os.makedirs(cachedirectory, 0o700)
+    except EnvironmentError:
+        return compile()
+    if not YARACacheTrusted(cachedirectory, True):
+        return compile()
+    filename = YARACacheFilename(cachedirectory, sources)
+    if YARACacheTrusted(filename, False):
+        try:
+            return yara.load(filepath=filename)
+        except yara.Error:
+            # corrupt cache file or file saved by an incompatible YARA version: compile again
+            pass
+    rules = compile()
+    try:
+        # save to a temporary file and rename, other pdf-parser processes never load a partially written file
+        filenameTemporary = '%s.%d.tmp' % (filename, os.getpid())
+        rules.save(filepath=filenameTemporary)
+        os.replace(filenameTemporary, filename)
+    except (EnvironmentError, yara.Error):
+        # the cache is only an optimization
+        pass
+    return rules
+
+def YARAMatchData(rules, data):
+    results = []
+    for name, decoded in data:
+        yaraResults = rules.match(data=decoded)
+        if yaraResults != []:
+            results.append([name, yaraResults])
+    return results
+
+# matches stream data with YARA rules in a thread pool (yara-python releases the GIL while matching)
+# the results are returned in the order the objects were submitted, at most 2 submissions per thread are pending
+class cYARAMatcher:
+    def __init__(self, rules, threads=None):
+        self.rules = rules
+        if threads == None:
+            threads = min(os.cpu_count() or 1, YARA_MAXIMUM_THREADS)
+        self.threads = threads
+        self.pending = collections.deque()
+        self.oExecutor = None
+        if threads > 1 and 'concurrent.futures' in sys.modules:
+            self.oExecutor = concurrent.futures.ThreadPoolExecutor(threads)
+
+    # returns a list of (object, results) tuples for the submissions that are completed
+    def Submit(self, object, data):
+        if self.oExecutor == None:
+            return [(object, YARAMatchData(self.rules, data))]
+        self.pending.append((object, self.oExecutor.submit(YARAMatchData, self.rules, data)))
+        return self.Completed(self.threads * 2)
+
+    def Completed(self, pending=0):
+        results = []
+        while len(self.pending) > pending:
+            object, oFuture = self.pending.popleft()
+            results.append((object, oFuture.result()))
+        return results
+
+    def Close(self):
+        results = self.Completed()
+        if self.oExecutor != None:
+            self.oExecutor.shutdown()
+        return results
 
 def AddDecoder(cClass):
     global decoders
@@ -1293,47 +2627,46 @@ def DecodeFunction(decoders, options, stream):
         return stream
     return decoders[0](stream, options.decoderoptions).Decode()
 
-class cDumpStream():
-    def __init__(self):
-        self.text = ''
-
-    def Addline(self, line):
-        if line != '':
-            self.text += line + '\n'
-
-    def Content(self):
-        return self.text
+# the dump functions accept bytes (or a str of latin characters), and format a block of lines at once: hexlify for the hexadecimal bytes, translate for the ASCII column
+# hexlify with a separator requires Python 3.8, hence __minimum_python_version__
+DUMP_BLOCK_LINES = 0x1000
+DUMP_ASCII_TABLE = b'.' * 32 + bytes(bytearray(range(32, 256)))
+
+def DumpBlocks(data):
+    if isinstance(data, str):
+        data = C2BIP3(data)
+    blockSize = dumplinelength * DUMP_BLOCK_LINES
+    for position in range(0, len(data), blockSize):
+        yield position, bytes(data[position:position + blockSize])
+
+# generator of the lines of HexDump, to write large dumps without building one string
+def HexDumpLines(data):
+    lineLength = 3 * dumplinelength
+    for position, block in DumpBlocks(data):
+        hexBlock = binascii.hexlify(block, ' ').decode().upper()
+        for i in range(0, len(hexBlock), lineLength):
+            yield hexBlock[i:i + lineLength - 1] + '\n'
 
 def HexDump(data):
-    oDumpStream = cDumpStream()
-    hexDump = ''
-    for i, b in enumerate(data):
-        if i % dumplinelength == 0 and hexDump != '':
-            oDumpStream.Addline(hexDump)
-            hexDump = ''
-        hexDump += IFF(hexDump == '', '', ' ') + '%02X' % ord(b)
-    oDumpStream.Addline(hexDump)
-    return oDumpStream.Content()
+    return ''.join(HexDumpLines(data))
 
 def CombineHexAscii(hexDump, asciiDump):
     if hexDump == '':
         return ''
     return hexDump + '  ' + (' ' * (3 * (dumplinelength - len(asciiDump)))) + asciiDump
 
+# generator of the lines of HexAsciiDump, to write large dumps without building one string
+def HexAsciiDumpLines(data):
+    lineLength = 3 * dumplinelength
+    for position, block in DumpBlocks(data):
+        hexBlock = binascii.hexlify(block, ' ').decode().upper()
+        asciiBlock = block.translate(DUMP_ASCII_TABLE).decode('latin')
+        for i in range(0, len(block), dumplinelength):
+            asciiDump = asciiBlock[i:i + dumplinelength]
+            yield CombineHexAscii('%08X: ' % (position + i) + hexBlock[3 * i:3 * i + lineLength - 1], asciiDump) + '\n'
+
 def HexAsciiDump(data):
-    oDumpStream = cDumpStream()
-    hexDump = ''
-    asciiDump = ''
-    for i, b in enumerate(data):
-        if i % dumplinelength == 0:
-            if hexDump != '':
-                oDumpStream.Addline(CombineHexAscii(hexDump, asciiDump))
-            hexDump = '%08X:' % i
-            asciiDump = ''
-        hexDump+= ' %02X' % ord(b)
-        asciiDump += IFF(ord(b) >= 32, b, '.')
-    oDumpStream.Addline(CombineHexAscii(hexDump, asciiDump))
-    return oDumpStream.Content()
+    return ''.join(HexAsciiDumpLines(data))
 
 def HexAsciiDumpLine(data):
     return HexAsciiDump(data[0:16])[10:-1]
@@ -1428,13 +2761,90 @@ class cMyJSONOutput():
     def GetJSON(self):
         return json.dumps({'version': 2, 'id': 'didierstevens.com', 'type': 'content', 'fields': ['id', 'name', 'content'], 'items': self.items})
 
+# file arguments: @file (a file with a filename per line), a directory (the files in the directory and its subdirectories), a wildcard pattern, a filename or a URL
+def ExpandFilenames(arguments):
+    filenames = []
+    for argument in arguments:
+        if argument.lower().startswith('http://') or argument.lower().startswith('https://') or os.path.isfile(argument):
+            filenames.append(argument)
+        elif argument.startswith('@'):
+            filenames.extend([filename for filename in ProcessAt(argument) if filename != ''])
+        elif os.path.isdir(argument):
+            for root, dirs, files in os.walk(argument):
+                dirs.sort()
+                for file in sorted(files):
+                    filenames.append(os.path.join(root, file))
+        elif re.search(r'[*?[]', argument):
+            filenames.extend(sorted(glob.glob(argument)))
+        else:
+            filenames.append(argument)
+    return filenames
+
+# the output of ProcessFile for one file, as a dictionary: file, output (or result: the parsed output of option -j) and error when processing failed
+def ProcessFileCaptured(filename, options):
+    result = {'file': filename}
+    stdout = sys.stdout
+    oBytesIO = io.BytesIO()
+    sys.stdout = io.TextIOWrapper(oBytesIO, encoding='utf8', errors='replace')
+    try:
+        try:
+            ProcessFile(filename, options)
+        except (Exception, SystemExit) as e:
+            # SystemExit: pdf-parser exits when it can not open its input, the reason is in the output
+            result['error'] = str(e) or e.__class__.__name__
+        sys.stdout.flush()
+        output = oBytesIO.getvalue().decode('utf8', 'replace')
+    finally:
+        sys.stdout = stdout
+    if options.jsonoutput and not 'error' in result:
+        try:
+            result['result'] = json.loads(output)
+            return result
+        except ValueError:
+            pass
+    result['output'] = output
+    return result
+
+def ProcessFileChunk(filenames, options):
+    return [ProcessFileCaptured(filename, options) for filename in filenames]
+
+def InitializeWorker(options):
+    global decoders
+
+    # with the fork start method, the worker inherits the decoders loaded by Main
+    if not 'decoders' in globals():
+        decoders = []
+        LoadDecoders(options.decoders, True)
+
+# multi-file mode: the files are parsed by a pool of processes, in chunks of options.chunksize files, and a JSON object is printed per file (NDJSON)
+def ProcessFiles(filenames, options):
+    chunksize = max(options.chunksize, 1)
+    chunks = [filenames[index:index + chunksize] for index in range(0, len(filenames), chunksize)]
+    workers = options.workers
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(chunks))
+    if workers <= 1 or not 'concurrent.futures' in sys.modules:
+        for chunk in chunks:
+            for result in ProcessFileChunk(chunk, options):
+                print(json.dumps(result))
+        return
+    with concurrent.futures.ProcessPoolExecutor(workers, initializer=InitializeWorker, initargs=(options,)) as oExecutor:
+        oFutures = [oExecutor.submit(ProcessFileChunk, chunk, options) for chunk in chunks]
+        if not options.inputorder:
+            oFutures = concurrent.futures.as_completed(oFutures)
+        for oFuture in oFutures:
+            for result in oFuture.result():
+                print(json.dumps(result))
+            sys.stdout.flush()
+
 def Main():
     """pdf-parser, use it to parse a PDF document
     """
 
     global decoders
 
-    oParser = optparse.OptionParser(usage='usage: %prog [options] pdf-file|zip-file|url\n' + __description__, version='%prog ' + __version__)
+    oParser = optparse.OptionParser(usage='usage: %prog [options] pdf-file|zip-file|url|directory|@file ...\n' + __description__, version='%prog ' + __version__)
     oParser.add_option('-m', '--man', action='store_true', default=False, help='Print manual')
     oParser.add_option('-s', '--search', help='string to search in indirect objects (except streams)')
     oParser.add_option('-f', '--filter', action='store_true', default=False, help='pass stream object through filters (FlateDecode, ASCIIHexDecode, ASCII85Decode, LZWDecode and RunLengthDecode only)')
@@ -1461,10 +2871,18 @@ def Main():
     oParser.add_option('--generateembedded', type=int, default=0, help='generate a Python program that embeds the selected indirect object as a file')
     oParser.add_option('-y', '--yara', help='YARA rule (or directory or @file) to check streams (can be used with option --unfiltered)')
     oParser.add_option('--yarastrings', action='store_true', default=False, help='Print YARA strings')
+    oParser.add_option('--yaracache', type=str, default=YARA_CACHE_DIRECTORY, help='directory to cache compiled YARA rules (empty string for no cache, default %s)' % YARA_CACHE_DIRECTORY)
     oParser.add_option('--decoders', type=str, default='', help='decoders to load (separate decoders with a comma , ; @file supported)')
     oParser.add_option('--decoderoptions', type=str, default='', help='options for the decoder')
     oParser.add_option('-k', '--key', help='key to search in dictionaries')
     oParser.add_option('-j', '--jsonoutput', action='store_true', default=False, help='produce json output')
+    oParser.add_option('--index', action='store_true', default=False, help='use the cross-reference to seek to the objects selected with option -o')
+    oParser.add_option('--workers', type=int, default=0, help='number of processes to parse multiple files (default 0: one per CPU)')
+    oParser.add_option('--chunksize', type=int, default=1, help='number of files handed to a process at once (default 1)')
+    oParser.add_option('--inputorder', action='store_true', default=False, help='output the results of multiple files in input order (default: order of completion)')
+    oParser.add_option('--maxdecompressed', type=int, default=DECOMPRESS_MAXIMUM_STREAM, help='maximum size of a decompressed stream (0 for no limit, default %d)' % DECOMPRESS_MAXIMUM_STREAM)
+    oParser.add_option('--maxdocumentdecompressed', type=int, default=DECOMPRESS_MAXIMUM_DOCUMENT, help='maximum size of all decompressed streams (0 for no limit, default %d)' % DECOMPRESS_MAXIMUM_DOCUMENT)
+    oParser.add_option('--maxratio', type=int, default=DECOMPRESS_MAXIMUM_RATIO, help='maximum ratio of decompressed to compressed stream size (0 for no limit, default %d)' % DECOMPRESS_MAXIMUM_RATIO)
     (options, args) = oParser.parse_args(GetArguments())
 
     if options.man:
@@ -1472,7 +2890,7 @@ def Main():
         PrintManual()
         return 0
 
-    if len(args) != 1:
+    if len(args) == 0:
         oParser.print_help()
         print('')
         print('  %s' % __description__)
@@ -1484,310 +2902,234 @@ def Main():
         decoders = []
         LoadDecoders(options.decoders, True)
 
-        oPDFParser = cPDFParser(args[0], options.verbose, options.extract)
-        cntComment = 0
-        cntXref = 0
-        cntTrailer = 0
-        cntStartXref = 0
-        cntIndirectObject = 0
-        dicObjectTypes = {}
-        objectsAll = set()
-        objectsReferenced = set()
-        objectsWithStream = []
-        keywords = ['/JS', '/JavaScript', '/AA', '/OpenAction', '/AcroForm', '/RichMedia', '/Launch', '/EmbeddedFile', '/XFA', '/URI']
-        for extrakeyword in ParseINIFile():
-            if not extrakeyword in keywords:
-                keywords.append(extrakeyword)
-
-#        dKeywords = {keyword: [] for keyword in keywords}
-# Done for compatibility with 2.6.6
-        dKeywords = {}
-        for keyword in keywords:
-            dKeywords[keyword] = []
-
-        selectComment = False
-        selectXref = False
-        selectTrailer = False
-        selectStartXref = False
-        selectIndirectObject = False
-        if options.elements:
-            for c in options.elements:
-                if c == 'c':
-                    selectComment = True
-                elif c == 'x':
-                    selectXref = True
-                elif c == 't':
-                    selectTrailer = True
-                elif c == 's':
-                    selectStartXref = True
-                elif c == 'i':
-                    selectIndirectObject = True
-                else:
-                    print('Error: unknown --elements value %s' % c)
-                    return
+        filenames = ExpandFilenames(args)
+        if len(args) == 1 and filenames == args:
+            ProcessFile(args[0], options)
         else:
-            selectIndirectObject = True
-            if not options.search and not options.object and not options.reference and not options.type and not options.searchstream and not options.key:
+            ProcessFiles(filenames, options)
+
+def ProcessFile(filename, options):
+    oDecompressionLimits = cDecompressionLimits(options.maxdecompressed, options.maxdocumentdecompressed, options.maxratio)
+    oPDFParser = None
+    if options.index and options.object and not options.elements and not (options.stats or options.jsonoutput or options.search or options.key or options.generate or options.generateembedded != 0):
+        oPDFParser = cPDFIndexedParser(filename, options.object, options.objstm, options.verbose, options.extract, oDecompressionLimits)
+        if oPDFParser.objects == None:
+            oPDFParser = None
+    if oPDFParser == None:
+        oPDFParser = cPDFParser(filename, options.verbose, options.extract, limits=oDecompressionLimits)
+    oPDFStatistics = cPDFStatistics()
+
+    selectComment = False
+    selectXref = False
+    selectTrailer = False
+    selectStartXref = False
+    selectIndirectObject = False
+    if options.elements:
+        for c in options.elements:
+            if c == 'c':
                 selectComment = True
+            elif c == 'x':
                 selectXref = True
+            elif c == 't':
                 selectTrailer = True
+            elif c == 's':
                 selectStartXref = True
-            if options.search or options.key or options.reference:
-                selectTrailer = True
-
-        if options.type == '-':
-            optionsType = ''
-        else:
-            optionsType = options.type
-
-        if options.generate or options.generateembedded != 0:
-            savedRoot = ['1', '0', 'R']
-            print('#!/usr/bin/python')
-            print('')
-            print('"""')
-            print('')
-            print('Program generated by pdf-parser.py by Didier Stevens')
-            print('https://DidierStevens.com')
-            print('Use at your own risk')
-            print('')
-            print('Input PDF file: %s' % args[0])
-            print('This Python program was created on: %s' % Timestamp())
-            print('')
-            print('"""')
-            print('')
-            print('import mPDF')
-            print('import sys')
-            print('')
-            print('def Main():')
-            print('    if len(sys.argv) != 2:')
-            print("        print('Usage: %s pdf-file' % sys.argv[0])")
-            print('        return')
-            print('    oPDF = mPDF.cPDF(sys.argv[1])')
-
-        if options.generateembedded != 0:
-            print("    oPDF.header('1.1')")
-            print(r"    oPDF.comment('\xd0\xd0\xd0\xd0')")
-            print(r"    oPDF.indirectobject(1, 0, '<<\r\n /Type /Catalog\r\n /Outlines 2 0 R\r\n /Pages 3 0 R\r\n /Names << /EmbeddedFiles << /Names [(test.bin) 7 0 R] >> >>\r\n>>')")
-            print(r"    oPDF.indirectobject(2, 0, '<<\r\n /Type /Outlines\r\n /Count 0\r\n>>')")
-            print(r"    oPDF.indirectobject(3, 0, '<<\r\n /Type /Pages\r\n /Kids [4 0 R]\r\n /Count 1\r\n>>')")
-            print(r"    oPDF.indirectobject(4, 0, '<<\r\n /Type /Page\r\n /Parent 3 0 R\r\n /MediaBox [0 0 612 792]\r\n /Contents 5 0 R\r\n /Resources <<\r\n             /ProcSet [/PDF /Text]\r\n             /Font << /F1 6 0 R >>\r\n            >>\r\n>>')")
-            print(r"    oPDF.stream(5, 0, 'BT /F1 12 Tf 70 700 Td 15 TL (This PDF document embeds file test.bin) Tj ET', '<< /Length %d >>')")
-            print(r"    oPDF.indirectobject(6, 0, '<<\r\n /Type /Font\r\n /Subtype /Type1\r\n /Name /F1\r\n /BaseFont /Helvetica\r\n /Encoding /MacRomanEncoding\r\n>>')")
-            print(r"    oPDF.indirectobject(7, 0, '<<\r\n /Type /Filespec\r\n /F (test.bin)\r\n /EF << /F 8 0 R >>\r\n>>')")
-
-        if options.yara != None:
-            if not 'yara' in sys.modules:
-                print('Error: option yara requires the YARA Python module.')
+            elif c == 'i':
+                selectIndirectObject = True
+            else:
+                print('Error: unknown --elements value %s' % c)
                 return
-            rules, rulesVerbose = YARACompile(options.yara)
-            if options.verbose:
-                print(rulesVerbose)
+    else:
+        selectIndirectObject = True
+        if not options.search and not options.object and not options.reference and not options.type and not options.searchstream and not options.key:
+            selectComment = True
+            selectXref = True
+            selectTrailer = True
+            selectStartXref = True
+        if options.search or options.key or options.reference:
+            selectTrailer = True
+
+    if options.type == '-':
+        optionsType = ''
+    else:
+        optionsType = options.type
 
-        oPDFParserOBJSTM = None
-        oMyJSONOutput = cMyJSONOutput()
-        while True:
-            if oPDFParserOBJSTM == None:
-                object = oPDFParser.GetObject()
+    if options.generate or options.generateembedded != 0:
+        savedRoot = ['1', '0', 'R']
+        print('#!/usr/bin/python')
+        print('')
+        print('"""')
+        print('')
+        print('Program generated by pdf-parser.py by Didier Stevens')
+        print('https://DidierStevens.com')
+        print('Use at your own risk')
+        print('')
+        print('Input PDF file: %s' % filename)
+        print('This Python program was created on: %s' % Timestamp())
+        print('')
+        print('"""')
+        print('')
+        print('import mPDF')
+        print('import sys')
+        print('')
+        print('def Main():')
+        print('    if len(sys.argv) != 2:')
+        print("        print('Usage: %s pdf-file' % sys.argv[0])")
+        print('        return')
+        print('    oPDF = mPDF.cPDF(sys.argv[1])')
+
+    if options.generateembedded != 0:
+        print("    oPDF.header('1.1')")
+        print(r"    oPDF.comment('\xd0\xd0\xd0\xd0')")
+        print(r"    oPDF.indirectobject(1, 0, '<<\r\n /Type /Catalog\r\n /Outlines 2 0 R\r\n /Pages 3 0 R\r\n /Names << /EmbeddedFiles << /Names [(test.bin) 7 0 R] >> >>\r\n>>')")
+        print(r"    oPDF.indirectobject(2, 0, '<<\r\n /Type /Outlines\r\n /Count 0\r\n>>')")
+        print(r"    oPDF.indirectobject(3, 0, '<<\r\n /Type /Pages\r\n /Kids [4 0 R]\r\n /Count 1\r\n>>')")
+        print(r"    oPDF.indirectobject(4, 0, '<<\r\n /Type /Page\r\n /Parent 3 0 R\r\n /MediaBox [0 0 612 792]\r\n /Contents 5 0 R\r\n /Resources <<\r\n             /ProcSet [/PDF /Text]\r\n             /Font << /F1 6 0 R >>\r\n            >>\r\n>>')")
+        print(r"    oPDF.stream(5, 0, 'BT /F1 12 Tf 70 700 Td 15 TL (This PDF document embeds file test.bin) Tj ET', '<< /Length %d >>')")
+        print(r"    oPDF.indirectobject(6, 0, '<<\r\n /Type /Font\r\n /Subtype /Type1\r\n /Name /F1\r\n /BaseFont /Helvetica\r\n /Encoding /MacRomanEncoding\r\n>>')")
+        print(r"    oPDF.indirectobject(7, 0, '<<\r\n /Type /Filespec\r\n /F (test.bin)\r\n /EF << /F 8 0 R >>\r\n>>')")
+
+    if options.yara != None:
+        if not 'yara' in sys.modules:
+            print('Error: option yara requires the YARA Python module.')
+            return
+        rules, rulesVerbose = YARACompile(options.yara, options.yaracache)
+        if options.verbose:
+            print(rulesVerbose)
+        oYARAMatcher = cYARAMatcher(rules)
+
+    oMyJSONOutput = cMyJSONOutput()
+    oPDFElements = PDFElements(oPDFParser, options.objstm, options.verbose, options.extract, oPDFStatistics.objectStreamErrors)
+    while True:
+        object = next(oPDFElements, None)
+        if object != None:
+            if options.stats:
+                oPDFStatistics.Add(object)
+            elif options.jsonoutput:
+                if object.type == PDF_ELEMENT_INDIRECT_OBJECT:
+                    if object.ContainsStream():
+                        filtered = object.Stream(options.filter == True, options.overridingfilters)
+                        if filtered == []:
+                            filtered = ''
+                        oMyJSONOutput.AddItem('obj %s %s' % (object.id, object.version), C2BIP3(filtered))
             else:
-                object = oPDFParserOBJSTM.GetObject()
-                if object == None:
-                    oPDFParserOBJSTM = None
-                    object = oPDFParser.GetObject()
-            if options.objstm and hasattr(object, 'GetType') and EqualCanonical(object.GetType(), '/ObjStm') and object.ContainsStream():
-                # parsing objects inside an /ObjStm object by extracting & parsing the stream content to create a synthesized PDF document, that is then parsed by cPDFParser
-                oPDFParseDictionary = cPDFParseDictionary(object.ContainsStream(), options.nocanonicalizedoutput)
-                numberOfObjects = int(oPDFParseDictionary.Get('/N')[0])
-                offsetFirstObject = int(oPDFParseDictionary.Get('/First')[0])
-                indexes = list(map(int, C2SIP3(object.Stream())[:offsetFirstObject].strip().replace('\n', ' ').split(' ')))
-                if len(indexes) % 2 != 0 or len(indexes) / 2 != numberOfObjects:
-                    raise Exception('Error in index of /ObjStm stream')
-                streamObject = C2SIP3(object.Stream()[offsetFirstObject:])
-                synthesizedPDF = ''
-                while len(indexes) > 0:
-                    objectNumber = indexes[0]
-                    offset = indexes[1]
-                    indexes = indexes[2:]
-                    if len(indexes) >= 2:
-                        offsetNextObject = indexes[1]
-                    else:
-                        offsetNextObject = len(streamObject)
-                    synthesizedPDF += '%d 0 obj\n%s\nendobj\n' % (objectNumber, streamObject[offset:offsetNextObject])
-                oPDFParserOBJSTM = cPDFParser(StringIO(synthesizedPDF), options.verbose, options.extract, (object.id, object.version))
-            if object != None:
-                if options.stats:
-                    if object.type == PDF_ELEMENT_COMMENT:
-                        cntComment += 1
-                    elif object.type == PDF_ELEMENT_XREF:
-                        cntXref += 1
-                    elif object.type == PDF_ELEMENT_TRAILER:
-                        cntTrailer += 1
-                        oPDFParseDictionary = cPDFParseDictionary(object.content[1:], options.nocanonicalizedoutput)
-                        for keyTrailer, valueTrailer in oPDFParseDictionary.parsed:
-                            if len(valueTrailer) == 3 and valueTrailer[2] == 'R' and IsNumeric(valueTrailer[0]) and IsNumeric(valueTrailer[1]):
-                                objectsReferenced.add(tuple(valueTrailer))
-                    elif object.type == PDF_ELEMENT_STARTXREF:
-                        cntStartXref += 1
-                    elif object.type == PDF_ELEMENT_INDIRECT_OBJECT:
-                        cntIndirectObject += 1
-                        type1 = object.GetType()
-                        if not type1 in dicObjectTypes:
-                            dicObjectTypes[type1] = [object.id]
+                if object.type == PDF_ELEMENT_COMMENT and selectComment:
+                    if options.generate:
+                        comment = object.comment[1:].rstrip()
+                        if re.match(r'PDF-\d\.\d', comment):
+                            print("    oPDF.header('%s')" % comment[4:])
+                        elif comment != '%EOF':
+                            print('    oPDF.comment(%s)' % repr(comment))
+                    elif options.yara == None and options.generateembedded == 0:
+                        print('PDF Comment %s' % FormatOutput(object.comment, options.raw))
+                        print('')
+                elif object.type == PDF_ELEMENT_XREF and selectXref:
+                    if not options.generate and options.yara == None and options.generateembedded == 0:
+                        if options.debug:
+                            print('xref %s' % FormatOutput(object.content, options.raw))
                         else:
-                            dicObjectTypes[type1].append(object.id)
-                        for keyword in dKeywords.keys():
-                            if object.ContainsName(keyword):
-                                dKeywords[keyword].append(object.id)
-                        if object.ContainsStream():
-                            objectsWithStream.append(object.id)
-                        for reference in object.GetReferences():
-                            objectsReferenced.add(reference)
-                        objectsAll.add((str(object.id), str(object.version), 'R'))
-                elif options.jsonoutput:
-                    if object.type == PDF_ELEMENT_INDIRECT_OBJECT:
-                        if object.ContainsStream():
-                            filtered = object.Stream(options.filter == True, options.overridingfilters)
-                            if filtered == []:
-                                filtered = ''
-                            oMyJSONOutput.AddItem('obj %s %s' % (object.id, object.version), C2BIP3(filtered))
-                else:
-                    if object.type == PDF_ELEMENT_COMMENT and selectComment:
-                        if options.generate:
-                            comment = object.comment[1:].rstrip()
-                            if re.match(r'PDF-\d\.\d', comment):
-                                print("    oPDF.header('%s')" % comment[4:])
-                            elif comment != '%EOF':
-                                print('    oPDF.comment(%s)' % repr(comment))
-                        elif options.yara == None and options.generateembedded == 0:
-                            print('PDF Comment %s' % FormatOutput(object.comment, options.raw))
-                            print('')
-                    elif object.type == PDF_ELEMENT_XREF and selectXref:
-                        if not options.generate and options.yara == None and options.generateembedded == 0:
-                            if options.debug:
-                                print('xref %s' % FormatOutput(object.content, options.raw))
+                            print('xref')
+                        print('')
+                elif object.type == PDF_ELEMENT_TRAILER and selectTrailer:
+                    oPDFParseDictionary = cPDFParseDictionary(object.content[1:], options.nocanonicalizedoutput)
+                    if options.generate:
+                        result = oPDFParseDictionary.Get('/Root')
+                        if result != None:
+                            savedRoot = result
+                    elif options.yara == None and options.generateembedded == 0:
+                        if not options.search and not options.key and not options.reference or options.search and object.Contains(options.search):
+                            if oPDFParseDictionary == None:
+                                print('trailer %s' % FormatOutput(object.content, options.raw))
                             else:
-                                print('xref')
+                                print('trailer')
+                                oPDFParseDictionary.PrettyPrint('  ')
                             print('')
-                    elif object.type == PDF_ELEMENT_TRAILER and selectTrailer:
-                        oPDFParseDictionary = cPDFParseDictionary(object.content[1:], options.nocanonicalizedoutput)
-                        if options.generate:
-                            result = oPDFParseDictionary.Get('/Root')
-                            if result != None:
-                                savedRoot = result
-                        elif options.yara == None and options.generateembedded == 0:
-                            if not options.search and not options.key and not options.reference or options.search and object.Contains(options.search):
-                                if oPDFParseDictionary == None:
-                                    print('trailer %s' % FormatOutput(object.content, options.raw))
-                                else:
-                                    print('trailer')
-                                    oPDFParseDictionary.PrettyPrint('  ')
-                                print('')
-                            elif options.key:
-                                if oPDFParseDictionary.parsed != None:
-                                    result = oPDFParseDictionary.GetNested(options.key)
-                                    if result != None:
-                                        print(result)
-                            elif options.reference:
-                                for key, value in oPDFParseDictionary.Retrieve():
-                                    if value == [str(options.reference), '0', 'R']:
-                                        print('trailer')
-                                        oPDFParseDictionary.PrettyPrint('  ')
-                    elif object.type == PDF_ELEMENT_STARTXREF and selectStartXref:
-                        if not options.generate and options.yara == None and options.generateembedded == 0:
-                            print('startxref %d' % object.index)
-                            print('')
-                    elif object.type == PDF_ELEMENT_INDIRECT_OBJECT and selectIndirectObject:
-                        if options.search:
-                            if object.Contains(options.search):
-                                PrintObject(object, options)
                         elif options.key:
-                            contentDictionary = object.ContainsStream()
-                            if not contentDictionary:
-                                contentDictionary = object.content[1:]
-                            oPDFParseDictionary = cPDFParseDictionary(contentDictionary, options.nocanonicalizedoutput)
                             if oPDFParseDictionary.parsed != None:
                                 result = oPDFParseDictionary.GetNested(options.key)
                                 if result != None:
                                     print(result)
-                        elif options.object:
-                            if MatchObjectID(object.id, options.object):
-                                PrintObject(object, options)
                         elif options.reference:
-                            if object.References(options.reference):
-                                PrintObject(object, options)
-                        elif options.type:
-                            if EqualCanonical(object.GetType(), optionsType):
-                                PrintObject(object, options)
-                        elif options.hash:
-                            print('obj %d %d' % (object.id, object.version))
-                            rawContent = FormatOutput(object.content, True)
-                            hashHexdigest, hashAlgo = CalculateChosenHash(rawContent.encode('latin'))
-                            print(' len: %d %s: %s' % (len(rawContent), hashAlgo, hashHexdigest))
-                            print('')
-                        elif options.searchstream:
-                            if object.StreamContains(options.searchstream, not options.unfiltered, options.casesensitive, options.regex, options.overridingfilters):
-                                PrintObject(object, options)
-                        elif options.yara != None:
-                            results = object.StreamYARAMatch(rules, decoders, options.decoderoptions, not options.unfiltered, options.overridingfilters)
-                            if results != None and results != []:
-                                for result in results:
-                                    for yaraResult in result[1]:
-                                        print('YARA rule%s: %s (%s)' % (IFF(result[0] == '', '', ' (stream decoder: %s)' % result[0]), yaraResult.rule, yaraResult.namespace))
-                                        if options.yarastrings:
-                                            for stringdata in yaraResult.strings:
-                                                print('%06x %s:' % (stringdata[0], stringdata[1]))
-                                                print(' %s' % binascii.hexlify(C2BIP3(stringdata[2])))
-                                                print(' %s' % repr(stringdata[2]))
-                                    PrintObject(object, options)
-                        elif options.generateembedded != 0:
-                            if object.id == options.generateembedded:
-                                PrintGenerateObject(object, options, 8)
-                        else:
+                            for key, value in oPDFParseDictionary.Retrieve():
+                                if value == [str(options.reference), '0', 'R']:
+                                    print('trailer')
+                                    oPDFParseDictionary.PrettyPrint('  ')
+                elif object.type == PDF_ELEMENT_STARTXREF and selectStartXref:
+                    if not options.generate and options.yara == None and options.generateembedded == 0:
+                        print('startxref %d' % object.index)
+                        print('')
+                elif object.type == PDF_ELEMENT_INDIRECT_OBJECT and selectIndirectObject:
+                    if options.search:
+                        if object.Contains(options.search):
+                            PrintObject(object, options)
+                    elif options.key:
+                        contentDictionary = object.ContainsStream()
+                        if not contentDictionary:
+                            contentDictionary = object.content[1:]
+                        oPDFParseDictionary = cPDFParseDictionary(contentDictionary, options.nocanonicalizedoutput)
+                        if oPDFParseDictionary.parsed != None:
+                            result = oPDFParseDictionary.GetNested(options.key)
+                            if result != None:
+                                print(result)
+                    elif options.object:
+                        if MatchObjectID(object.id, options.object):
+                            PrintObject(object, options)
+                    elif options.reference:
+                        if object.References(options.reference):
                             PrintObject(object, options)
-                    elif object.type == PDF_ELEMENT_MALFORMED:
+                    elif options.type:
+                        if EqualCanonical(object.GetType(), optionsType):
+                            PrintObject(object, options)
+                    elif options.hash:
+                        print('obj %d %d' % (object.id, object.version))
+                        rawContent = FormatOutput(object.content, True)
+                        hashHexdigest, hashAlgo = CalculateChosenHash(rawContent.encode('latin'))
+                        print(' len: %d %s: %s' % (len(rawContent), hashAlgo, hashHexdigest))
+                        print('')
+                    elif options.searchstream:
+                        if object.StreamContains(options.searchstream, not options.unfiltered, options.casesensitive, options.regex, options.overridingfilters):
+                            PrintObject(object, options)
+                    elif options.yara != None:
+                        # streams are decoded here, and matched in the threads of oYARAMatcher
+                        data = object.StreamYARAData(decoders, options.decoderoptions, not options.unfiltered, options.overridingfilters)
+                        if data != None:
+                            for objectMatched, results in oYARAMatcher.Submit(object, data):
+                                PrintYARAResults(objectMatched, results, options)
+                    elif options.generateembedded != 0:
+                        if object.id == options.generateembedded:
+                            PrintGenerateObject(object, options, 8)
+                    else:
+                        PrintObject(object, options)
+                elif object.type == PDF_ELEMENT_MALFORMED:
+                    try:
+                        fExtract = open(options.extract, 'wb')
                         try:
-                            fExtract = open(options.extract, 'wb')
-                            try:
-                                fExtract.write(C2BIP3(object.content))
-                            except:
-                                print('Error writing file %s' % options.extract)
-                            fExtract.close()
+                            fExtract.write(C2BIP3(object.content))
                         except:
                             print('Error writing file %s' % options.extract)
-            else:
-                break
+                        fExtract.close()
+                    except:
+                        print('Error writing file %s' % options.extract)
+        else:
+            break
 
-        if options.stats:
-            print('Comment: %s' % cntComment)
-            print('XREF: %s' % cntXref)
-            print('Trailer: %s' % cntTrailer)
-            print('StartXref: %s' % cntStartXref)
-            print('Indirect object: %s' % cntIndirectObject)
-            print('Indirect objects with a stream: %s' % ', '.join([str(id) for id in objectsWithStream]))
-            objectsUnreferenced = objectsAll - objectsReferenced
-            for key in sorted(dicObjectTypes.keys()):
-                print(' %s %d: %s' % (key, len(dicObjectTypes[key]), ', '.join(map(lambda x: '%d' % x, dicObjectTypes[key]))))
-            if len(objectsUnreferenced) > 0:
-                print('Unreferenced indirect objects: %s' % ', '.join([' '.join(reference) for reference in sorted(objectsUnreferenced, key=lambda a: int(a[0]))]))
-                if '/ObjStm' in dicObjectTypes:
-                    objectsUnreferencedMinusObjStm = set()
-                    for unreferencedObject in objectsUnreferenced:
-                        if not int(unreferencedObject[0]) in dicObjectTypes['/ObjStm']:
-                            objectsUnreferencedMinusObjStm.add(unreferencedObject)
-                    print('Unreferenced indirect objects without /ObjStm objects: %s' % ', '.join([' '.join(reference) for reference in sorted(objectsUnreferencedMinusObjStm, key=lambda a: int(a[0]))]))
-            if sum(map(len, dKeywords.values())) > 0:
-                print('Search keywords:')
-                for keyword in keywords:
-                    if len(dKeywords[keyword]) > 0:
-                        print(' %s %d: %s' % (keyword, len(dKeywords[keyword]), ', '.join(map(lambda x: '%d' % x, dKeywords[keyword]))))
-
-        if options.jsonoutput:
-            print(oMyJSONOutput.GetJSON())
-
-        if options.generate or options.generateembedded != 0:
-            print("    oPDF.xrefAndTrailer('%s')" % ' '.join(savedRoot))
-            print('')
-            print("if __name__ == '__main__':")
-            print('    Main()')
+    if options.yara != None:
+        for objectMatched, results in oYARAMatcher.Close():
+            PrintYARAResults(objectMatched, results, options)
+
+    if options.stats and options.jsonoutput:
+        print(oPDFStatistics.GetJSON())
+    elif options.stats:
+        for line in oPDFStatistics.Lines():
+            print(line)
+    elif options.jsonoutput:
+        print(oMyJSONOutput.GetJSON())
+
+    if options.generate or options.generateembedded != 0:
+        print("    oPDF.xrefAndTrailer('%s')" % ' '.join(savedRoot))
+        print('')
+        print("if __name__ == '__main__':")
+        print('    Main()')
 
 def TestPythonVersion(enforceMaximumVersion=False, enforceMinimumVersion=False):
     if sys.version_info[0:3] > __maximum_python_version__:
@@ -1798,13 +3140,13 @@ def TestPythonVersion(enforceMaximumVersion=False, enforceMinimumVersion=False):
             print('')
     if sys.version_info[0:3] < __minimum_python_version__:
         if enforceMinimumVersion:
+            print('Error: this version of pdf-parser requires Python %d.%d.%d or later, this is Python %d.%d.%d' % (tuple(__minimum_python_version__) + tuple(sys.version_info[0:3])))
             print('')
-            print('')
-            sys.exit()
+            sys.exit(1)
         else:
             print('')
             print('')
 
 if __name__ == '__main__':
-    TestPythonVersion()
+    TestPythonVersion(enforceMinimumVersion=True)
     Main()
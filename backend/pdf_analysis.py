@@ -1,15 +1,41 @@
-import subprocess
+import importlib.util
+import logging
+import os
 
-def analyze_pdf_structure(path):
+PDF_PARSER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pdf-parser.py")
+
+# Names reported on top of pdf-parser's own statistics keywords
+EXTRA_KEYWORDS = ["/SubmitForm"]
+
+
+def load_pdf_parser():
+    """Import pdf-parser.py in-process (its filename is not a valid module name)."""
+    spec = importlib.util.spec_from_file_location("pdf_parser", PDF_PARSER_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+pdf_parser = load_pdf_parser()
+
+
+def analyze_pdf_structure(path, data=None):
+    """Parse the PDF in-process and return its structure statistics.
+
+    Returns pdf-parser's statistics report (the JSON of options -a -j: element
+    counts, object ids per /Type and per suspicious keyword, unreferenced
+    objects, /ObjStm membership and the /ObjStm objects that could not be
+    parsed) with the text report shown in the UI under "report", or None when
+    the PDF could not be parsed. When data (the content of the file) is given,
+    it is parsed instead of reading path.
+    """
     try:
-        result = subprocess.run(
-            ["./pdf-parser.py", path],
-            capture_output=True,
-            text=True
-        )
-        output = result.stdout.strip()
-        print(f"PDF Parser Output: {output}")  # Debug print
-        return output if output else "No structure analysis available"
-    except Exception as e:
-        print(f"Error analyzing PDF structure: {e}")
-        return "Error analyzing PDF structure"
\ No newline at end of file
+        keywords = pdf_parser.DefaultKeywords()
+        keywords += [keyword for keyword in EXTRA_KEYWORDS if keyword not in keywords]
+        statistics = pdf_parser.PDFStatistics(memoryview(data) if data is not None else path, objstm=True, keywords=keywords)
+        structure = statistics.Dictionary()
+        structure["report"] = "\n".join(statistics.Lines())
+        return structure
+    except (Exception, SystemExit) as e:
+        # pdf-parser exits when it can not open its input
+        logging.error(f"Error analyzing PDF structure of {path}: {e!r}")
+        return None
@@ -1,13 +1,15 @@
+import io
 import re
 from PyPDF2 import PdfReader
 
-def scan_pdf_for_obfuscation(file_path):
+def scan_pdf_for_obfuscation(file_path, data=None):
+    # data is the content of the file when the caller already read it
     suspicious_hex_count = 0
     suspicious_font_count = 0
     total_objects_scanned = 0
 
     try:
-        reader = PdfReader(file_path)
+        reader = PdfReader(io.BytesIO(data) if data is not None else file_path)
         for i, page in enumerate(reader.pages):
             page_text = page.extract_text() or ""
             total_objects_scanned += 1
@@ -0,0 +1,110 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+
+def detector_fingerprint(paths, extra=()):
+    """Hash of the detector sources (and extra strings, like library versions).
+
+    Cached results are only reused by the same detectors: any change to these
+    files gives a new fingerprint, and the old results are never returned.
+    """
+    fingerprint = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            fingerprint.update(hashlib.sha256(f.read()).digest())
+    for value in extra:
+        fingerprint.update(str(value).encode())
+    return fingerprint.hexdigest()[:16]
+
+
+class ResultCache:
+    """Scan results keyed by file SHA-256 and detector fingerprint, in SQLite.
+
+    The database file is shared by all processes (gunicorn workers) and uses
+    WAL so readers do not block each other. Entries expire after ttl seconds,
+    and the least recently used entries are evicted when there are more than
+    max_entries or they take more than max_bytes. Cache errors are logged and
+    treated as misses: a broken cache never fails a scan.
+    """
+
+    def __init__(self, path, fingerprint, ttl=7 * 24 * 3600, max_entries=10000, max_bytes=256 * 1024 * 1024):
+        self.path = path
+        self.fingerprint = fingerprint
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _connection(self):
+        # sqlite3 connections can not be shared between threads, nor with a forked scan process
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, result TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def _key(self, sha256):
+        return f"{sha256}:{self.fingerprint}"
+
+    def get(self, sha256):
+        """The cached result for this file content, or None."""
+        try:
+            connection = self._connection()
+            now = time.time()
+            row = connection.execute(
+                "SELECT result FROM results WHERE key = ? AND created >= ?",
+                (self._key(sha256), now - self.ttl),
+            ).fetchone()
+            if row is None:
+                return None
+            connection.execute("UPDATE results SET accessed = ? WHERE key = ?", (now, self._key(sha256)))
+            return json.loads(row[0])
+        except (sqlite3.Error, ValueError) as e:
+            logging.error(f"Error reading the result cache: {e}")
+            return None
+
+    def put(self, sha256, result):
+        try:
+            data = json.dumps(result)
+            now = time.time()
+            connection = self._connection()
+            with connection:
+                connection.execute("BEGIN IMMEDIATE")
+                connection.execute(
+                    "INSERT OR REPLACE INTO results (key, result, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                    (self._key(sha256), data, len(data), now, now),
+                )
+                self._evict(connection, now)
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logging.error(f"Error writing the result cache: {e}")
+
+    def _evict(self, connection, now):
+        connection.execute("DELETE FROM results WHERE created < ?", (now - self.ttl,))
+        count, size = connection.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        if count <= self.max_entries and size <= self.max_bytes:
+            return
+        evict = []
+        for key, entry_size in connection.execute("SELECT key, size FROM results ORDER BY accessed"):
+            if count <= self.max_entries and size <= self.max_bytes:
+                break
+            evict.append((key,))
+            count -= 1
+            size -= entry_size
+        connection.executemany("DELETE FROM results WHERE key = ?", evict)
@@ -0,0 +1,166 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+JOB_FIELDS = ["id", "filename", "status", "stage", "progress", "result", "error", "created", "updated"]
+
+
+def process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class JobStore:
+    """Scan jobs in SQLite, so any gunicorn worker can report on any job.
+
+    Each job records its owner, the pid of the process that created it and
+    runs its pool. A queued or running job whose owner has exited (a
+    restarted or killed gunicorn worker) will never finish: get marks it as
+    failed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _connection(self):
+        # sqlite3 connections can not be shared between threads, nor with a forked scan process
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, filename TEXT, status TEXT NOT NULL, stage TEXT, progress REAL NOT NULL, "
+                "result TEXT, error TEXT, created REAL NOT NULL, updated REAL NOT NULL, owner INTEGER)"
+            )
+            try:
+                # Stores created before jobs had an owner
+                connection.execute("ALTER TABLE jobs ADD COLUMN owner INTEGER")
+            except sqlite3.OperationalError:
+                pass
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def create(self, job_id, filename):
+        now = time.time()
+        self._connection().execute(
+            "INSERT INTO jobs (id, filename, status, progress, created, updated, owner) VALUES (?, ?, 'queued', 0, ?, ?, ?)",
+            (job_id, filename, now, now, os.getpid()),
+        )
+
+    def update(self, job_id, **fields):
+        if "result" in fields:
+            fields["result"] = json.dumps(fields["result"])
+        fields["updated"] = time.time()
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        self._connection().execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def get(self, job_id):
+        """The job as a dict (result decoded), or None for an unknown job."""
+        row = self._connection().execute(f"SELECT {', '.join(JOB_FIELDS)}, owner FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(zip(JOB_FIELDS, row))
+        owner = row[-1]
+        if job["status"] in ("queued", "running") and owner is not None and not process_alive(owner):
+            logging.error(f"Job {job_id} is orphaned: its worker process {owner} exited")
+            job.update(status="error", error="The worker process of the job exited")
+            self.update(job_id, status="error", error=job["error"])
+        if job["result"] is not None:
+            job["result"] = json.loads(job["result"])
+        return job
+
+    def purge(self, before):
+        self._connection().execute("DELETE FROM jobs WHERE updated < ?", (before,))
+
+
+def run_job(store_path, job_id, function, arguments):
+    """Runs in a scan process: calls function(*arguments, progress=...) and stores its result."""
+    store = JobStore(store_path)
+    store.update(job_id, status="running")
+
+    def progress(stage, done, total):
+        store.update(job_id, stage=stage, progress=done / total)
+
+    try:
+        result = function(*arguments, progress=progress)
+        store.update(job_id, status="done", stage=None, progress=1.0, result=result)
+    except Exception as e:
+        logging.error(f"Error in job {job_id}: {e}")
+        store.update(job_id, status="error", error=str(e))
+
+
+class SharedProcessPool:
+    """A ProcessPoolExecutor shared by all requests of a process (a gunicorn worker).
+
+    It is created on first use, so it is forked once per worker rather than
+    per request. A pool that broke (one of its processes died) is shut down
+    and a new one is created on the next use.
+    """
+
+    def __init__(self, workers):
+        self.workers = workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(self.workers)
+            return self._executor
+
+    def discard(self, executor):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+class JobQueue:
+    """Local job queue: jobs are run by a pool of scan processes, their state is kept in a JobStore.
+
+    The pool is created on the first submit, in the gunicorn worker that
+    receives it. Finished jobs are purged after ttl seconds.
+    """
+
+    def __init__(self, store_path, workers=2, ttl=24 * 3600):
+        self.store = JobStore(store_path)
+        self.ttl = ttl
+        self.pool = SharedProcessPool(workers)
+
+    def submit(self, filename, function, *arguments):
+        """Queue function(*arguments, progress=...) and return the job id."""
+        job_id = uuid.uuid4().hex
+        self.store.create(job_id, filename)
+        self.store.purge(time.time() - self.ttl)
+        executor = self.pool.get()
+        future = executor.submit(run_job, self.store.path, job_id, function, arguments)
+        future.add_done_callback(lambda future: self._done(job_id, future, executor))
+        return job_id
+
+    def _done(self, job_id, future, executor):
+        if future.cancelled():
+            self.store.update(job_id, status="error", error="Scan cancelled")
+            return
+        # run_job stores its own errors: an exception here means the scan process died
+        exception = future.exception()
+        if exception is not None:
+            logging.error(f"Scan process of job {job_id} failed: {exception}")
+            self.store.update(job_id, status="error", error=f"Scan process failed: {exception}")
+            # The broken pool is shut down, a new one is created on the next submit
+            self.pool.discard(executor)
@@ -30,7 +30,6 @@ function formatPDFDate(pdfDate) {
 
 // Define the desired order of keys
 const keyOrder = [
-    "suspicious_blocks",
     "suspicious_objects",
     "suspicious_streams",
     "suspicious_fonts",
@@ -39,6 +38,8 @@ const keyOrder = [
     "total_blocks",
     "file_size_bytes",
     "file_size_kb",
+    "sha256",
+    "md5",
     "page_count",
     "encrypted",
     "created",
@@ -192,13 +193,9 @@ function displayResults(result) {
         }
 
         // Highlight suspicious objects in the structure analysis
+        const structureKeywords = result.structure_keywords || {};
         if (
-            result.structure_analysis.includes('/JavaScript') ||
-            result.structure_analysis.includes('/Launch') ||
-            result.structure_analysis.includes('/OpenAction') ||
-            result.structure_analysis.includes('/AA') ||
-            result.structure_analysis.includes('/URI') ||
-            result.structure_analysis.includes('/SubmitForm')
+            ['/JavaScript', '/Launch', '/OpenAction', '/AA', '/URI', '/SubmitForm'].some(keyword => keyword in structureKeywords)
         ) {
             analysisHeader.style.color = 'red';
             analysisHeader.textContent += " (Suspicious Content Detected)";
@@ -221,7 +218,7 @@ function displayResults(result) {
         listItem.appendChild(threatWarning);
     }
     // Change background color based on a condition
-    if (result.encrypted || result.suspicious_blocks > 10 || !result.is_suspicious) {
+    if (result.encrypted || !result.is_suspicious) {
         // Create a status icon (circle)
         const statusIcon = document.createElement('span');
         statusIcon.classList.add('status-icon');
@@ -234,10 +231,6 @@ function displayResults(result) {
             statusIcon.classList.add('status-encrypted');
             statusIcon.title = 'Encrypted File'; // Tooltip
             statusText.textContent = 'Encrypted File'; // Inline text
-        } else if (result.suspicious_blocks > 10) {
-            statusIcon.classList.add('status-suspicious');
-            statusIcon.title = 'Suspicious File'; // Tooltip
-            statusText.textContent = 'Suspicious File'; // Inline text
         } else {
             statusIcon.classList.add('status-safe');
             statusIcon.title = 'Safe File'; // Tooltip
@@ -322,27 +315,70 @@ dropzone.addEventListener('dragleave', () => {
     dropzone.style.backgroundColor = 'white'; // Reset background
 });
 
+// Submit a file as a scan job and follow its progress with server-sent events
+async function uploadFile(file) {
+    const formData = new FormData();
+    formData.append('file', file);
+
+    let job;
+    try {
+        const response = await fetch('http://localhost:5000/jobs', { method: 'POST', body: formData });
+        if (!response.ok) {
+            const errorText = await response.text();
+            alert(`Error uploading file: ${file.name} - ${errorText}`);
+            return;
+        }
+        job = await response.json();
+    } catch (error) {
+        alert(`Error uploading file: ${file.name} - ${error.message}`);
+        return;
+    }
+
+    // Progress line, replaced by the results when the scan is done
+    const progressItem = document.createElement('li');
+    progressItem.textContent = `${file.name}: queued`;
+    resultsList.appendChild(progressItem);
+
+    // Don't wait for the scan: the next file is uploaded while this one is scanned
+    followJob(job, file, progressItem);
+}
+
+function followJob(job, file, progressItem) {
+    const events = new EventSource(`http://localhost:5000${job.events_url}`);
+    events.onmessage = (event) => {
+        const update = JSON.parse(event.data);
+        if (update.status === 'done') {
+            events.close();
+            progressItem.remove();
+            displayResults(update.result); // Use the helper function to display results
+        } else if (update.status === 'error') {
+            events.close();
+            progressItem.remove();
+            alert(`Error scanning file: ${file.name} - ${update.error}`);
+        } else {
+            const stage = update.stage ? ` (${update.stage.replace('_stage', '')})` : '';
+            progressItem.textContent = `${file.name}: ${update.status}${stage} ${Math.round(update.progress * 100)}%`;
+        }
+    };
+    // The server ends a stream after a while: follow the job with a new one
+    events.addEventListener('timeout', () => {
+        events.close();
+        followJob(job, file, progressItem);
+    });
+    events.onerror = () => {
+        events.close();
+        progressItem.remove();
+        alert(`Error following scan of file: ${file.name}`);
+    };
+}
+
 dropzone.addEventListener('drop', async (e) => {
     e.preventDefault();
     dropzone.style.borderColor = '#ccc';
     const files = e.dataTransfer.files;
 
     for (const file of files) {
-        const formData = new FormData();
-        formData.append('file', file);
-
-        try {
-            const response = await fetch('http://localhost:5000/upload', { method: 'POST', body: formData });
-            if (!response.ok) {
-                const errorText = await response.text();
-                alert(`Error uploading file: ${file.name} - ${errorText}`);
-                continue;
-            }
-            const result = await response.json();
-            displayResults(result); // Use the helper function to display results
-        } catch (error) {
-            alert(`Error uploading file: ${file.name} - ${error.message}`);
-        }
+        await uploadFile(file);
     }
 });
 
@@ -358,21 +394,7 @@ dropzone.addEventListener('click', () => {
         const files = e.target.files;
 
         for (const file of files) {
-            const formData = new FormData();
-            formData.append('file', file);
-
-            try {
-                const response = await fetch('http://localhost:5000/upload', { method: 'POST', body: formData });
-                if (!response.ok) {
-                    const errorText = await response.text();
-                    alert(`Error uploading file: ${file.name} - ${errorText}`);
-                    continue;
-                }
-                const result = await response.json();
-                displayResults(result); // Use the helper function to display results
-            } catch (error) {
-                alert(`Error uploading file: ${file.name} - ${error.message}`);
-            }
+            await uploadFile(file);
         }
     });
 
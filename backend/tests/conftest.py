@@ -0,0 +1,41 @@
+import importlib.util
+import os
+import sys
+
+import pytest
+
+BACKEND_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PDF_PARSER_PATH = os.path.join(BACKEND_DIRECTORY, "pdf-parser.py")
+# pdf-parser.py as it was before the performance changes, the reference for the differential tests
+ORIGINAL_PDF_PARSER_PATH = os.path.join(BACKEND_DIRECTORY, "tests", "reference", "pdf-parser.py")
+
+sys.path.insert(0, BACKEND_DIRECTORY)
+
+
+def load_module(name, path):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope="session")
+def pdf_parser():
+    return load_module("pdf_parser", PDF_PARSER_PATH)
+
+
+@pytest.fixture(scope="session")
+def original_pdf_parser():
+    return load_module("original_pdf_parser", ORIGINAL_PDF_PARSER_PATH)
+
+
+@pytest.fixture(scope="session")
+def app_module(tmp_path_factory):
+    """app.py, imported and used in a scratch directory (its upload and cache folders are relative)."""
+    directory = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp("app"))
+    try:
+        import app
+        yield app
+    finally:
+        os.chdir(directory)
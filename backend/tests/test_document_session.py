@@ -0,0 +1,43 @@
+"""Pages of large documents are extracted in parallel, except in a worker process."""
+import fitz
+
+import document_session
+
+
+def pdf_with_pages(path, count):
+    with fitz.open() as document:
+        for number in range(count):
+            document.new_page().insert_text((72, 72), f"page {number} <tag>")
+        document.save(path)
+    return str(path)
+
+
+def test_parallel_page_blocks(tmp_path, monkeypatch):
+    path = pdf_with_pages(tmp_path / "pages.pdf", 7)
+    with document_session.DocumentSession(path) as session:
+        sequential = session.page_blocks
+    monkeypatch.setattr(document_session, "PARALLEL_PAGE_THRESHOLD", 5)
+    monkeypatch.setattr(document_session, "PAGE_WORKERS", 2)
+    monkeypatch.setattr(document_session, "page_pool", document_session.SharedProcessPool(2))
+    with document_session.DocumentSession(path) as session:
+        assert session.page_blocks == sequential
+        assert session.page_blocks[6][0][4] == "page 6 <tag>\n"
+    executor = document_session.page_pool.get()
+    # the next document reuses the pool
+    with document_session.DocumentSession(path) as session:
+        assert session.page_blocks == sequential
+    assert document_session.page_pool.get() is executor
+    executor.shutdown()
+
+
+def test_no_page_pool_in_a_worker_process(tmp_path, monkeypatch):
+    path = pdf_with_pages(tmp_path / "pages.pdf", 7)
+    monkeypatch.setattr(document_session, "PARALLEL_PAGE_THRESHOLD", 5)
+    monkeypatch.setattr(document_session, "PAGE_WORKERS", 2)
+    monkeypatch.setattr(document_session.multiprocessing, "parent_process", lambda: object())
+
+    pools = []
+    monkeypatch.setattr(document_session.DocumentSession, "_parallel_page_blocks", lambda self, page_count: pools.append(page_count))
+    with document_session.DocumentSession(path) as session:
+        assert len(session.page_blocks) == 7
+    assert pools == []
@@ -0,0 +1,27 @@
+"""Files are read once for the parsers, and hashed in chunks when only the digests are needed."""
+import os
+import tracemalloc
+
+import file_reader
+
+
+def test_hash_file_matches_read_file(tmp_path, monkeypatch):
+    path = tmp_path / "content.pdf"
+    path.write_bytes(os.urandom(10000))
+    monkeypatch.setattr(file_reader, "HASH_CHUNK_SIZE", 7)
+    data, digests = file_reader.read_file(path)
+    assert data == path.read_bytes()
+    assert file_reader.hash_file(path) == digests
+    assert file_reader.hash_file(path, ("sha256",)) == {"sha256": digests["sha256"]}
+
+
+def test_hash_file_does_not_load_the_file(tmp_path):
+    path = tmp_path / "large.pdf"
+    path.write_bytes(b"\0" * 16 * 1024 * 1024)
+    tracemalloc.start()
+    try:
+        file_reader.hash_file(path)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert peak < 1024 * 1024
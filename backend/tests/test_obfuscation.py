@@ -0,0 +1,20 @@
+"""The obfuscation detector matches its patterns on the page text of PyPDF2."""
+import fitz
+
+from document_session import DocumentSession
+from pdf_obfuscation import scan_pdf_for_obfuscation
+
+
+def test_obfuscation_stage_reads_the_pypdf2_text(app_module, tmp_path):
+    path = str(tmp_path / "hex.pdf")
+    with fitz.open() as document:
+        for number in range(3):
+            page = document.new_page()
+            page.insert_text((72, 72), "<00FE12AB34> <DEADBEEF00> /Font")
+            page.insert_text((72, 100), "<0011223344556677> text")
+        document.save(path)
+    expected = scan_pdf_for_obfuscation(path)
+    assert expected["suspicious_hex_count"] == 9
+    assert expected["is_obfuscated"]
+    with DocumentSession(path) as session:
+        assert app_module.obfuscation_stage(session) == expected
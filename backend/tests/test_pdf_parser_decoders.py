@@ -0,0 +1,229 @@
+"""Regression vectors for the LZWDecode, ASCII85Decode and FlateDecode filters, and their microbenchmark."""
+import base64
+import os
+import random
+import time
+import tracemalloc
+import zlib
+
+import pytest
+
+
+def lzw_pack(codes, earlychange=1):
+    """The LZW codes as bits, with the code width of the decoder, whose table is one entry behind the encoder's."""
+    output = bytearray()
+    accumulator = bits = decoded = 0
+    width, next = 9, 258
+    for code in codes:
+        accumulator = (accumulator << width) | code
+        bits += width
+        while bits >= 8:
+            bits -= 8
+            output.append((accumulator >> bits) & 0xFF)
+        accumulator &= (1 << bits) - 1
+        if code == 256:
+            width, decoded, next = 9, 0, 258
+            continue
+        if decoded > 0 and next < 4096:
+            next += 1
+            total = next + earlychange
+            width = 9 if total < 512 else 10 if total < 1024 else 11 if total < 2048 else 12
+        decoded += 1
+    if bits:
+        output.append((accumulator << (8 - bits)) & 0xFF)
+    return bytes(output)
+
+
+def lzw_encode(data, earlychange=1):
+    """LZW encoding as in the PDF reference: a clear-table code first, an EOD code last."""
+    codes = [256]
+    table = dict((bytes([c]), c) for c in range(256))
+    next = 258
+    current = b""
+    for c in data:
+        extended = current + bytes([c])
+        if extended in table:
+            current = extended
+            continue
+        codes.append(table[current])
+        table[extended] = next
+        next += 1
+        current = bytes([c])
+        if next == 4000:
+            codes.append(256)
+            table = dict((bytes([c]), c) for c in range(256))
+            next = 258
+    if current:
+        codes.append(table[current])
+    codes.append(257)
+    return lzw_pack(codes, earlychange)
+
+
+def lzw_bomb(cycles):
+    """Zeros, every code one byte longer than the previous one: each cycle of 5.6 KB decodes to 7.4 MB."""
+    codes = []
+    for _ in range(cycles):
+        codes += [256, 0] + list(range(258, 4096))
+    return lzw_pack(codes + [257])
+
+
+def decode_stages(oFilter, data, size):
+    output = []
+    for position in range(0, len(data), size):
+        output.extend(oFilter.Decode(data[position:position + size]))
+    output.extend(oFilter.Flush())
+    return b"".join(output)
+
+
+def test_lzw_reference_example(pdf_parser):
+    # the example of the PDF reference (7.4.4.2)
+    assert pdf_parser.LZWDecode(bytes.fromhex("800B6050220C0C8501")) == b"-----A---B"
+    assert lzw_encode(b"-----A---B") == bytes.fromhex("800B6050220C0C8501")
+
+
+@pytest.mark.parametrize("earlychange", [1, 0])
+def test_lzw_round_trip(pdf_parser, earlychange):
+    random_generator = random.Random(earlychange)
+    samples = [b"", b"a", b"ab" * 3000, bytes(range(256)) * 20, random_generator.randbytes(6000)]
+    samples += [random_generator.choice([b"one ", b"two ", b"three "]) * random_generator.randint(0, 3000) for _ in range(20)]
+    for data in samples:
+        encoded = lzw_encode(data, earlychange)
+        assert pdf_parser.LZWDecode(encoded, earlychange) == data
+        assert decode_stages(pdf_parser.cFilterLZWDecode({"/EarlyChange": earlychange}), encoded, 7) == data
+
+
+def test_lzw_matches_original(pdf_parser, original_pdf_parser):
+    random_generator = random.Random("lzw")
+    for _ in range(300):
+        data = random_generator.choice([random_generator.randbytes, lambda size: b"abc" * size])(random_generator.randint(0, 3000))
+        encoded = bytearray(lzw_encode(data))
+        if random_generator.random() < 0.5:
+            encoded[random_generator.randrange(len(encoded)):] = b""
+        try:
+            expected = original_pdf_parser.LZWDecode(bytes(encoded).decode("latin")).encode("latin")
+        except Exception:
+            expected = "error"
+        try:
+            decoded = pdf_parser.LZWDecode(bytes(encoded))
+        except Exception:
+            decoded = "error"
+        assert decoded == expected
+
+
+def test_lzw_errors(pdf_parser):
+    # no clear-table code first, and a code that is not in the table yet
+    with pytest.raises(Exception):
+        pdf_parser.LZWDecode(bytes.fromhex("0B6050"))
+    with pytest.raises(Exception):
+        pdf_parser.LZWDecode(bytes.fromhex("804B00"))
+
+
+def test_lzw_predictor(pdf_parser):
+    # PNG Up predictor, 3 columns: every row is the difference with the previous row
+    rows = [b"\x02\x01\x02\x03", b"\x02\x01\x01\x01", b"\x02\x01\x01\x01"]
+    parameters = {"/Predictor": 12, "/Columns": 3}
+    decoded = decode_stages(pdf_parser.cFilterLZWDecode(parameters), lzw_encode(b"".join(rows)), 5)
+    assert decoded == b"\x01\x02\x03\x02\x03\x04\x03\x04\x05"
+
+
+def test_lzw_predictor_chunks(pdf_parser):
+    # rows split over the chunks, every PNG row type, and an incomplete last row
+    random_generator = random.Random("predictor")
+    data = bytearray()
+    for _ in range(200):
+        data.append(random_generator.randint(0, 4))
+        data += random_generator.randbytes(9)
+    data += b"\x01\x05"
+    parameters = {"/Predictor": 15, "/Colors": 3, "/Columns": 3}
+    expected = pdf_parser.PredictorDecode(bytes(data), 15, 3, 8, 3)
+    assert len(expected) == 201 * 9
+    for size in [1, 7, 10, 1000]:
+        assert decode_stages(pdf_parser.cFilterLZWDecode(parameters), lzw_encode(bytes(data)), size) == expected
+
+
+def test_lzw_predictor_bomb(pdf_parser):
+    # 20 cycles of the bomb decode to 150 MB: with the prediction undone row by row, the limit is hit after a few MB
+    bomb = lzw_bomb(20)
+    oPipeline = pdf_parser.cFilterPipeline(["/LZWDecode"], pdf_parser.cDecompressionLimits(maximumStream=1000000), {"/Predictor": 12, "/Columns": 99})
+    tracemalloc.start()
+    try:
+        with pytest.raises(pdf_parser.cDecompressionLimitError):
+            for chunk in oPipeline.Decode(bomb):
+                pass
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert len(bomb) < 150000
+    assert peak < 50 * 1024 * 1024
+
+
+def test_ascii85_vectors(pdf_parser):
+    assert pdf_parser.ASCII85Decode(b'87cURD]i,"Ebo80~>') == b"Hello World!"
+    assert pdf_parser.ASCII85Decode(b"87cUR\nD]i,\"Eb o80~>") == b"Hello World!"
+    assert pdf_parser.ASCII85Decode(b"z~>") == b"\0\0\0\0"
+    assert pdf_parser.ASCII85Decode(b"zz!!~>") == b"\0" * 9
+    assert pdf_parser.ASCII85Decode(b"87cURD~>ignored") == b"Hell"
+    assert pdf_parser.ASCII85Decode(b"~>") == b""
+    with pytest.raises(Exception):
+        pdf_parser.ASCII85Decode(b"87czURD~>")
+    data = os.urandom(5000)
+    encoded = base64.a85encode(data) + b"~>"
+    assert decode_stages(pdf_parser.cFilterASCII85Decode(), encoded, 3) == data
+
+
+def test_flate_vectors(pdf_parser):
+    data = b"flate content " * 10000
+    compressed = zlib.compress(data)
+    assert pdf_parser.FlateDecode(compressed) == data
+    # an error in the last 2 bytes of a stream is ignored
+    assert pdf_parser.FlateDecode(compressed[:-2] + b"\xff\xff") == data
+    # truncated data returns what could be inflated
+    truncated = compressed[:len(compressed) // 2]
+    recovered, truncation = pdf_parser.FlateDecodeRecover(truncated)
+    assert len(recovered) > 0 and data.startswith(recovered) and truncation == len(truncated)
+    assert pdf_parser.FlateDecode(truncated) == recovered
+    assert pdf_parser.FlateDecodeRecover(compressed) == (data, None)
+    # invalid data (a block of type 3) fails, like short garbage
+    damaged = zlib.compress(b"x" * 100)[:2] + b"\xff" * 30
+    with pytest.raises(zlib.error):
+        pdf_parser.FlateDecode(damaged)
+    with pytest.raises(zlib.error):
+        pdf_parser.FlateDecode(b"garbage")
+
+
+def test_flate_data_after_the_end(pdf_parser):
+    # bytes following the compressed data are ignored, also when the output exceeds one chunk
+    data = b"A" * 500000
+    compressed = zlib.compress(data) + b"TRAILING" * 10
+    oPipeline = pdf_parser.cFilterPipeline(["/FlateDecode"], pdf_parser.cDecompressionLimits())
+    assert b"".join(oPipeline.Decode(compressed)) == data
+    assert pdf_parser.FlateDecodeRecover(compressed)[0] == data
+
+
+def test_flate_limits(pdf_parser):
+    compressed = zlib.compress(b"\0" * 10000000)
+    oPipeline = pdf_parser.cFilterPipeline(["/FlateDecode"], pdf_parser.cDecompressionLimits(maximumStream=1000000))
+    with pytest.raises(pdf_parser.cDecompressionLimitError):
+        b"".join(oPipeline.Decode(compressed))
+
+
+def timed(function, *arguments):
+    start = time.perf_counter()
+    function(*arguments)
+    return time.perf_counter() - start
+
+
+@pytest.mark.skipif(not os.environ.get("PDF_PARSER_BENCHMARK"), reason="set PDF_PARSER_BENCHMARK=1 to run the microbenchmark")
+def test_benchmark(pdf_parser, original_pdf_parser):
+    random_generator = random.Random("benchmark")
+    text = b" ".join(random_generator.choice([b"lorem", b"ipsum", b"dolor", b"sit", b"amet"]) for _ in range(400000))
+    lzw = lzw_encode(text)
+    ascii85 = base64.a85encode(random_generator.randbytes(500000)) + b"~>"
+    for name, old, new in [
+        ("LZWDecode", lambda: original_pdf_parser.LZWDecode(lzw.decode("latin")), lambda: pdf_parser.LZWDecode(lzw)),
+        ("ASCII85Decode", lambda: original_pdf_parser.ASCII85Decode(ascii85.decode("latin")), lambda: pdf_parser.ASCII85Decode(ascii85)),
+    ]:
+        old_time = timed(old)
+        new_time = timed(new)
+        print("%s: %.2fs -> %.2fs" % (name, old_time, new_time))
+        assert new_time < old_time
@@ -0,0 +1,57 @@
+"""Multi-file mode: several files, directories, wildcards and @file, parsed by a pool of processes with NDJSON output."""
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import PDF_PARSER_PATH
+from test_pdf_parser_diff import stream, write_pdf
+
+
+def run(arguments, cwd):
+    process = subprocess.run([sys.executable, PDF_PARSER_PATH] + arguments, capture_output=True, timeout=120, cwd=cwd)
+    assert b"Traceback" not in process.stderr
+    return process.stdout.decode()
+
+
+@pytest.fixture(scope="module")
+def folder(tmp_path_factory):
+    folder = tmp_path_factory.mktemp("files")
+    (folder / "directory" / "sub").mkdir(parents=True)
+    catalog = (1, b"<< /Type /Catalog /OpenAction 2 0 R >>")
+    write_pdf(folder / "large.pdf", [catalog] + [(id, stream(b"", b"BT (%d) Tj ET" % id * 200)) for id in range(2, 40)])
+    write_pdf(folder / "b.pdf", [catalog, (2, b"<< /S /JavaScript /JS (x) >>")])
+    write_pdf(folder / "directory" / "c.pdf", [catalog, (2, b"<< /S /Launch >>")])
+    write_pdf(folder / "directory" / "sub" / "a.pdf", [catalog])
+    (folder / "list.txt").write_text("b.pdf\n\nmissing.pdf\n")
+    return folder
+
+
+INPUTS = ["large.pdf", "directory", "@list.txt", "[b]*.pdf"]
+FILENAMES = ["large.pdf", os.path.join("directory", "c.pdf"), os.path.join("directory", "sub", "a.pdf"), "b.pdf", "missing.pdf", "b.pdf"]
+
+
+def test_expand_filenames(pdf_parser, folder, monkeypatch):
+    monkeypatch.chdir(folder)
+    assert pdf_parser.ExpandFilenames(INPUTS) == FILENAMES
+
+
+def test_input_order(folder):
+    results = [json.loads(line) for line in run(["--workers", "2", "--chunksize", "1", "--inputorder", "-a"] + INPUTS, folder).splitlines()]
+    assert [result["file"] for result in results] == FILENAMES
+    for result in results:
+        if result["file"] == "missing.pdf":
+            assert "error" in result
+        else:
+            # the output of a file is the output of pdf-parser on that file alone
+            assert result["output"] == run(["-a", result["file"]], folder)
+
+
+def test_completion_order_and_json(folder):
+    results = [json.loads(line) for line in run(["--workers", "2", "-a", "-j"] + INPUTS, folder).splitlines()]
+    assert sorted(result["file"] for result in results) == sorted(FILENAMES)
+    keywords = dict((result["file"], result["result"]["keywords"]) for result in results if "result" in result)
+    assert keywords["b.pdf"] == {"/JS": [2], "/JavaScript": [2], "/OpenAction": [1]}
+    assert keywords[os.path.join("directory", "c.pdf")] == {"/OpenAction": [1], "/Launch": [2]}
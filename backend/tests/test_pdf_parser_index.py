@@ -0,0 +1,64 @@
+"""Option --index: objects selected with -o are read via the cross-reference instead of a linear parse."""
+import subprocess
+import sys
+
+import pytest
+
+from conftest import PDF_PARSER_PATH
+
+
+def section(data, objects, size, prev=None):
+    """Appends the objects, an xref table and a trailer to data; returns the data and the position of the xref."""
+    offsets = {}
+    for id, body in objects:
+        offsets[id] = len(data)
+        data += b"%d 0 obj\n" % id + body + b"\nendobj\n"
+    xref = len(data)
+    data += b"xref\n"
+    for id, body in objects:
+        data += b"%d 1\n%010d 00000 n \n" % (id, offsets[id])
+    data += b"trailer\n<< /Root 1 0 R /Size %d" % size
+    if prev != None:
+        data += b" /Prev %d" % prev
+    data += b" >>\nstartxref\n%d\n%%%%EOF\n" % xref
+    return data, xref
+
+
+@pytest.fixture(scope="module")
+def incremental_pdf(tmp_path_factory):
+    """A PDF with an incremental update that replaces objects 1 and 4 and adds object 5."""
+    data, xref = section(b"%PDF-1.5\n", [
+        (1, b"<< /Type /Catalog /Pages 2 0 R >>"),
+        (2, b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>"),
+        (3, b"<< /Type /Page /Parent 2 0 R /Contents 4 0 R >>"),
+        (4, b"<< /Length 9 >>\nstream\nBT (v1) ET\nendstream"),
+    ], 5)
+    data, xref = section(data, [
+        (4, b"<< /Length 9 >>\nstream\nBT (v2) ET\nendstream"),
+        (5, b"<< /S /JavaScript /JS (app.alert\\(1\\)) >>"),
+        (1, b"<< /Type /Catalog /Pages 2 0 R /OpenAction 5 0 R >>"),
+    ], 6, xref)
+    path = tmp_path_factory.mktemp("index") / "incremental.pdf"
+    path.write_bytes(data)
+    return path
+
+
+def run(options, path):
+    process = subprocess.run([sys.executable, PDF_PARSER_PATH] + options + [str(path)], capture_output=True, timeout=60)
+    assert b"Traceback" not in process.stderr
+    return process.stdout
+
+
+@pytest.mark.parametrize("id", [1, 2, 3, 4, 5])
+@pytest.mark.parametrize("filter", [[], ["-f"]], ids=["raw", "filtered"])
+def test_index_selects_the_current_version(incremental_pdf, id, filter):
+    linear = run(["-o", str(id)] + filter, incremental_pdf)
+    # the linear parse prints every version of the object, the cross-reference points to the last one
+    assert run(["--index", "-o", str(id)] + filter, incremental_pdf) == linear[linear.rindex(b"obj %d 0\n" % id):]
+
+
+def test_index_falls_back_on_a_damaged_xref(incremental_pdf, tmp_path):
+    path = tmp_path / "damaged.pdf"
+    path.write_bytes(incremental_pdf.read_bytes().replace(b"startxref\n", b"startxref\n9"))
+    assert run(["--index", "-o", "4"], path) == run(["-o", "4"], path)
+    assert run(["-o", "4"], path).count(b"obj 4 0\n") == 2
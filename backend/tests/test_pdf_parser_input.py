@@ -0,0 +1,78 @@
+"""The input layer of pdf-parser: memory-mapped files and chunked ZIP input, against the original read(1) per byte."""
+import os
+import time
+import zipfile
+
+import pytest
+
+
+def write_large_pdf(path, count):
+    """A PDF with count page objects and as many content streams."""
+    data = b"%PDF-1.5\n"
+    for id in range(1, count + 1):
+        content = b"BT /F1 12 Tf 72 %d Td (line %d with some text) Tj ET\n" % (id % 700, id) * 8
+        data += b"%d 0 obj\n<< /Type /Page /Parent 100000 0 R /Contents %d 0 R >>\nendobj\n" % (2 * id, 2 * id + 1)
+        data += b"%d 0 obj\n<< /Length %d >>\nstream\n" % (2 * id + 1, len(content)) + content + b"\nendstream\nendobj\n"
+    data += b"trailer\n<< /Root 2 0 R >>\n%%EOF\n"
+    path.write_bytes(data)
+    return str(path)
+
+
+def write_zip(path, pdf):
+    with zipfile.ZipFile(path, "w") as oZipFile:
+        oZipFile.write(pdf, os.path.basename(pdf))
+    return str(path)
+
+
+def read_bytes(module, file):
+    """Every byte of the input with its position, ungetting and re-reading each whitespace byte."""
+    oPDFDocument = module.cPDFDocument(file)
+    result = []
+    while True:
+        byte = oPDFDocument.byte()
+        if byte == None:
+            return result
+        if byte in b" \n":
+            oPDFDocument.unget(byte)
+            assert oPDFDocument.byte() == byte
+        result.append((byte, oPDFDocument.position))
+
+
+def parse(module, file):
+    oPDFParser = module.cPDFParser(file)
+    count = 0
+    while oPDFParser.GetObject() != None:
+        count += 1
+    return count
+
+
+@pytest.fixture(scope="module")
+def inputs(tmp_path_factory):
+    folder = tmp_path_factory.mktemp("input")
+    pdf = write_large_pdf(folder / "small.pdf", 300)
+    return {"file": pdf, "zip": write_zip(folder / "small.zip", pdf)}
+
+
+@pytest.mark.parametrize("kind", ["file", "zip"])
+def test_bytes_and_positions_match_original(pdf_parser, original_pdf_parser, inputs, kind, monkeypatch):
+    # small chunks, so that ungetting crosses chunk boundaries
+    monkeypatch.setattr(pdf_parser, "INPUT_CHUNK_SIZE", 97)
+    assert read_bytes(pdf_parser, inputs[kind]) == read_bytes(original_pdf_parser, inputs[kind])
+
+
+def timed(function, *arguments):
+    start = time.perf_counter()
+    function(*arguments)
+    return time.perf_counter() - start
+
+
+@pytest.mark.skipif(not os.environ.get("PDF_PARSER_BENCHMARK"), reason="set PDF_PARSER_BENCHMARK=1 to run the microbenchmark")
+def test_benchmark(pdf_parser, original_pdf_parser, tmp_path):
+    pdf = write_large_pdf(tmp_path / "large.pdf", 8000)
+    size = os.path.getsize(pdf) / 1024 / 1024
+    for kind, file in [("file", pdf), ("zip", write_zip(tmp_path / "large.zip", pdf))]:
+        assert parse(pdf_parser, file) == parse(original_pdf_parser, file)
+        old_time = timed(parse, original_pdf_parser, file)
+        new_time = timed(parse, pdf_parser, file)
+        print("%s, %.1f MB: %.2f MB/s -> %.2f MB/s" % (kind, size, size / old_time, size / new_time))
+        assert new_time < old_time
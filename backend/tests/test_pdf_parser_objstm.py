@@ -0,0 +1,53 @@
+"""Objects stored in an /ObjStm are parsed directly from the stream, decoded once."""
+from test_pdf_parser_diff import object_stream, write_pdf
+
+CONTAINED = [
+    (6, b"<< /Type /Page /Parent 3 0 R >>"),
+    (9, b"[1 2 3]"),
+    (12, b"<< /Type /Font /Next 15 0 R >>"),
+]
+
+
+def test_objstm_is_decoded_once(pdf_parser, tmp_path, monkeypatch):
+    path = write_pdf(tmp_path / "objstm.pdf", [
+        (1, b"<< /Type /Catalog /Pages 3 0 R >>"),
+        (4, object_stream(CONTAINED, filter=True)),
+        (20, b"<< /Type /Annot >>"),
+    ])
+    decoded = []
+    stream = pdf_parser.cPDFElementIndirectObject.Stream
+    monkeypatch.setattr(pdf_parser.cPDFElementIndirectObject, "Stream", lambda self, *arguments: decoded.append(self.id) or stream(self, *arguments))
+    objects = [object for object in pdf_parser.PDFElements(pdf_parser.cPDFParser(path), objstm=True) if object.type == pdf_parser.PDF_ELEMENT_INDIRECT_OBJECT]
+    assert [(object.id, object.objstm) for object in objects] == [(1, None), (4, None), (6, (4, 0)), (9, (4, 0)), (12, (4, 0)), (20, None)]
+    assert [object.GetType() for object in objects] == ["/Catalog", "/ObjStm", "/Page", "", "/Font", "/Annot"]
+    assert objects[4].GetReferences() == [("15", "0", "R")]
+    assert decoded == [4]
+
+
+def test_objstm_random_access(pdf_parser, tmp_path):
+    path = write_pdf(tmp_path / "objstm.pdf", [(4, object_stream(CONTAINED))])
+    oPDFParser = pdf_parser.cPDFParser(path)
+    oPDFParser.GetObject()  # the %PDF comment
+    oPDFObjectStream = pdf_parser.cPDFObjectStream(oPDFParser.GetObject())
+    assert oPDFObjectStream.GetObject(12).GetType() == "/Font"
+    assert oPDFObjectStream.GetObject(6).GetType() == "/Page"
+    assert oPDFObjectStream.GetObject(7) == None
+    # random access does not change the iteration in index order
+    assert [oPDFObjectStream.GetObject().id for _ in CONTAINED] == [6, 9, 12]
+    assert oPDFObjectStream.GetObject() == None
+
+
+class cFakeObjectStream:
+    def __init__(self, id):
+        self.object = type("object", (), {"id": id})
+
+
+def test_objstm_cache_evicts_least_recently_used(pdf_parser):
+    oPDFObjectStreamCache = pdf_parser.cPDFObjectStreamCache(2)
+    oPDFObjectStreamCache.Add(cFakeObjectStream(1))
+    oPDFObjectStreamCache.Add(cFakeObjectStream(2))
+    assert oPDFObjectStreamCache.Get(1).object.id == 1
+    oPDFObjectStreamCache.Add(cFakeObjectStream(3))
+    assert oPDFObjectStreamCache.Get(2) == None
+    assert oPDFObjectStreamCache.Get(1).object.id == 1
+    assert oPDFObjectStreamCache.Get(3).object.id == 3
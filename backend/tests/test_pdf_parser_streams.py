@@ -0,0 +1,70 @@
+"""Stream parsing of pdf-parser: /Length given as an indirect reference."""
+import zipfile
+
+import pytest
+
+CONTENT = b"BT (before endstream after) Tj ET"
+
+
+def write_pdf_with_xref(path):
+    """A PDF whose stream has a forward /Length reference and content that contains the keyword endstream."""
+    objects = [
+        (1, b"<< /Type /Catalog /Pages 2 0 R >>"),
+        (2, b"<< /Type /Pages /Kids [] /Count 0 >>"),
+        (3, b"<< /Length 4 0 R >>\nstream\n" + CONTENT + b"\nendstream"),
+        (4, b"%d" % len(CONTENT)),
+    ]
+    data = b"%PDF-1.5\n"
+    offsets = {}
+    for id, body in objects:
+        offsets[id] = len(data)
+        data += b"%d 0 obj\n" % id + body + b"\nendobj\n"
+    xref = len(data)
+    data += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for id, body in objects:
+        data += b"%010d 00000 n \n" % offsets[id]
+    data += b"trailer\n<< /Root 1 0 R /Size %d >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    path.write_bytes(data)
+    return str(path)
+
+
+def stream_content(pdf_parser, file):
+    for object in pdf_parser.PDFElements(pdf_parser.cPDFParser(file)):
+        if object.type == pdf_parser.PDF_ELEMENT_INDIRECT_OBJECT and object.id == 3:
+            return object.Stream(filter=False)
+
+
+@pytest.fixture
+def parsers(pdf_parser, monkeypatch):
+    """Records each cPDFParser that is constructed."""
+    created = []
+
+    class cCountingPDFParser(pdf_parser.cPDFParser):
+        def __init__(self, *arguments, **keywords):
+            created.append(arguments[0])
+            super().__init__(*arguments, **keywords)
+
+    monkeypatch.setattr(pdf_parser, "cPDFParser", cCountingPDFParser)
+    return created
+
+
+def test_forward_length_resolved_via_xref(pdf_parser, parsers, tmp_path):
+    path = write_pdf_with_xref(tmp_path / "forward.pdf")
+    assert stream_content(pdf_parser, path).rstrip() == CONTENT.decode("latin")
+    assert parsers == [path, path]
+
+
+def test_forward_length_does_not_reopen_zip(pdf_parser, parsers, tmp_path):
+    path = write_pdf_with_xref(tmp_path / "forward.pdf")
+    zip_path = str(tmp_path / "forward.zip")
+    with zipfile.ZipFile(zip_path, "w") as oZipFile:
+        oZipFile.write(path, "forward.pdf")
+    # without random access the parser falls back to the first endstream keyword
+    assert stream_content(pdf_parser, zip_path).rstrip() == "BT (before"
+    assert parsers == [zip_path]
+
+
+def test_forward_length_in_memory(pdf_parser, parsers, tmp_path):
+    data = memoryview(open(write_pdf_with_xref(tmp_path / "forward.pdf"), "rb").read())
+    assert stream_content(pdf_parser, data).rstrip() == "BT (before"
+    assert len(parsers) == 1
@@ -0,0 +1,14 @@
+"""pdf-parser stops with an error on a Python older than its minimum version."""
+import sys
+
+import pytest
+
+
+def test_minimum_python_version(pdf_parser, monkeypatch, capsys):
+    assert pdf_parser.__minimum_python_version__ == (3, 8, 0)
+    pdf_parser.TestPythonVersion(enforceMinimumVersion=True)
+    monkeypatch.setattr(pdf_parser, "__minimum_python_version__", tuple(sys.version_info[0:2]) + (sys.version_info[2] + 1,))
+    with pytest.raises(SystemExit) as exit:
+        pdf_parser.TestPythonVersion(enforceMinimumVersion=True)
+    assert exit.value.code == 1
+    assert "requires Python" in capsys.readouterr().out
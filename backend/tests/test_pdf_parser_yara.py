@@ -0,0 +1,77 @@
+"""The compiled YARA rules cache, and stream matching in a thread pool."""
+import os
+import stat
+
+import pytest
+
+yara = pytest.importorskip("yara")
+
+RULE = 'rule alert {strings: $a = "app.alert" condition: $a}'
+SOURCES = [("#", 0, RULE.encode())]
+
+
+class Compiler:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self):
+        self.count += 1
+        return yara.compile(source=RULE)
+
+
+def test_cache_miss_then_hit(pdf_parser, tmp_path):
+    directory = str(tmp_path / "cache" / "yara")
+    compile = Compiler()
+    rules = pdf_parser.YARACompileCached(directory, SOURCES, compile)
+    assert compile.count == 1
+    assert stat.S_IMODE(os.stat(directory).st_mode) == 0o700
+    assert os.listdir(directory) == [os.path.basename(pdf_parser.YARACacheFilename(directory, SOURCES))]
+    cached = pdf_parser.YARACompileCached(directory, SOURCES, compile)
+    assert compile.count == 1
+    assert [match.rule for match in cached.match(data=b"app.alert(1)")] == [match.rule for match in rules.match(data=b"app.alert(1)")] == ["alert"]
+    # other rules are another cache entry
+    pdf_parser.YARACompileCached(directory, [("#", 0, b"other")], compile)
+    assert compile.count == 2
+
+
+def test_cache_in_a_directory_writable_by_others_is_not_used(pdf_parser, tmp_path):
+    directory = tmp_path / "shared"
+    directory.mkdir()
+    directory.chmod(0o777)
+    compile = Compiler()
+    pdf_parser.YARACompileCached(str(directory), SOURCES, compile)
+    pdf_parser.YARACompileCached(str(directory), SOURCES, compile)
+    assert compile.count == 2
+    assert os.listdir(directory) == []
+
+
+def test_planted_cache_file_is_not_loaded(pdf_parser, tmp_path):
+    directory = str(tmp_path / "cache")
+    compile = Compiler()
+    pdf_parser.YARACompileCached(directory, SOURCES, compile)
+    filename = pdf_parser.YARACacheFilename(directory, SOURCES)
+    # a symbolic link to rules elsewhere
+    os.rename(filename, str(tmp_path / "planted.yarc"))
+    os.symlink(str(tmp_path / "planted.yarc"), filename)
+    pdf_parser.YARACompileCached(directory, SOURCES, compile)
+    assert compile.count == 2
+    # a file of another user
+    if os.getuid() == 0:
+        os.unlink(filename)
+        os.rename(str(tmp_path / "planted.yarc"), filename)
+        os.chown(filename, 12345, 12345)
+        pdf_parser.YARACompileCached(directory, SOURCES, compile)
+        assert compile.count == 3
+
+
+def test_matcher_keeps_the_order(pdf_parser):
+    rules = yara.compile(source=RULE)
+    objects = [(number, [("stream", b"app.alert(%d)" % number if number % 3 == 0 else b"clean")]) for number in range(50)]
+    oYARAMatcher = pdf_parser.cYARAMatcher(rules, threads=4)
+    results = []
+    for number, data in objects:
+        results += oYARAMatcher.Submit(number, data)
+    results += oYARAMatcher.Close()
+    assert [number for number, result in results] == list(range(50))
+    assert [number for number, result in results if result] == list(range(0, 50, 3))
+    assert all(result[0][0] == "stream" and [match.rule for match in result[0][1]] == ["alert"] for number, result in results if result)
@@ -0,0 +1,80 @@
+"""Scan results are cached by file SHA-256 and detector fingerprint, with expiry and LRU eviction."""
+import pytest
+
+import result_cache
+from result_cache import ResultCache, detector_fingerprint
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(result_cache, "time", clock)
+    return clock
+
+
+def test_hit_and_miss(tmp_path, clock):
+    cache = ResultCache(str(tmp_path / "cache" / "results.db"), "detectors1")
+    assert cache.get("a" * 64) is None
+    cache.put("a" * 64, {"total_blocks": 3, "is_suspicious": True})
+    assert cache.get("a" * 64) == {"total_blocks": 3, "is_suspicious": True}
+    # another process (gunicorn worker) opens the same database
+    assert ResultCache(cache.path, "detectors1").get("a" * 64) == {"total_blocks": 3, "is_suspicious": True}
+    # results of other detectors are never returned
+    assert ResultCache(cache.path, "detectors2").get("a" * 64) is None
+
+
+def test_entries_expire(tmp_path, clock):
+    cache = ResultCache(str(tmp_path / "results.db"), "detectors", ttl=60)
+    cache.put("a", {"n": 1})
+    clock.now += 59
+    assert cache.get("a") == {"n": 1}
+    # reading an entry does not extend its lifetime
+    clock.now += 2
+    assert cache.get("a") is None
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, clock):
+    cache = ResultCache(str(tmp_path / "results.db"), "detectors", max_entries=2)
+    for sha256 in ["a", "b"]:
+        cache.put(sha256, {"sha256": sha256})
+        clock.now += 1
+    assert cache.get("a") == {"sha256": "a"}
+    clock.now += 1
+    cache.put("c", {"sha256": "c"})
+    assert cache.get("b") is None
+    assert cache.get("a") == {"sha256": "a"}
+    assert cache.get("c") == {"sha256": "c"}
+
+
+def test_size_cap(tmp_path, clock):
+    cache = ResultCache(str(tmp_path / "results.db"), "detectors", max_bytes=250)
+    for sha256 in ["a", "b", "c"]:
+        cache.put(sha256, {"text": sha256 * 100})
+        clock.now += 1
+    assert [cache.get(sha256) is None for sha256 in ["a", "b", "c"]] == [True, False, False]
+
+
+def test_broken_cache_is_a_miss(tmp_path, clock):
+    path = tmp_path / "results.db"
+    path.write_bytes(b"not a database" * 100)
+    cache = ResultCache(str(path), "detectors")
+    cache.put("a", {"n": 1})
+    assert cache.get("a") is None
+
+
+def test_detector_fingerprint(tmp_path):
+    detector = tmp_path / "detector.py"
+    detector.write_text("RULES = 1\n")
+    fingerprint = detector_fingerprint([str(detector)], ["1.23"])
+    assert detector_fingerprint([str(detector)], ["1.23"]) == fingerprint
+    assert detector_fingerprint([str(detector)], ["1.24"]) != fingerprint
+    detector.write_text("RULES = 2\n")
+    assert detector_fingerprint([str(detector)], ["1.23"]) != fingerprint
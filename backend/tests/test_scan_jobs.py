@@ -0,0 +1,68 @@
+"""Scan jobs: orphaned jobs fail, a broken pool is replaced, event streams end."""
+import multiprocessing
+import os
+import time
+
+from scan_jobs import JobQueue, JobStore
+
+
+def exited_pid():
+    process = multiprocessing.Process(target=int)
+    process.start()
+    process.join()
+    return process.pid
+
+
+def crash(progress):
+    os._exit(1)
+
+
+def scan(progress):
+    progress("scan", 0, 1)
+    return {"scanned": True}
+
+
+def wait_for(store, job_id, statuses=("done", "error")):
+    for _ in range(200):
+        job = store.get(job_id)
+        if job["status"] in statuses:
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_orphaned_job_fails(tmp_path):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    store.create("live", "live.pdf")
+    store.create("orphan", "orphan.pdf")
+    store._connection().execute("UPDATE jobs SET owner = ? WHERE id = 'orphan'", (exited_pid(),))
+    assert store.get("live")["status"] == "queued"
+    assert store.get("orphan")["status"] == "error"
+    assert store.get("orphan")["error"] == "The worker process of the job exited"
+
+
+def test_broken_pool_is_shut_down_and_replaced(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite3"), workers=1)
+    job_id = queue.submit("crash.pdf", crash)
+    broken = queue.pool._executor
+    job = wait_for(queue.store, job_id)
+    assert job["status"] == "error" and job["error"].startswith("Scan process failed")
+    for _ in range(100):
+        if queue.pool._executor is None:
+            break
+        time.sleep(0.05)
+    assert queue.pool._executor is None
+    assert broken._shutdown_thread
+    job_id = queue.submit("scan.pdf", scan)
+    assert queue.pool._executor is not broken
+    assert wait_for(queue.store, job_id)["result"] == {"scanned": True}
+    queue.pool._executor.shutdown()
+
+
+def test_event_stream_has_a_deadline(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, "JOB_EVENTS_MAX_DURATION", 0.2)
+    app_module.scan_jobs.store.create("waiting", "waiting.pdf")
+    response = app_module.app.test_client().get("/jobs/waiting/events")
+    events = response.get_data(as_text=True).split("\n\n")
+    assert events[0].startswith("data: ")
+    assert events[1] == 'event: timeout\ndata: {"status": "queued"}'
@@ -0,0 +1,44 @@
+"""A malformed /ObjStm or a failed structure analysis must not make a PDF look clean."""
+import pytest
+
+from test_pdf_parser_diff import stream, write_pdf
+
+
+@pytest.fixture
+def malformed_objstm_pdf(tmp_path):
+    # /N says 5 objects, the index has 1: the /ObjStm can not be parsed, the /JavaScript after it must still be found
+    return write_pdf(tmp_path / "malformed_objstm.pdf", [
+        (1, b"<< /Type /Catalog /Pages 3 0 R /OpenAction 5 0 R >>"),
+        (3, b"<< /Type /Pages /Kids [] /Count 0 >>"),
+        (4, stream(b"/Type /ObjStm /N 5 /First 4", b"7 0 << /A 1 >>")),
+        (5, b"<< /S /JavaScript /JS (app.alert\\(1\\)) >>"),
+    ])
+
+
+def test_malformed_objstm_is_skipped(pdf_parser, malformed_objstm_pdf):
+    statistics = pdf_parser.PDFStatistics(malformed_objstm_pdf, objstm=True, keywords=pdf_parser.DefaultKeywords())
+    assert statistics.indirectObjects == 4
+    assert statistics.Keywords()["/JavaScript"] == [5]
+    assert statistics.objectStreamErrors == [(4, "Error in index of /ObjStm stream")]
+    assert statistics.Dictionary()["objstm_errors"] == [[4, "Error in index of /ObjStm stream"]]
+
+
+def test_trailer_that_does_not_parse(pdf_parser, tmp_path):
+    path = tmp_path / "trailer.pdf"
+    path.write_bytes(b"%PDF-1.4\n1 0 obj\n<< /Type /Catalog >>\nendobj\ntrailer\n[/Root 1 0 R]\nstartxref\n0\n%%EOF\n")
+    statistics = pdf_parser.PDFStatistics(str(path))
+    assert statistics.trailers == 1
+
+
+def test_malformed_objstm_is_suspicious(app_module, malformed_objstm_pdf):
+    structure = app_module.DocumentSession(malformed_objstm_pdf).structure
+    assert structure["objstm_errors"]
+    assert app_module.check_threat_intelligence(dict(structure, keywords={}))
+
+
+def test_failed_structure_analysis_is_suspicious_and_not_cached(app_module, malformed_objstm_pdf, monkeypatch):
+    monkeypatch.setattr("document_session.analyze_pdf_structure", lambda path, data=None: None)
+    result = app_module.scan_pdf(malformed_objstm_pdf)
+    assert result["is_suspicious"] is True
+    assert result["structure_analysis"] == "Structure analysis failed"
+    assert app_module.result_cache.get(result["sha256"]) is None
@@ -0,0 +1,107 @@
+"""Uploads are checked and spooled while they are received, and keep their original filename."""
+import csv
+import io
+import json
+import os
+import tracemalloc
+
+import fitz
+import pytest
+
+from upload_ingest import UploadRegistry, UploadRejected, UploadSpool, ingest_upload
+
+
+class CountingStream(io.BytesIO):
+    """A request body that counts how much of it was read."""
+
+    def __init__(self, data):
+        super().__init__(data)
+        self.count = 0
+
+    def read(self, size=-1):
+        data = super().read(size)
+        self.count += len(data)
+        return data
+
+
+def multipart(name, content):
+    boundary = b"upload-boundary"
+    body = b"--" + boundary + b'\r\nContent-Disposition: form-data; name="file"; filename="' + name + b'"\r\n'
+    body += b"Content-Type: application/pdf\r\n\r\n" + content + b"\r\n--" + boundary + b"--\r\n"
+    return body, "multipart/form-data; boundary=upload-boundary"
+
+
+def test_ingest_keeps_one_copy_of_the_upload(tmp_path):
+    content = b"%PDF-1.4\n" + os.urandom(20 * 1024 * 1024)
+    stream = io.BytesIO(content)
+    tracemalloc.start()
+    try:
+        path, data, digests = ingest_upload(stream, str(tmp_path))
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert data == content
+    with open(path, "rb") as f:
+        assert f.read() == content
+    assert peak < len(content) * 1.2
+    assert os.listdir(tmp_path / ".spool") == []
+
+
+def test_spool_rejects_junk_on_its_first_bytes(tmp_path):
+    spool = UploadSpool(str(tmp_path))
+    spool.write(b"MZ" + b"\0" * 100)
+    with pytest.raises(UploadRejected):
+        spool.write(b"\0" * 2000)
+    assert os.listdir(tmp_path / ".spool") == []
+
+
+def test_junk_upload_is_rejected_while_it_is_received(app_module):
+    body, content_type = multipart(b"junk.pdf", b"\0" * (20 * 1024 * 1024))
+    stream = CountingStream(body)
+    response = app_module.app.test_client().post("/upload", input_stream=stream, content_type=content_type, content_length=len(body))
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Not a PDF file (no %PDF- header)"}
+    assert stream.count < 1024 * 1024
+    assert os.listdir(os.path.join(app_module.UPLOAD_FOLDER, ".spool")) == []
+
+
+def test_registry_keeps_the_last_filename(tmp_path):
+    registry = UploadRegistry(str(tmp_path / "uploads.sqlite3"))
+    path = tmp_path / "shared.pdf"
+    registry.record(str(path), "first.pdf")
+    registry.record(str(path), "second.pdf")
+    # the same path, relative or absolute
+    assert registry.filename(os.path.relpath(path)) == "second.pdf"
+    assert registry.filename(str(tmp_path / "other.pdf")) == "other.pdf"
+
+
+def test_batch_reports_the_original_filename(app_module):
+    with fitz.open() as document:
+        document.new_page().insert_text((72, 72), "batch filename test")
+        data = document.tobytes()
+    client = app_module.app.test_client()
+    response = client.post("/upload", data={"file": (io.BytesIO(data), "Quarterly report.pdf")})
+    assert response.status_code == 200
+    sha256 = response.get_json()["sha256"]
+    assert os.listdir(os.path.join(app_module.UPLOAD_FOLDER, ".spool")) == []
+    lines = [json.loads(line) for line in client.post("/batch-scan").get_data(as_text=True).splitlines()]
+    results = [line for line in lines if line.get("sha256") == sha256]
+    assert [result["filename"] for result in results] == ["Quarterly report.pdf"]
+    assert "suspicious_blocks" not in results[0]
+    with open(lines[-1]["summary"]["csv"], newline="") as csv_file:
+        rows = [row for row in csv.DictReader(csv_file) if row["sha256"] == sha256]
+    assert [row["filename"] for row in rows] == ["Quarterly report.pdf"]
+
+
+def test_batches_share_the_pool_and_have_their_own_csv(app_module):
+    client = app_module.app.test_client()
+    summaries = []
+    executors = []
+    for _ in range(2):
+        lines = [json.loads(line) for line in client.post("/batch-scan").get_data(as_text=True).splitlines()]
+        summaries.append((lines[0]["batch_id"], lines[-1]["summary"]["csv"]))
+        executors.append(app_module.batch_pool.get())
+    assert summaries[0][1] != summaries[1][1]
+    for batch_id, path in summaries:
+        assert path.endswith(f"{batch_id}.csv")
+    assert executors[0] is executors[1]
@@ -0,0 +1,174 @@
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+
+from file_reader import DIGEST_ALGORITHMS
+
+# Uploads are read in chunks of this size
+INGEST_CHUNK_SIZE = 1024 * 1024
+
+# Largest accepted upload
+MAX_UPLOAD_SIZE = 100 * 1024 * 1024
+
+# Like PDF readers, accept a header anywhere in the first 1024 bytes
+PDF_MAGIC = b"%PDF-"
+PDF_MAGIC_WINDOW = 1024
+
+
+class UploadRejected(Exception):
+    """The upload is not accepted; status is the HTTP status to answer with."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class UploadSpool:
+    """An uploaded PDF, hashed, size-checked and spooled to disk as it is received.
+
+    Chunks are written to a uniquely named spool file in folder/.spool, so
+    concurrent uploads never share a file. The PDF magic is checked on the
+    first PDF_MAGIC_WINDOW bytes and the size on every chunk: junk is
+    rejected (UploadRejected) as soon as it shows, and its spool file is
+    removed. It is also a readable file, so werkzeug can use it as the
+    stream of an uploaded file (see the request class of app.py), and the
+    upload is checked while the request body is still being received.
+    """
+
+    def __init__(self, folder, max_size=MAX_UPLOAD_SIZE, algorithms=DIGEST_ALGORITHMS):
+        self.folder = folder
+        self.max_size = max_size
+        self.hashes = {algorithm: hashlib.new(algorithm) for algorithm in algorithms}
+        # The content is kept for the scan, in one buffer that grows in place
+        self.data = bytearray()
+        spool_folder = os.path.join(folder, ".spool")
+        os.makedirs(spool_folder, exist_ok=True)
+        self.spool = tempfile.NamedTemporaryFile(dir=spool_folder, suffix=".part", delete=False)
+        self.finished = False
+
+    def write(self, chunk):
+        try:
+            size = len(self.data) + len(chunk)
+            if size > self.max_size:
+                raise UploadRejected(f"File is larger than {self.max_size // (1024 * 1024)} MB", 413)
+            if len(self.data) < PDF_MAGIC_WINDOW <= size:
+                self._check_magic(bytes(self.data[:PDF_MAGIC_WINDOW]) + bytes(chunk[:PDF_MAGIC_WINDOW]))
+            for digest in self.hashes.values():
+                digest.update(chunk)
+            self.spool.write(chunk)
+            self.data += chunk
+        except BaseException:
+            self.close()
+            raise
+        return len(chunk)
+
+    def _check_magic(self, head):
+        if PDF_MAGIC not in head[:PDF_MAGIC_WINDOW]:
+            raise UploadRejected("Not a PDF file (no %PDF- header)")
+
+    def finish(self):
+        """Rename the complete upload atomically to folder/<sha256>.pdf; returns (path, data, digests) like read_file."""
+        try:
+            if not self.data:
+                raise UploadRejected("Empty file")
+            if len(self.data) < PDF_MAGIC_WINDOW:
+                self._check_magic(bytes(self.data))
+            self.spool.close()
+            digests = {algorithm: digest.hexdigest() for algorithm, digest in self.hashes.items()}
+            path = os.path.join(self.folder, f"{digests['sha256']}.pdf")
+            os.replace(self.spool.name, path)
+        except BaseException:
+            self.close()
+            raise
+        self.finished = True
+        return path, self.data, digests
+
+    # Read access for werkzeug, which seeks to the start of a received file
+    def seek(self, *arguments):
+        return self.spool.seek(*arguments)
+
+    def tell(self):
+        return self.spool.tell()
+
+    def read(self, *arguments):
+        return self.spool.read(*arguments)
+
+    def readline(self, *arguments):
+        return self.spool.readline(*arguments)
+
+    def close(self):
+        """Remove the spool file of an upload that was not finished."""
+        if self.finished:
+            return
+        self.finished = True
+        self.spool.close()
+        try:
+            os.unlink(self.spool.name)
+        except FileNotFoundError:
+            pass
+
+
+def ingest_upload(stream, folder, max_size=MAX_UPLOAD_SIZE, algorithms=DIGEST_ALGORITHMS):
+    """Spool an uploaded PDF into folder under its SHA-256, hashing it while it is received.
+
+    stream is an UploadSpool that already received the upload (a file of a
+    request), or any stream, which is then read in chunks of
+    INGEST_CHUNK_SIZE into an UploadSpool. The complete file is renamed to
+    folder/<sha256>.pdf.
+
+    Returns (path, data, digests) like read_file, so the upload does not
+    have to be read again to be scanned.
+    """
+    if not isinstance(stream, UploadSpool):
+        spool = UploadSpool(folder, max_size, algorithms)
+        try:
+            while True:
+                chunk = stream.read(INGEST_CHUNK_SIZE)
+                if not chunk:
+                    break
+                spool.write(chunk)
+        except BaseException:
+            spool.close()
+            raise
+        stream = spool
+    return stream.finish()
+
+
+class UploadRegistry:
+    """The original filename of each upload, in SQLite.
+
+    Uploads are stored under their SHA-256, so the name a file was uploaded
+    with is kept here, for the reports that list the upload folder (like the
+    batch scan). Identical uploads share a path: the last name is kept.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _connection(self):
+        # sqlite3 connections can not be shared between threads, nor with a forked scan process
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("CREATE TABLE IF NOT EXISTS uploads (path TEXT PRIMARY KEY, filename TEXT)")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def record(self, path, filename):
+        self._connection().execute(
+            "INSERT INTO uploads (path, filename) VALUES (?, ?) ON CONFLICT(path) DO UPDATE SET filename = excluded.filename",
+            (os.path.abspath(path), filename),
+        )
+
+    def filename(self, path):
+        """The original filename of the upload at path, its own name when it was not uploaded."""
+        row = self._connection().execute("SELECT filename FROM uploads WHERE path = ?", (os.path.abspath(path),)).fetchone()
+        return row[0] if row and row[0] else os.path.basename(path)